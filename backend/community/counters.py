@@ -0,0 +1,19 @@
+from django.db.models import F
+
+from .models import CommunityGroup
+
+
+def increment_members(community_id, delta=1):
+
+    '''
+    Atomically add delta to CommunityGroup.member_count with a single
+    UPDATE that only touches that column
+    Call inside the transaction that writes the membership row
+    '''
+
+    groups = CommunityGroup.objects.filter(pk=community_id)
+    if delta < 0:
+        # never go below zero if the counter drifted, reconcile fixes it
+        groups = groups.filter(member_count__gte=-delta)
+    groups.update(member_count=F('member_count') + delta)
+
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from community.models import CommunityGroup, CommunityMembership
+
+
+class Command(BaseCommand):
+
+    help = 'Recompute CommunityGroup.member_count from CommunityMembership'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Communities per batch')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted communities')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        last_id = 0
+        checked = fixed = 0
+
+        members = (
+            CommunityMembership.objects.filter(community=OuterRef('pk'))
+            .order_by()
+            .values('community')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        actual = Coalesce(Subquery(members), 0)
+
+        while True:
+            # walk the table by primary key so every statement stays bounded
+            ids = list(
+                CommunityGroup.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            batch = CommunityGroup.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+            last_id = ids[-1]
+
+            # the comparison and the fix are each a single set-wise statement
+            drifted = batch.annotate(actual=actual).exclude(member_count=F('actual'))
+            if options['dry_run']:
+                count = drifted.count()
+            else:
+                count = batch.filter(pk__in=drifted.values('pk')).update(member_count=actual)
+
+            checked += len(ids)
+            fixed += count
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        action = 'would fix' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} communities, {action} {fixed} in {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0003_alter_communitygroup_image_alter_communitypost_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='communitypost',
+            options={'ordering': ['-is_pinned', '-created_at', '-id'], 'verbose_name': 'Community Post', 'verbose_name_plural': 'Community Posts'},
+        ),
+        migrations.AddIndex(
+            model_name='communitypost',
+            index=models.Index(fields=['community', '-is_pinned', '-created_at', '-id'], name='community_post_page_idx'),
+        ),
+    ]
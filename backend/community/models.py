@@ -2,6 +2,22 @@ from django.db import models
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db.models import OuterRef, Subquery, Value
+
+class CommunityGroupQuerySet(models.QuerySet):
+    
+    def with_membership(self, user):
+        
+        '''
+        Annotate viewer_role, the user's role in each community (None if not
+        a member), so CommunityGroupSerializer does not query per group
+        '''
+        
+        if user is not None and user.is_authenticated:
+            roles = CommunityMembership.objects.filter(community=OuterRef('pk'), user=user).values('role')[:1]
+            return self.annotate(viewer_role=Subquery(roles))
+        return self.annotate(viewer_role=Value(None, output_field=models.CharField()))
+
 
 class CommunityGroup(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -16,6 +32,8 @@ class CommunityGroup(models.Model):
     is_private = models.BooleanField(default=False)
     member_count = models.IntegerField(default=0)
     
+    objects = CommunityGroupQuerySet.as_manager()
+    
     def __str__(self):
         return self.name
     
@@ -62,7 +80,11 @@ class CommunityPost(models.Model):
         return f'{self.title} - {self.community.name}'
     
     class Meta:
-        ordering = ['-is_pinned', '-created_at']
+        ordering = ['-is_pinned', '-created_at', '-id']
         verbose_name = 'Community Post'
         verbose_name_plural = 'Community Posts'
+        indexes = [
+            # community post list: pinned first, then newest, keyset paginated
+            models.Index(fields=['community', '-is_pinned', '-created_at', '-id'], name='community_post_page_idx'),
+        ]
     
\ No newline at end of file
@@ -1,11 +1,12 @@
 from rest_framework import serializers
 from .models import CommunityGroup, CommunityMembership, CommunityPost
-from portal.serializers import UserProfileDetailSerializer
+from portal.serializers import UserProfileCardSerializer, UserProfileDetailSerializer
+from portal.loaders import LoadedListSerializer, LoadedProfileField, LoadedUserField
 
 class CommunityGroupSerializer(serializers.ModelSerializer):
     
-    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
-    created_by_profile = UserProfileDetailSerializer(source='created_by.profile', read_only=True)
+    created_by_username = LoadedUserField(source='created_by_id')
+    created_by_profile = LoadedProfileField(UserProfileDetailSerializer, source='created_by_id')
     is_member = serializers.SerializerMethodField()
     user_role = serializers.SerializerMethodField()
     
@@ -29,25 +30,28 @@ class CommunityGroupSerializer(serializers.ModelSerializer):
         ]
         
         read_only_fields = ['created_by', 'created_at', 'member_count']
+        list_serializer_class = LoadedListSerializer
+        
+    def get_viewer_role(self, obj):
+        
+        '''
+        The viewer's role in the community, from the viewer_role annotation
+        added by CommunityGroup.objects.with_membership() when present
+        '''
+        
+        if not hasattr(obj, 'viewer_role'):
+            request = self.context.get('request')
+            membership = None
+            if request and request.user.is_authenticated:
+                membership = CommunityMembership.objects.filter(user=request.user, community=obj).first()
+            obj.viewer_role = membership.role if membership else None
+        return obj.viewer_role
         
     def get_is_member(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return CommunityMembership.objects.filter(
-                user=request.user,
-                community=obj
-            ).exists()
-        return False
+        return self.get_viewer_role(obj) is not None
     
     def get_user_role(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            membership = CommunityMembership.objects.filter(
-                user=request.user,
-                community=obj
-            ).first()
-            return membership.role if membership else None
-        return None
+        return self.get_viewer_role(obj)
     
 class CommunityGroupCreateSerializer(serializers.ModelSerializer):
         
@@ -70,10 +74,19 @@ class CommunityGroupCreateSerializer(serializers.ModelSerializer):
         
         return value
     
+    def update(self, instance, validated_data):
+        
+        '''save only the edited columns, member_count moves with joins and leaves'''
+        
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+    
 class CommunityMembershipSerializer(serializers.ModelSerializer):
     
-    user_profile = UserProfileDetailSerializer(source='user.profile', read_only=True)
-    username = serializers.CharField(source='user.username', read_only=True)
+    user_profile = LoadedProfileField(UserProfileCardSerializer, source='user_id')
+    username = LoadedUserField(source='user_id')
     community_name = serializers.CharField(source='community.name', read_only=True)
     
     class Meta:
@@ -89,11 +102,12 @@ class CommunityMembershipSerializer(serializers.ModelSerializer):
             'joined_at'
         ]
         read_only_fields = ['joined_at']
+        list_serializer_class = LoadedListSerializer
         
 class CommunityPostSerializer(serializers.ModelSerializer):
     
-    author_username = serializers.CharField(source='author.username', read_only=True)
-    author_profile = UserProfileDetailSerializer(source='author.profile', read_only=True)
+    author_username = LoadedUserField(source='author_id')
+    author_profile = LoadedProfileField(UserProfileCardSerializer, source='author_id')
     community_name = serializers.CharField(source='community.name', read_only=True)
     can_edit = serializers.SerializerMethodField()
     can_delete = serializers.SerializerMethodField()
@@ -117,33 +131,42 @@ class CommunityPostSerializer(serializers.ModelSerializer):
             'can_delete'
         ]
         read_only_fields = ['author', 'created_at']
+        list_serializer_class = LoadedListSerializer
         
     
-    def get_can_edit(self, obj):
+    def get_viewer_role(self, obj):
+        
+        '''
+        The viewer's role in the post's community. List views pass the role
+        they already resolved as viewer_roles={community_id: role} in the
+        context, otherwise it is looked up once per community.
+        '''
+        
+        roles = self.context.setdefault('viewer_roles', {})
+        if obj.community_id not in roles:
+            request = self.context.get('request')
+            role = None
+            if request and request.user.is_authenticated:
+                role = CommunityMembership.objects.filter(
+                    user=request.user,
+                    community_id=obj.community_id
+                ).values_list('role', flat=True).first()
+            roles[obj.community_id] = role
+        return roles[obj.community_id]
+    
+    def can_moderate(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            if obj.author == request.user:
+            if obj.author_id == request.user.id:
                 return True
-            membership = CommunityMembership.objects.filter(
-                user=request.user,
-                community=obj.community,
-                role__in=['moderator', 'admin']
-            ).first()
-            return bool(membership)
+            return self.get_viewer_role(obj) in ('moderator', 'admin')
         return False
     
+    def get_can_edit(self, obj):
+        return self.can_moderate(obj)
+    
     def get_can_delete(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            if obj.author == request.user:
-                return True
-            membership = CommunityMembership.objects.filter(
-                user=request.user,
-                community=obj.community,
-                role__in=['moderator', 'admin']
-            ).first()
-            return bool(membership)
-        return False
+        return self.can_moderate(obj)
     
     
 class CommunityPostCreateSerializer(serializers.ModelSerializer):
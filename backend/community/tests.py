@@ -1,3 +1,64 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from portal.models import UserProfile
+
+from .models import CommunityGroup, CommunityMembership
+
+
+def make_user(username):
+    user = User.objects.create_user(username, f'{username}@ssct.edu.ph')
+    UserProfile.objects.create(
+        user=user,
+        firstname=username.title(),
+        lastname='Tester',
+        birth_date=datetime.date(2000, 1, 1),
+        gender='male',
+        role='student',
+        department='ccis',
+        course='bscs'
+    )
+    return user
+
 
-# Create your tests here.
+class MemberCountTests(TestCase):
+    
+    def setUp(self):
+        admin = make_user('admin')
+        self.community = CommunityGroup.objects.create(name='Coders', description='Code club', created_by=admin, member_count=1)
+        CommunityMembership.objects.create(user=admin, community=self.community, role='admin')
+        
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('member'))
+        self.url = f'/api/v1/community/groups/{self.community.pk}/join/'
+        
+    def member_count(self):
+        self.community.refresh_from_db()
+        return self.community.member_count
+    
+    def test_join_and_leave_move_the_count(self):
+        self.assertEqual(self.client.post(self.url).status_code, 201)
+        self.assertEqual(self.member_count(), 2)
+        
+        self.assertEqual(self.client.delete(self.url).status_code, 200)
+        self.assertEqual(self.member_count(), 1)
+        
+    def test_duplicate_join_and_leave_leave_the_count_alone(self):
+        self.client.post(self.url)
+        self.assertEqual(self.client.post(self.url).status_code, 400)
+        self.assertEqual(self.member_count(), 2)
+        
+        self.client.delete(self.url)
+        self.assertEqual(self.client.delete(self.url).status_code, 400)
+        self.assertEqual(self.member_count(), 1)
+        
+    def test_reconcile_fixes_drifted_counts(self):
+        CommunityGroup.objects.filter(pk=self.community.pk).update(member_count=9)
+        
+        call_command('reconcile_member_counts', stdout=StringIO())
+        self.assertEqual(self.member_count(), 1)
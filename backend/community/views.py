@@ -3,9 +3,14 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.db import transaction
 from django.db.models import Q
 
+from stream.db import insert_ignore
+from stream.pagination import KeysetPagination
+
 from .models import CommunityGroup, CommunityMembership, CommunityPost
+from .counters import increment_members
 from .serializers import (
     CommunityGroupSerializer,
     CommunityGroupCreateSerializer,
@@ -21,7 +26,7 @@ class CommunityGroupListView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        communities = CommunityGroup.objects.filter(is_active=True)
+        communities = CommunityGroup.objects.with_membership(request.user).filter(is_active=True)
         serializer = CommunityGroupSerializer(communities, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -42,16 +47,15 @@ class CommunityGroupCreateView(APIView):
         serializer = CommunityGroupCreateSerializer(data=request.data)
         
         if serializer.is_valid():
-            community = serializer.save(created_by=request.user)
-            
-            # Automatically make creator an admin member
-            CommunityMembership.objects.create(
-                user=request.user,
-                community=community,
-                role='admin'
-            )
-            community.member_count = 1
-            community.save()
+            with transaction.atomic():
+                community = serializer.save(created_by=request.user, member_count=1)
+                
+                # Automatically make creator an admin member
+                CommunityMembership.objects.create(
+                    user=request.user,
+                    community=community,
+                    role='admin'
+                )
             
             response_serializer = CommunityGroupSerializer(community, context={'request': request})
             return Response({
@@ -70,7 +74,7 @@ class CommunityGroupDetailView(APIView):
     
     def get_object(self, pk):
         try:
-            return CommunityGroup.objects.get(pk=pk, is_active=True)
+            return CommunityGroup.objects.with_membership(self.request.user).get(pk=pk, is_active=True)
         except CommunityGroup.DoesNotExist:
             return None
     
@@ -122,7 +126,7 @@ class CommunityGroupDetailView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
         
         community.is_active = False
-        community.save()
+        community.save(update_fields=['is_active', 'updated_at'])
         return Response({
             'message': 'Community deleted'
         }, status=status.HTTP_200_OK)
@@ -143,22 +147,23 @@ class CommunityMembershipView(APIView):
                 'error': 'Community not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if already a member
-        if CommunityMembership.objects.filter(user=request.user, community=community).exists():
+        # a duplicate join inserts nothing and leaves the count alone
+        with transaction.atomic():
+            joined = insert_ignore(
+                CommunityMembership,
+                user=request.user,
+                community=community,
+                role='member'
+            )
+            if joined:
+                increment_members(community.id, 1)
+        
+        if not joined:
             return Response({
                 'error': 'You are already a member of this community'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create membership
-        membership = CommunityMembership.objects.create(
-            user=request.user,
-            community=community,
-            role='member'
-        )
-        
-        # Update member count
-        community.member_count += 1
-        community.save()
+        membership = CommunityMembership.objects.select_related('community').get(user=request.user, community=community)
         
         return Response({
             'message': f'Successfully joined {community.name}',
@@ -194,11 +199,11 @@ class CommunityMembershipView(APIView):
                     'error': 'Cannot leave - you are the last admin'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        membership.delete()
-        
-        # Update member count
-        community.member_count = max(0, community.member_count - 1)
-        community.save()
+        # a concurrent leave deletes nothing and leaves the count alone
+        with transaction.atomic():
+            left, _ = CommunityMembership.objects.filter(pk=membership.pk).delete()
+            if left:
+                increment_members(community.id, -1)
         
         return Response({
             'message': f'Successfully left {community.name}'
@@ -229,7 +234,7 @@ class CommunityMembersListView(APIView):
                 'error': 'This is a private community'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        members = CommunityMembership.objects.filter(community=community)
+        members = CommunityMembership.objects.filter(community=community).select_related('community')
         serializer = CommunityMembershipSerializer(members, many=True)
         
         return Response({
@@ -287,7 +292,12 @@ class UpdateMemberRoleView(APIView):
         
 class CommunityPostListView(APIView):
     
-    '''API endpoint for listing posts in a community group'''
+    '''
+    API endpoint for listing posts in a community group
+    
+    Cursor paginated pinned first, then newest, pass ?paginate=false for
+    the old unpaginated list
+    '''
     
     permission_classes = [IsAuthenticated]
     
@@ -299,21 +309,28 @@ class CommunityPostListView(APIView):
                 'error': 'Community not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if user is a member
-        is_member = CommunityMembership.objects.filter(
+        # Check if user is a member, the role also decides can_edit/can_delete
+        role = CommunityMembership.objects.filter(
             user=request.user,
             community=community
-        ).exists()
+        ).values_list('role', flat=True).first()
         
-        if not is_member:
+        if role is None:
             return Response({
                 'error': 'You must be a member to view posts'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        posts = CommunityPost.objects.filter(community=community)
-        serializer = CommunityPostSerializer(posts, many=True, context={'request': request})
+        posts = CommunityPost.objects.filter(community=community).select_related('community')
+        context = {'request': request, 'viewer_roles': {community.id: role}}
         
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if request.query_params.get('paginate') == 'false':
+            serializer = CommunityPostSerializer(posts, many=True, context=context)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        
+        paginator = KeysetPagination(ordering=CommunityPost._meta.ordering)
+        page = paginator.paginate_queryset(posts, request)
+        serializer = CommunityPostSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
     
 class CommunityPostCreateView(APIView):
     
@@ -462,9 +479,10 @@ class UserCommunitiesView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        memberships = CommunityMembership.objects.filter(user=request.user)
-        community_ids = memberships.values_list('community_id', flat=True)
-        communities = CommunityGroup.objects.filter(id__in=community_ids, is_active=True)
+        communities = CommunityGroup.objects.with_membership(request.user).filter(
+            memberships__user=request.user,
+            is_active=True
+        )
         
         serializer = CommunityGroupSerializer(communities, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,32 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'task', 'created_at']
+    search_fields = ['task', 'idempotency_key', 'last_error']
+    readonly_fields = ['created_at', 'finished_at', 'locked_by', 'locked_at', 'last_error']
+    actions = ['requeue']
+    
+    fieldsets = (
+        ('Job', {
+            'fields': ('task', 'payload', 'idempotency_key')
+        }),
+        ('Status', {
+            'fields': ('status', 'attempts', 'max_attempts', 'run_after', 'last_error')
+        }),
+        ('Worker', {
+            'fields': ('locked_by', 'locked_at', 'created_at', 'finished_at')
+        }),
+    )
+    
+    @admin.action(description='Requeue selected jobs')
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_after=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f'{updated} job(s) requeued')
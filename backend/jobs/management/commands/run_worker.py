@@ -0,0 +1,58 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.worker import claim_job, default_worker_id, purge_finished, run_job
+
+
+class Command(BaseCommand):
+    
+    help = 'Run queued background jobs (notification fan-out, timelines, ...)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--worker-id', default=None, help='Name recorded on claimed jobs')
+        parser.add_argument('--sleep', type=float, default=None, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due')
+        
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or default_worker_id()
+        sleep = options['sleep'] if options['sleep'] is not None else settings.JOBS_POLL_INTERVAL
+        
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        
+        self.stdout.write(f'Worker {worker_id} started')
+        done = failed = 0
+        purged_at = None
+        
+        while not self.stopping:
+            close_old_connections()
+            
+            if purged_at is None or time.monotonic() - purged_at >= settings.JOBS_PURGE_INTERVAL:
+                purged = purge_finished()
+                purged_at = time.monotonic()
+                if purged:
+                    self.stdout.write(f'Purged {purged} finished jobs past retention')
+                    
+            job = claim_job(worker_id)
+            
+            if job is None:
+                if options['burst']:
+                    break
+                time.sleep(sleep)
+                continue
+            
+            if run_job(job):
+                done += 1
+            else:
+                failed += 1
+                
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker_id} stopped: {done} done, {failed} failed attempts'))
+        
+    def stop(self, signum, frame):
+        # finish the current job, then exit
+        self.stopping = True
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:24
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def populate_heartbeats(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    # running jobs keep the reclaim time they had under locked_at
+    Job.objects.filter(status='running').update(heartbeat_at=F('locked_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_heartbeats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    
+    '''A unit of background work, claimed and run by `manage.py run_worker`'''
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    
+    # enqueueing twice with the same key is a no-op
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # refreshed by the running worker, see jobs.worker.Heartbeat
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # the worker polls for due jobs
+            models.Index(fields=['status', 'run_after'], name='job_due_idx'),
+            # the worker purges finished jobs past retention
+            models.Index(fields=['status', 'finished_at'], name='job_finished_idx'),
+        ]
+        
+    def __str__(self):
+        return f'{self.task} #{self.pk} ({self.status})'
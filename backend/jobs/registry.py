@@ -0,0 +1,54 @@
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    
+    '''Register a function as a job handler, it receives the payload as kwargs'''
+    
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, key=None, run_after=None, max_attempts=None):
+    
+    '''
+    Queue a job, in the caller's transaction so it only exists if the
+    surrounding write commits. Returns False when `key` was already queued.
+    '''
+    
+    if name not in TASKS:
+        raise ValueError(f'Unknown task {name}')
+    
+    job = Job(
+        task=name,
+        payload=payload or {},
+        idempotency_key=key,
+        run_after=run_after or timezone.now(),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        if key and Job.objects.filter(idempotency_key=key).exists():
+            return False
+        raise
+    
+    if settings.JOBS_RUN_INLINE:
+        from .worker import run_job_inline
+        transaction.on_commit(lambda: run_job_inline(job.pk))
+    
+    return True
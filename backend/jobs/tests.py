@@ -0,0 +1,251 @@
+import time
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .registry import TASKS, enqueue
+from .worker import claim_job, purge_finished, run_job, run_job_inline
+
+
+class ClaimTests(TestCase):
+    
+    def test_two_workers_cannot_claim_the_same_job(self):
+        job = Job.objects.create(task='test.noop')
+        
+        self.assertEqual(claim_job('a').pk, job.pk)
+        self.assertIsNone(claim_job('b'))
+        
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), ('running', 'a', 1))
+        
+    def test_lost_race_moves_on_to_the_next_candidate(self):
+        first = Job.objects.create(task='test.noop')
+        second = Job.objects.create(task='test.noop')
+        
+        # another worker claims the first job between our read and our update
+        original = Job.objects.filter
+        def racing_filter(*args, **kwargs):
+            if kwargs.get('pk') == first.pk and 'attempts' in kwargs:
+                original(pk=first.pk).update(status='running', attempts=1, locked_by='other')
+            return original(*args, **kwargs)
+        
+        with mock.patch.object(Job.objects, 'filter', side_effect=racing_filter):
+            claimed = claim_job('me')
+            
+        self.assertEqual(claimed.pk, second.pk)
+        self.assertEqual(Job.objects.get(pk=first.pk).locked_by, 'other')
+        
+    def test_future_jobs_are_not_claimed(self):
+        Job.objects.create(task='test.noop', run_after=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(claim_job('a'))
+        
+        
+@override_settings(JOBS_RETRY_BACKOFF=10)
+class RunJobTests(TestCase):
+    
+    def setUp(self):
+        def fail(**payload):
+            User.objects.create(username='partial')
+            raise RuntimeError('boom')
+            
+        TASKS['test.fail'] = fail
+        TASKS['test.ok'] = lambda **payload: User.objects.create(username=payload['username'])
+        self.addCleanup(TASKS.pop, 'test.fail')
+        self.addCleanup(TASKS.pop, 'test.ok')
+        
+    def run_claimed(self, task, **fields):
+        Job.objects.create(task=task, **fields)
+        job = claim_job('worker')
+        if task == 'test.ok':
+            return run_job(job), Job.objects.get(pk=job.pk)
+        
+        with self.assertLogs('jobs.worker', level='ERROR'):
+            ok = run_job(job)
+        return ok, Job.objects.get(pk=job.pk)
+    
+    def test_success_marks_done(self):
+        ok, job = self.run_claimed('test.ok', payload={'username': 'made'})
+        
+        self.assertTrue(ok)
+        self.assertEqual(job.status, 'done')
+        self.assertIsNotNone(job.finished_at)
+        self.assertTrue(User.objects.filter(username='made').exists())
+        
+    def test_failure_rolls_back_and_backs_off(self):
+        before = timezone.now()
+        ok, job = self.run_claimed('test.fail')
+        
+        self.assertFalse(ok)
+        self.assertEqual(job.status, 'queued')
+        self.assertIn('boom', job.last_error)
+        self.assertFalse(User.objects.filter(username='partial').exists())
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=10))
+        
+    def test_backoff_doubles_per_attempt(self):
+        before = timezone.now()
+        ok, job = self.run_claimed('test.fail', attempts=2)
+        
+        self.assertEqual(job.attempts, 3)
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=40))
+        self.assertLess(job.run_after, before + timedelta(seconds=80))
+        
+    def test_gives_up_after_max_attempts(self):
+        ok, job = self.run_claimed('test.fail', attempts=4, max_attempts=5)
+        
+        self.assertFalse(ok)
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+        
+    def test_unknown_task_fails_like_any_error(self):
+        ok, job = self.run_claimed('test.missing')
+        
+        self.assertFalse(ok)
+        self.assertIn('No handler registered', job.last_error)
+        
+        
+class ExpiredClaimTests(TestCase):
+    
+    def setUp(self):
+        def reclaimed(fail=False):
+            User.objects.create(username='stale')
+            if fail:
+                raise RuntimeError('boom')
+            
+        TASKS['test.reclaimed'] = reclaimed
+        self.addCleanup(TASKS.pop, 'test.reclaimed')
+        
+    def run_reclaimed(self, **payload):
+        Job.objects.create(task='test.reclaimed', payload=payload, max_attempts=1)
+        job = claim_job('worker')
+        # our claim expires and another worker takes the job over
+        Job.objects.filter(pk=job.pk).update(locked_by='other', attempts=2)
+        
+        with self.assertLogs('jobs.worker'):
+            ok = run_job(job)
+        return ok, Job.objects.get(pk=job.pk)
+        
+    def test_success_after_losing_the_claim_rolls_back(self):
+        ok, job = self.run_reclaimed()
+        
+        self.assertFalse(ok)
+        self.assertEqual((job.status, job.locked_by), ('running', 'other'))
+        self.assertFalse(User.objects.filter(username='stale').exists())
+        
+    def test_failure_after_losing_the_claim_leaves_the_new_owner_alone(self):
+        ok, job = self.run_reclaimed(fail=True)
+        
+        self.assertFalse(ok)
+        self.assertEqual((job.status, job.locked_by, job.last_error), ('running', 'other', ''))
+        
+        
+@override_settings(JOBS_RETENTION_DONE_DAYS=7, JOBS_RETENTION_FAILED_DAYS=30)
+class PurgeTests(TestCase):
+    
+    def finished(self, status, days):
+        return Job.objects.create(task='test.noop', status=status, finished_at=timezone.now() - timedelta(days=days))
+    
+    def test_finished_jobs_past_retention_are_deleted(self):
+        keep = [
+            self.finished('done', 6),
+            self.finished('failed', 29),
+            Job.objects.create(task='test.noop'),
+        ]
+        self.finished('done', 8)
+        self.finished('done', 9)
+        self.finished('failed', 31)
+        
+        self.assertEqual(purge_finished(batch_size=2), 3)
+        self.assertEqual(set(Job.objects.values_list('pk', flat=True)), {job.pk for job in keep})
+        
+    def test_worker_purges_on_start(self):
+        self.finished('done', 8)
+        
+        call_command('run_worker', '--burst', stdout=StringIO())
+        
+        self.assertFalse(Job.objects.exists())
+        
+        
+class EnqueueTests(TestCase):
+    
+    def setUp(self):
+        TASKS['test.ok'] = lambda **payload: User.objects.create(username=payload['username'])
+        self.addCleanup(TASKS.pop, 'test.ok')
+        
+    def test_idempotency_key_queues_once(self):
+        self.assertTrue(enqueue('test.ok', {'username': 'a'}, key='once'))
+        self.assertFalse(enqueue('test.ok', {'username': 'a'}, key='once'))
+        self.assertEqual(Job.objects.count(), 1)
+        
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('test.missing')
+            
+    @override_settings(JOBS_RUN_INLINE=True)
+    def test_inline_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('test.ok', {'username': 'inline'})
+            self.assertFalse(User.objects.filter(username='inline').exists())
+            
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.locked_by), ('done', 'inline'))
+        self.assertTrue(User.objects.filter(username='inline').exists())
+        
+    def test_inline_run_skips_a_job_already_claimed(self):
+        enqueue('test.ok', {'username': 'claimed'})
+        job = claim_job('worker')
+        
+        run_job_inline(job.pk)
+        
+        self.assertFalse(User.objects.filter(username='claimed').exists())
+        
+        
+class HeartbeatTests(TestCase):
+    
+    def test_running_job_with_fresh_heartbeat_is_not_reclaimed(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        Job.objects.create(task='test.noop', status='running', locked_by='a', locked_at=long_ago, heartbeat_at=timezone.now())
+        
+        self.assertIsNone(claim_job('b'))
+        
+    def test_running_job_without_heartbeat_is_reclaimed(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        job = Job.objects.create(task='test.noop', status='running', attempts=1, locked_by='a', locked_at=long_ago, heartbeat_at=long_ago)
+        
+        claimed = claim_job('b')
+        
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.locked_by, 'b')
+        self.assertEqual(claimed.attempts, 2)
+        
+        
+@override_settings(JOBS_HEARTBEAT_INTERVAL=0.05, JOBS_VISIBILITY_TIMEOUT=0.5)
+class LongRunningJobTests(TransactionTestCase):
+    
+    def setUp(self):
+        self.reclaimed = []
+        
+        def slow(**payload):
+            # outlive the visibility timeout, then let another worker poll
+            time.sleep(1)
+            self.reclaimed.append(claim_job('other'))
+            
+        TASKS['test.slow'] = slow
+        self.addCleanup(TASKS.pop, 'test.slow')
+        
+    def test_job_still_running_is_not_reclaimed(self):
+        Job.objects.create(task='test.slow')
+        job = claim_job('worker')
+        
+        self.assertTrue(run_job(job))
+        self.assertEqual(self.reclaimed, [None])
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.heartbeat_at, job.locked_at)
@@ -0,0 +1,188 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .registry import TASKS
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_job(worker_id):
+    
+    '''
+    Claim the oldest due job, or a running one whose worker stopped
+    heartbeating longer than JOBS_VISIBILITY_TIMEOUT ago (it crashed or
+    was killed, a live worker beats every JOBS_HEARTBEAT_INTERVAL)
+    
+    The claim is a conditional UPDATE, so two workers racing for the same
+    row cannot both win on any database backend
+    '''
+    
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_VISIBILITY_TIMEOUT)
+    
+    candidates = (
+        Job.objects.filter(
+            Q(status='queued', run_after__lte=now) |
+            Q(status='running', heartbeat_at__lt=stale)
+        )
+        .order_by('run_after', 'id')
+        .values_list('id', 'status', 'attempts')[:10]
+    )
+    
+    for job_id, status, attempts in candidates:
+        claimed = Job.objects.filter(pk=job_id, status=status, attempts=attempts).update(
+            status='running',
+            attempts=F('attempts') + 1,
+            locked_by=worker_id,
+            locked_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+        
+    return None
+
+
+class Heartbeat:
+    
+    '''
+    Refresh a running job's heartbeat_at from a background thread, so a
+    job that runs longer than JOBS_VISIBILITY_TIMEOUT is not reclaimed
+    while its worker is still alive
+    '''
+    
+    def __init__(self, job):
+        self.job = job
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f'job-heartbeat-{job.pk}', daemon=True)
+        
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+        
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.JOBS_HEARTBEAT_INTERVAL):
+                self.beat()
+        finally:
+            # the thread has its own database connection
+            connections.close_all()
+            
+    def beat(self):
+        try:
+            Job.objects.filter(pk=self.job.pk, status='running', locked_by=self.job.locked_by).update(
+                heartbeat_at=timezone.now()
+            )
+        except Exception:
+            # a missed beat only matters if every beat in the timeout fails
+            logger.exception('Heartbeat for job %s failed', self.job.pk)
+
+
+class ClaimLost(Exception):
+    
+    '''The job was reclaimed by another worker while this one ran it'''
+    
+    
+def owned(job):
+    
+    '''The job's row, as long as this claim still holds it'''
+    
+    return Job.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by, attempts=job.attempts)
+
+
+def run_job(job):
+    
+    '''
+    Run a claimed job. The handler and the "done" mark commit together, so
+    a failed attempt leaves no partial writes behind and is retried with
+    exponential backoff until max_attempts
+    
+    Every status write is conditional on the claim: a worker whose claim
+    expired rolls its attempt back and leaves the row to the new owner
+    '''
+    
+    handler = TASKS.get(job.task)
+    
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for task {job.task}')
+        
+        with Heartbeat(job), transaction.atomic():
+            handler(**job.payload)
+            if not owned(job).update(status='done', finished_at=timezone.now(), last_error=''):
+                raise ClaimLost()
+        return True
+    
+    except ClaimLost:
+        logger.warning('Job %s (%s) was reclaimed, attempt %s rolled back', job.pk, job.task, job.attempts)
+        return False
+    
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.task, job.attempts)
+        
+        if job.attempts >= job.max_attempts:
+            owned(job).update(status='failed', finished_at=timezone.now(), last_error=error)
+        else:
+            delay = settings.JOBS_RETRY_BACKOFF * (2 ** (job.attempts - 1))
+            owned(job).update(
+                status='queued',
+                run_after=timezone.now() + timedelta(seconds=delay),
+                last_error=error,
+            )
+        return False
+    
+    
+def run_job_inline(job_id):
+    
+    '''JOBS_RUN_INLINE: run a freshly queued job right after commit'''
+    
+    claimed = Job.objects.filter(pk=job_id, status='queued').update(
+        status='running',
+        attempts=F('attempts') + 1,
+        locked_by='inline',
+        locked_at=timezone.now(),
+        heartbeat_at=timezone.now(),
+    )
+    if claimed:
+        run_job(Job.objects.get(pk=job_id))
+
+
+def purge_finished(batch_size=None):
+    
+    '''
+    Delete done jobs older than JOBS_RETENTION_DONE_DAYS and failed ones
+    older than JOBS_RETENTION_FAILED_DAYS, batch_size rows per delete
+    '''
+    
+    batch_size = batch_size or settings.JOBS_PURGE_BATCH
+    now = timezone.now()
+    expired = (
+        Q(status='done', finished_at__lt=now - timedelta(days=settings.JOBS_RETENTION_DONE_DAYS)) |
+        Q(status='failed', finished_at__lt=now - timedelta(days=settings.JOBS_RETENTION_FAILED_DAYS))
+    )
+    
+    removed = 0
+    while True:
+        ids = list(Job.objects.filter(expired).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return removed
+        removed += Job.objects.filter(pk__in=ids).delete()[0]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Broadcast, Notification, NotificationCounter
 
 
 @admin.register(Notification)
@@ -20,3 +20,18 @@ class NotificationAdmin(admin.ModelAdmin):
             'fields': ('is_read', 'created_at')
         }),
     )
+
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'unread_count']
+    search_fields = ['user__username']
+    readonly_fields = ['unread_count']
+
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ['sender', 'message', 'thread', 'created_at']
+    search_fields = ['sender__username', 'message']
+    readonly_fields = ['created_at']
@@ -0,0 +1,59 @@
+from django.db import transaction
+
+from .models import Broadcast, BroadcastReceipt
+from .broker import publish
+from .grouping import display_name
+from . import counters
+
+
+def can_broadcast(user):
+
+    '''Campus-wide announcements come from staff and faculty'''
+
+    if user.is_staff:
+        return True
+    profile = getattr(user, 'profile', None)
+    return profile is not None and profile.role == 'faculty'
+
+
+def broadcast_thread(thread):
+
+    '''Announce a thread to every user with a single row'''
+
+    from .serializers import BroadcastSerializer
+
+    broadcast = Broadcast.objects.create(
+        sender=thread.author,
+        thread=thread,
+        message=f'{display_name(thread.author)} posted an announcement: "{thread.title}"'
+    )
+
+    # other workers see it in their badges once their cached copy expires
+    transaction.on_commit(counters.forget_latest_broadcast)
+
+    # user_id None reaches every connected client
+    publish(None, {
+        'type': 'notification',
+        'notification': BroadcastSerializer(broadcast).data
+    })
+    return broadcast
+
+
+def inbox_broadcasts(user):
+
+    '''Broadcasts in the user's inbox with their read state, unevaluated'''
+
+    return (
+        Broadcast.objects.for_user(user)
+        .with_read_state(user)
+        .select_related('sender__profile', 'thread')
+    )
+
+
+def set_receipt(broadcast, user, **state):
+
+    '''Create or update the user's receipt, e.g. is_read=True or is_dismissed=True'''
+
+    with transaction.atomic():
+        receipt, _ = BroadcastReceipt.objects.update_or_create(broadcast=broadcast, user=user, defaults=state)
+    return receipt
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# queued events per connected client before new ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Broker:
+
+    '''
+    In-process registry of connected stream clients
+
+    Every worker has one broker. The backend carries events between workers
+    and hands them to dispatch(), which wakes the matching subscribers on
+    their event loop.
+    '''
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self.backend = None
+
+    def subscribe(self, user_id):
+
+        '''Register the calling coroutine's loop, returns the queue to read'''
+
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+        self.backend.start()
+        return subscriber[1]
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            self._subscribers[user_id] = {s for s in self._subscribers[user_id] if s[1] is not queue}
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+    def dispatch(self, user_id, event):
+
+        '''Deliver an event to local subscribers, user_id None means everyone'''
+
+        with self._lock:
+            if user_id is None:
+                subscribers = [s for group in self._subscribers.values() for s in group]
+            else:
+                subscribers = list(self._subscribers.get(user_id, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # the subscriber's loop is closed, it unsubscribes on its own
+                pass
+
+    def publish(self, user_id, event):
+        self.backend.publish(user_id, event)
+
+
+def _offer(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # slow client, it resyncs from the next unread_count event
+        pass
+
+
+class LocalBackend:
+
+    '''Single process stand-in: publishing dispatches straight to the broker'''
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def start(self):
+        pass
+
+    def publish(self, user_id, event):
+        self.broker.dispatch(user_id, event)
+
+
+class PostgresBackend:
+
+    '''
+    Cross-worker delivery over PostgreSQL LISTEN/NOTIFY
+
+    publish() runs pg_notify on the request's connection, a daemon thread per
+    worker LISTENs on its own connection and feeds the local broker
+    '''
+
+    channel = 'notifications'
+    poll_timeout = 5
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name='notification-listener', daemon=True)
+                self._thread.start()
+
+    def publish(self, user_id, event):
+        payload = json.dumps({'user_id': user_id, 'event': event}, cls=DjangoJSONEncoder)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def _listen(self):
+        wrapper = connections['default']
+        while True:
+            try:
+                raw = wrapper.get_new_connection(wrapper.get_connection_params())
+                raw.autocommit = True
+                with raw.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.channel}')
+
+                while True:
+                    if select.select([raw], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        message = json.loads(raw.notifies.pop(0).payload)
+                        self.broker.dispatch(message['user_id'], message['event'])
+            except Exception:
+                logger.exception('Notification listener lost its connection, reconnecting')
+                time.sleep(self.poll_timeout)
+
+
+def get_backend_class():
+    path = getattr(settings, 'NOTIFICATION_BROKER_BACKEND', None)
+    if path:
+        return import_string(path)
+    if connection.vendor == 'postgresql':
+        return PostgresBackend
+    return LocalBackend
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = Broker()
+            _broker.backend = get_backend_class()(_broker)
+    return _broker
+
+
+# -- PUBLISHING (safe to call inside a transaction, sent after commit) --
+
+def publish(user_id, event):
+    transaction.on_commit(lambda: _publish_safely(user_id, event))
+
+
+def _publish_safely(user_id, event):
+    try:
+        get_broker().publish(user_id, event)
+    except Exception:
+        # realtime delivery is best effort, clients still see it on the next fetch
+        logger.exception('Failed to publish notification event')
+
+
+def publish_notifications(notifications):
+
+    '''Push newly created Notification rows to their recipients'''
+
+    from .serializers import NotificationSerializer
+
+    for notification in notifications:
+        publish(notification.recipient_id, {
+            'type': 'notification',
+            'notification': NotificationSerializer(notification).data
+        })
+
+
+def publish_unread_count(user_id, unread_count):
+    publish(user_id, {'type': 'unread_count', 'unread_count': unread_count})
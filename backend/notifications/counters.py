@@ -0,0 +1,138 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Broadcast, NotificationCounter
+
+
+def lock(user_id):
+
+    '''
+    Lock (creating if needed) the user's counter row inside a transaction
+
+    Everything that changes the badge or the watermark takes this lock
+    first, and notifications are stamped after it, so a mark-all never
+    races a notification being created
+    '''
+
+    NotificationCounter.objects.bulk_create([NotificationCounter(user_id=user_id)], ignore_conflicts=True)
+    return NotificationCounter.objects.select_for_update().get(user_id=user_id)
+
+
+def increment_unread(user_ids, delta=1):
+
+    '''
+    Atomically add delta to the unread counter of every user in user_ids
+    Call inside the transaction that writes the notification rows, before
+    saving new ones (the UPDATE takes the counter locks)
+    '''
+
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    if delta > 0:
+        # first notification for these users creates their counter row
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True
+        )
+
+    counters = NotificationCounter.objects.filter(user_id__in=user_ids)
+    if delta < 0:
+        # never go below zero if the counter drifted, reconcile fixes it
+        counters = counters.filter(unread_count__gte=-delta)
+    counters.update(unread_count=F('unread_count') + delta)
+
+
+def count_new(notifications):
+
+    '''Bump recipients' counters for (unsaved) new unread notifications'''
+
+    per_user = Counter(n.recipient_id for n in notifications if not n.is_read)
+
+    by_delta = {}
+    for user_id, delta in per_user.items():
+        by_delta.setdefault(delta, []).append(user_id)
+
+    for delta, user_ids in by_delta.items():
+        increment_unread(user_ids, delta)
+
+
+def discount(notifications):
+
+    '''Release the unread notifications of a queryset about to be deleted'''
+
+    unread = notifications.unread().values('recipient_id').annotate(total=Count('id')).order_by()
+    for row in unread:
+        increment_unread([row['recipient_id']], -row['total'])
+
+
+def mark_all_read(user):
+
+    '''
+    Move the watermark to now, a single row write however many are unread
+    Returns how many notifications and broadcasts it marked read
+    '''
+
+    counter = lock(user.id)
+    marked = badge(user, (counter.unread_count, counter.read_until))
+
+    counter.read_until = timezone.now()
+    counter.unread_count = 0
+    counter.save(update_fields=['read_until', 'unread_count'])
+    return marked
+
+
+def read_unread(user_id):
+
+    '''Current unread count of the user's own notifications'''
+
+    value = NotificationCounter.objects.filter(user_id=user_id).values_list('unread_count', flat=True).first()
+    return value or 0
+
+
+def read_state(user_id):
+
+    '''(unread badge, mark-all watermark) for a user in one lookup'''
+
+    state = NotificationCounter.objects.filter(user_id=user_id).values_list('unread_count', 'read_until').first()
+    return state or (0, None)
+
+
+def badge(user, state=None):
+
+    '''
+    Unread badge shown to the user: their own notifications (O(1) counter)
+    plus unread broadcasts, only counted when one was sent since the
+    user's watermark
+    '''
+
+    unread, read_until = state or read_state(user.id)
+
+    latest = latest_broadcast_at()
+    if latest is None or latest < user.date_joined or (read_until is not None and latest <= read_until):
+        return unread
+    return unread + Broadcast.objects.unread_for(user, read_until).count()
+
+
+LATEST_BROADCAST_KEY = 'notifications:latest_broadcast_at'
+
+
+def latest_broadcast_at():
+
+    '''created_at of the newest broadcast, cached for NOTIFICATION_BROADCAST_CACHE_SECONDS'''
+
+    cached = cache.get(LATEST_BROADCAST_KEY)
+    if cached is None:
+        # wrapped so that "no broadcast yet" is cached too
+        cached = [Broadcast.objects.order_by('-created_at').values_list('created_at', flat=True).first()]
+        cache.set(LATEST_BROADCAST_KEY, cached, settings.NOTIFICATION_BROADCAST_CACHE_SECONDS)
+    return cached[0]
+
+
+def forget_latest_broadcast():
+    cache.delete(LATEST_BROADCAST_KEY)
@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationActor
+from .broker import publish_notifications
+from . import counters
+
+VERBS = {
+    'like': 'liked your thread',
+    'comment': 'commented on your thread post',
+}
+
+
+def display_name(user):
+    if hasattr(user, 'profile'):
+        return f'{user.profile.firstname} {user.profile.lastname}'
+    return user.username
+
+
+def sample_actor(user):
+    profile = getattr(user, 'profile', None)
+    return {
+        'id': user.id,
+        'username': user.username,
+        'firstname': profile.firstname if profile else user.first_name,
+        'lastname': profile.lastname if profile else user.last_name,
+    }
+
+
+def build_message(notification, actor):
+    verb = VERBS[notification.notification_type]
+    others = notification.actor_count - 1
+
+    name = display_name(actor)
+    if others == 1:
+        name = f'{name} and 1 other'
+    elif others > 1:
+        name = f'{name} and {others} others'
+
+    return f'{name} {verb} "{notification.thread.title}"'
+
+
+def add_actor(recipient, actor, notification_type, thread, comment=None):
+
+    '''
+    Record that actor liked/commented on recipient's thread
+
+    Merges into the recipient's latest notification of that type for the
+    thread if it is younger than NOTIFICATION_GROUP_WINDOW, otherwise
+    starts a new one. A repeated actor bumps the group without counting
+    twice, a group that was already read becomes unread again.
+    '''
+
+    with transaction.atomic():
+        # stamp after the counter lock so a concurrent mark-all is ordered
+        counter = counters.lock(recipient.id)
+        now = timezone.now()
+        window_start = now - timedelta(seconds=settings.NOTIFICATION_GROUP_WINDOW)
+
+        group = (
+            Notification.objects.select_for_update()
+            .filter(
+                recipient=recipient,
+                thread=thread,
+                notification_type=notification_type,
+                created_at__gte=window_start
+            )
+            .order_by('-created_at', '-id')
+            .first()
+        )
+
+        if group is None:
+            group = Notification(
+                recipient=recipient,
+                sender=actor,
+                notification_type=notification_type,
+                thread=thread,
+                comment=comment,
+                actor_count=1,
+                actors=[sample_actor(actor)]
+            )
+            group.message = build_message(group, actor)
+            counters.increment_unread([recipient.id], 1)
+            group.save()
+            NotificationActor.objects.create(notification=group, user=actor)
+
+        else:
+            _, joined = NotificationActor.objects.update_or_create(notification=group, user=actor)
+            if joined:
+                group.actor_count += 1
+
+            was_read = group.read_state(counter.read_until)
+            others = [a for a in group.actors if a['id'] != actor.id]
+
+            group.actors = [sample_actor(actor)] + others[:settings.NOTIFICATION_SAMPLE_ACTORS - 1]
+            group.sender = actor
+            group.comment = comment or group.comment
+            group.created_at = now
+            group.is_read = False
+            group.message = build_message(group, actor)
+            group.save()
+
+            if was_read:
+                counters.increment_unread([recipient.id], 1)
+
+    publish_notifications([group])
+    return group
+
+
+def remove_actor(recipient, actor, notification_type, thread):
+
+    '''
+    Retract actor from the recipient's latest group they belong to, e.g.
+    on unlike. The group is deleted once its last actor is gone.
+    '''
+
+    with transaction.atomic():
+        counter = counters.lock(recipient.id)
+        membership = (
+            NotificationActor.objects.select_for_update()
+            .select_related('notification__thread')
+            .filter(
+                user=actor,
+                notification__recipient=recipient,
+                notification__thread=thread,
+                notification__notification_type=notification_type
+            )
+            .order_by('-notification__created_at')
+            .first()
+        )
+        if membership is None:
+            return None
+
+        group = membership.notification
+        membership.delete()
+        group.actor_count = max(group.actor_count - 1, 0)
+
+        if group.actor_count == 0:
+            if not group.read_state(counter.read_until):
+                counters.increment_unread([recipient.id], -1)
+            group.delete()
+            return None
+
+        latest = [
+            entry.user for entry in
+            NotificationActor.objects.filter(notification=group)
+            .select_related('user__profile')
+            .order_by('-acted_at')[:settings.NOTIFICATION_SAMPLE_ACTORS]
+        ]
+        if not latest:
+            # actor rows drifted, keep the sample as it is
+            group.save(update_fields=['actor_count'])
+            return group
+
+        group.actors = [sample_actor(user) for user in latest]
+        group.sender = latest[0]
+        group.message = build_message(group, latest[0])
+        group.save(update_fields=['actor_count', 'actors', 'sender', 'message'])
+
+    return group
@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications.retention import purge_broadcasts, purge_over_cap, purge_read
+
+
+class Command(BaseCommand):
+    
+    help = 'Delete notifications past the retention policy (NOTIFICATION_RETENTION_*)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Delete read notifications older than this')
+        parser.add_argument('--max-per-user', type=int, default=None, help='Notifications kept per user')
+        parser.add_argument('--batch-size', type=int, default=None, help='Primary keys per delete')
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to pause after each delete')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+        
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.NOTIFICATION_RETENTION_DAYS
+        max_per_user = options['max_per_user'] or settings.NOTIFICATION_RETENTION_MAX_PER_USER
+        batch = {
+            'batch_size': options['batch_size'],
+            'sleep': options['sleep'],
+            'dry_run': options['dry_run'],
+        }
+        action = 'Would delete' if options['dry_run'] else 'Deleted'
+        
+        started = time.monotonic()
+        cutoff = timezone.now() - timedelta(days=days)
+        removed = purge_read(cutoff, **batch)
+        self.stdout.write(f'{action} {removed} read notifications older than {days} days in {time.monotonic() - started:.2f}s')
+        
+        capped_started = time.monotonic()
+        capped = purge_over_cap(max_per_user, **batch)
+        self.stdout.write(f'{action} {capped} notifications past {max_per_user} per user in {time.monotonic() - capped_started:.2f}s')
+        
+        broadcasts_started = time.monotonic()
+        broadcasts = purge_broadcasts(cutoff, **batch)
+        self.stdout.write(f'{action} {broadcasts} broadcasts older than {days} days in {time.monotonic() - broadcasts_started:.2f}s')
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {removed + capped} notifications and {broadcasts} broadcasts in {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,73 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from notifications.models import Notification, NotificationCounter
+
+
+class Command(BaseCommand):
+    
+    help = 'Recompute NotificationCounter.unread_count from Notification and the read watermark'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per batch')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted counters')
+        
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        last_id = 0
+        checked = fixed = 0
+        
+        while True:
+            # walk users by primary key so memory stays bounded
+            user_ids = list(
+                User.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+            
+            unread = dict(
+                Notification.objects.filter(recipient_id__in=user_ids)
+                .unread()
+                .order_by()
+                .values('recipient_id')
+                .annotate(total=Count('pk'))
+                .values_list('recipient_id', 'total')
+            )
+            stored = dict(
+                NotificationCounter.objects.filter(user_id__in=user_ids)
+                .values_list('user_id', 'unread_count')
+            )
+            
+            drifted = [
+                NotificationCounter(user_id=user_id, unread_count=unread.get(user_id, 0))
+                for user_id in user_ids
+                if stored.get(user_id, 0) != unread.get(user_id, 0)
+            ]
+            
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    NotificationCounter.objects.bulk_create(
+                        drifted,
+                        update_conflicts=True,
+                        unique_fields=['user'],
+                        update_fields=['unread_count']
+                    )
+                    
+            checked += len(user_ids)
+            fixed += len(drifted)
+            
+            if options['sleep']:
+                time.sleep(options['sleep'])
+                
+        action = 'would fix' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} users, {action} {fixed} in {time.monotonic() - started:.2f}s'
+        ))
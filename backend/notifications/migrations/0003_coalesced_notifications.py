@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_inbox_and_unread_counter'),
+        ('threads', '0009_threadcomment_page_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='actors',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'thread', 'notification_type', '-created_at'], name='notification_group_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationactor',
+            name='notification',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actor_set', to='notifications.notification'),
+        ),
+        migrations.AddField(
+            model_name='notificationactor',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_actions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notificationactor',
+            index=models.Index(fields=['notification', '-created_at'], name='notification_actor_recent_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='notificationactor',
+            unique_together={('notification', 'user')},
+        ),
+    ]
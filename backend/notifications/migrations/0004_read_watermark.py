@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_coalesced_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationcounter',
+            name='read_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_broadcasts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notificationactor',
+            name='notification_actor_recent_idx',
+        ),
+        migrations.RenameField(
+            model_name='notificationactor',
+            old_name='created_at',
+            new_name='acted_at',
+        ),
+        migrations.AddIndex(
+            model_name='notificationactor',
+            index=models.Index(fields=['notification', '-acted_at'], name='notification_actor_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notificationactor_acted_at'),
+        ('threads', '0013_threadpost_fanned_out'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='broadcast',
+            name='thread',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='broadcasts', to='threads.threadpost'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='comment',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='notifications', to='threads.threadcomment'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='thread',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='notifications', to='threads.threadpost'),
+        ),
+    ]
@@ -1,7 +1,29 @@
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Q
 from django.contrib.auth.models import User
 
 
+class NotificationQuerySet(models.QuerySet):
+    
+    def unread(self):
+        
+        '''Not read individually and newer than the recipient's read watermark'''
+        
+        return self.filter(is_read=False).filter(
+            Q(recipient__notification_counter__read_until__isnull=True) |
+            Q(created_at__gt=F('recipient__notification_counter__read_until'))
+        )
+    
+    def read(self):
+        
+        '''Read individually or covered by the recipient's read watermark'''
+        
+        return self.filter(
+            Q(is_read=True) |
+            Q(created_at__lte=F('recipient__notification_counter__read_until'))
+        )
+
+
 class Notification(models.Model):
     
     NOTIFICATION_TYPES = (
@@ -25,28 +47,179 @@ class Notification(models.Model):
     
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
     
-    # Generic relations for different objects
+    # Generic relations for different objects. Deleting a thread leaves its
+    # notifications to the notifications.thread_deleted job (see signals)
+    # instead of one large cascade, hence no constraint
     thread = models.ForeignKey(
         'threads.ThreadPost', 
-        on_delete=models.CASCADE, 
+        on_delete=models.DO_NOTHING, 
+        db_constraint=False,
         null=True, 
         blank=True,
         related_name='notifications'
     )
     comment = models.ForeignKey(
         'threads.ThreadComment', 
-        on_delete=models.CASCADE, 
+        on_delete=models.DO_NOTHING, 
+        db_constraint=False,
         null=True, 
         blank=True,
         related_name='notifications'
     )
     
     message = models.CharField(max_length=255)
+    # per-row override, everything up to NotificationCounter.read_until is read too
     is_read = models.BooleanField(default=False)
+    # bumped when a new actor joins a coalesced notification
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    # coalesced likes/comments: everyone in the group and the latest few of them
+    actor_count = models.PositiveIntegerField(default=1)
+    actors = models.JSONField(default=list, blank=True)
+    
+    objects = NotificationQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # inbox: keyset pagination per recipient
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_inbox_idx'),
+            # open group lookup when coalescing
+            models.Index(fields=['recipient', 'thread', 'notification_type', '-created_at'], name='notification_group_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.notification_type} - {self.recipient.username} from {self.sender.username}"
+    
+    def read_state(self, read_until):
+        
+        '''is_read with the recipient's mark-all watermark applied'''
+        
+        return self.is_read or (read_until is not None and self.created_at <= read_until)
+
+
+class NotificationActor(models.Model):
+    
+    '''Membership of a user in a coalesced notification'''
+    
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='actor_set')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_actions')
+    # bumped when the user acts on the group again, orders the sample
+    acted_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('notification', 'user')
+        indexes = [
+            models.Index(fields=['notification', '-acted_at'], name='notification_actor_recent_idx'),
+        ]
+        
+    def __str__(self):
+        return f'{self.user.username} in notification #{self.notification_id}'
+
+
+class NotificationCounter(models.Model):
+    
+    '''
+    Per-user notification state, kept by notifications.counters: the unread
+    badge and the "read up to" watermark set by mark-all
+    '''
+    
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    read_until = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f'{self.user.username}: {self.unread_count} unread'
+
+
+class BroadcastQuerySet(models.QuerySet):
+    
+    def for_user(self, user):
+        
+        '''Broadcasts sent since the user joined and not dismissed by them'''
+        
+        dismissed = BroadcastReceipt.objects.filter(broadcast=OuterRef('pk'), user=user, is_dismissed=True)
+        return self.filter(created_at__gte=user.date_joined).exclude(Exists(dismissed))
+    
+    def with_read_state(self, user):
+        read = BroadcastReceipt.objects.filter(broadcast=OuterRef('pk'), user=user, is_read=True)
+        return self.annotate(receipt_read=Exists(read))
+    
+    def unread_for(self, user, read_until):
+        
+        '''Not read individually and newer than the user's read watermark'''
+        
+        broadcasts = self.for_user(user).with_read_state(user).filter(receipt_read=False)
+        if read_until is not None:
+            broadcasts = broadcasts.filter(created_at__gt=read_until)
+        return broadcasts
+
+
+class Broadcast(models.Model):
+    
+    '''
+    A notification for every user, stored once and merged into each inbox
+    at read time. Per-user state lives in BroadcastReceipt, created lazily.
+    '''
+    
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='broadcasts')
+    # removed with the thread by the notifications.thread_deleted job
+    thread = models.ForeignKey(
+        'threads.ThreadPost',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='broadcasts'
+    )
+    message = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = BroadcastQuerySet.as_manager()
+    
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='broadcast_recent_idx'),
+        ]
         
     def __str__(self):
-        return f"{self.notification_type} - {self.recipient.username} from {self.sender.username}"
\ No newline at end of file
+        return f'broadcast from {self.sender.username}: {self.message}'
+    
+    
+class BroadcastReceipt(models.Model):
+    
+    '''A user's read/dismiss state for a broadcast, only exists once they act on it'''
+    
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='receipts')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='broadcast_receipts')
+    is_read = models.BooleanField(default=False)
+    is_dismissed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('broadcast', 'user')
+        
+    def __str__(self):
+        return f'{self.user.username} on broadcast #{self.broadcast_id}'
+        
+        
+class StreamTicket(models.Model):
+    
+    '''
+    Short-lived, single-use credential for opening the notification stream
+    (EventSource cannot send an Authorization header). Only a hash of the
+    ticket is stored, see notifications.tickets.
+    '''
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stream_tickets')
+    key_hash = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f'stream ticket of {self.user_id}'
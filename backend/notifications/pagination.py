@@ -0,0 +1,87 @@
+from django.db.models import DateTimeField, Q
+
+from stream.pagination import KeysetPagination
+
+from .models import Broadcast, Notification
+
+
+class InboxPagination(KeysetPagination):
+
+    '''
+    Keyset pagination over a user's notifications and the broadcasts
+    merged into their inbox, newest first
+
+    The cursor is a position in the merged order (created_at, source, id),
+    every source is read after it and capped at one page, so a page never
+    loads more than page_size + 1 rows per source however many broadcasts
+    were sent
+    '''
+
+    # on equal created_at a notification sorts after a broadcast
+    SOURCES = {Broadcast: 0, Notification: 1}
+
+    def __init__(self, page_size=None):
+        super().__init__(ordering=('-created_at', '-id'), page_size=page_size)
+
+    def paginate_sources(self, querysets, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request)
+        self.position, self.reverse = position, reverse
+        self.has_cursor = position is not None
+
+        ordering = ('created_at', 'id') if reverse else ('-created_at', '-id')
+        rows = []
+        for queryset in querysets:
+            if position is not None:
+                queryset = queryset.filter(self.after(queryset.model, position, reverse))
+            rows += queryset.order_by(*ordering)[:self.page_size + 1]
+
+        rows.sort(key=self.key, reverse=not reverse)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = self.has_cursor
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.has_cursor
+
+        self.page = rows
+        return rows
+
+    def key(self, instance):
+        return (instance.created_at, self.SOURCES[type(instance)], instance.id)
+
+    def after(self, model, position, reverse):
+
+        '''Rows of one source past the cursor in the merged order'''
+
+        created_at, source, pk = position
+        rank = self.SOURCES[model]
+        past = 'gt' if reverse else 'lt'
+
+        if rank == source:
+            return Q(**{f'created_at__{past}': created_at}) | Q(created_at=created_at, **{f'id__{past}': pk})
+        # the other source: rows at the cursor's created_at are past it on one side only
+        if (rank > source) == reverse:
+            return Q(**{f'created_at__{past}e': created_at})
+        return Q(**{f'created_at__{past}': created_at})
+
+    # -- CURSOR ENCODING --
+
+    def field_names(self):
+        return ['created_at', 'source', 'id']
+
+    def get_value(self, instance, name):
+        if name == 'source':
+            return self.SOURCES[type(instance)]
+        return super().get_value(instance, name)
+
+    def get_field(self, name):
+        if name == 'created_at':
+            return DateTimeField()
+        return Notification._meta.get_field('id')
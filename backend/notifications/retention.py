@@ -0,0 +1,139 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+
+from .models import Broadcast, BroadcastReceipt, Notification
+from . import counters
+
+
+def delete_batch(notifications):
+
+    '''Delete a bounded queryset of notifications, releasing unread ones from badges'''
+
+    with transaction.atomic():
+        counters.discount(notifications)
+        _, per_model = notifications.delete()
+    return per_model.get(Notification._meta.label, 0)
+
+
+def purge_read(cutoff, batch_size=None, sleep=0, dry_run=False):
+
+    '''
+    Delete read notifications created before cutoff
+
+    Walks the table in primary key ranges of batch_size, every delete is
+    its own short transaction with a pause after it
+    '''
+
+    batch_size = batch_size or settings.NOTIFICATION_PURGE_BATCH
+    bounds = Notification.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0
+
+    removed = 0
+    for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+        batch = Notification.objects.filter(
+            pk__gte=start,
+            pk__lt=start + batch_size,
+            created_at__lt=cutoff
+        ).read()
+
+        if dry_run:
+            removed += batch.count()
+            continue
+
+        deleted = delete_batch(batch)
+        removed += deleted
+        if deleted and sleep:
+            time.sleep(sleep)
+
+    return removed
+
+
+def purge_over_cap(max_per_user, batch_size=None, sleep=0, dry_run=False):
+
+    '''Delete everything past each user's newest max_per_user notifications'''
+
+    batch_size = batch_size or settings.NOTIFICATION_PURGE_BATCH
+    recipients = (
+        Notification.objects.order_by()
+        .values('recipient_id')
+        .annotate(total=Count('pk'))
+        .filter(total__gt=max_per_user)
+        .values_list('recipient_id', flat=True)
+    )
+
+    removed = 0
+    for recipient_id in list(recipients):
+        inbox = Notification.objects.filter(recipient_id=recipient_id)
+
+        # oldest notification the user keeps, in inbox order
+        kept_at, kept_id = inbox.order_by('-created_at', '-id').values_list('created_at', 'id')[max_per_user - 1]
+        older = inbox.filter(Q(created_at__lt=kept_at) | Q(created_at=kept_at, id__lt=kept_id))
+
+        if dry_run:
+            removed += older.count()
+            continue
+
+        while True:
+            ids = list(older.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            removed += delete_batch(Notification.objects.filter(pk__in=ids))
+            if sleep:
+                time.sleep(sleep)
+
+    return removed
+
+
+def purge_broadcasts(cutoff, batch_size=None, sleep=0, dry_run=False):
+
+    '''Delete broadcasts created before cutoff'''
+
+    broadcast_ids = list(Broadcast.objects.filter(created_at__lt=cutoff).values_list('pk', flat=True))
+    if not dry_run:
+        delete_broadcasts(broadcast_ids, batch_size, sleep)
+    return len(broadcast_ids)
+
+
+def delete_broadcasts(broadcast_ids, batch_size=None, sleep=0):
+
+    '''Delete broadcasts, their (possibly campus-wide) receipts in batches first'''
+
+    batch_size = batch_size or settings.NOTIFICATION_PURGE_BATCH
+
+    for broadcast_id in broadcast_ids:
+        while True:
+            ids = list(BroadcastReceipt.objects.filter(broadcast_id=broadcast_id).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            BroadcastReceipt.objects.filter(pk__in=ids).delete()
+            if sleep:
+                time.sleep(sleep)
+
+    Broadcast.objects.filter(pk__in=broadcast_ids).delete()
+
+
+def delete_thread_notifications(thread_id, batch_size=None):
+
+    '''
+    Delete a deleted thread's notifications and broadcasts in batches,
+    run by the notifications.thread_deleted job
+    '''
+
+    batch_size = batch_size or settings.NOTIFICATION_PURGE_BATCH
+    removed = 0
+
+    delete_broadcasts(list(Broadcast.objects.filter(thread_id=thread_id).values_list('pk', flat=True)), batch_size)
+
+    while True:
+        ids = list(
+            Notification.objects.filter(thread_id=thread_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        removed += delete_batch(Notification.objects.filter(pk__in=ids))
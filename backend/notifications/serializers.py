@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Notification
+from .models import Broadcast, Notification
+from .grouping import sample_actor
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -9,6 +10,9 @@ class NotificationSerializer(serializers.ModelSerializer):
     sender_profile_image = serializers.SerializerMethodField()
     thread_title = serializers.CharField(source='thread.title', read_only=True, allow_null=True)
     thread_id = serializers.IntegerField(source='thread.id', read_only=True, allow_null=True)
+    actors = serializers.SerializerMethodField()
+    is_read = serializers.SerializerMethodField()
+    is_broadcast = serializers.SerializerMethodField()
     
     class Meta:
         model = Notification
@@ -26,10 +30,13 @@ class NotificationSerializer(serializers.ModelSerializer):
             'thread_title',
             'comment',
             'message',
+            'actor_count',
+            'actors',
             'is_read',
+            'is_broadcast',
             'created_at'
         ]
-        read_only_fields = ['recipient', 'sender', 'created_at']
+        read_only_fields = ['recipient', 'sender', 'created_at', 'actor_count']
     
     def get_sender_first_name(self, obj):
  
@@ -49,4 +56,74 @@ class NotificationSerializer(serializers.ModelSerializer):
             request = self.context.get('request')
             if request:
                 return request.build_absolute_uri(obj.sender.profile.profile_image.url)
-        return None
\ No newline at end of file
+            # pushed over the notification stream, no request to build from
+            return obj.sender.profile.profile_image.url
+        return None
+    
+    def get_is_read(self, obj):
+        
+        '''read individually or covered by the recipient's mark-all watermark'''
+        
+        return obj.read_state(self.context.get('read_until'))
+    
+    def get_actors(self, obj):
+        
+        '''latest actors of a coalesced notification, just the sender otherwise'''
+        
+        if obj.actors:
+            return obj.actors
+        return [sample_actor(obj.sender)]
+    
+    def get_is_broadcast(self, obj):
+        return False
+    
+    
+class BroadcastSerializer(NotificationSerializer):
+    
+    '''
+    announcement merged into the inbox, same shape as a notification
+    expects Broadcast.objects.with_read_state()
+    '''
+    
+    notification_type = serializers.SerializerMethodField()
+    actor_count = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Broadcast
+        fields = [
+            'id',
+            'sender',
+            'sender_username',
+            'sender_first_name',
+            'sender_last_name',
+            'sender_profile_image',
+            'notification_type',
+            'thread',
+            'thread_id',
+            'thread_title',
+            'message',
+            'actor_count',
+            'actors',
+            'is_read',
+            'is_broadcast',
+            'created_at'
+        ]
+        read_only_fields = fields
+        
+    def get_notification_type(self, obj):
+        return 'announcement'
+    
+    def get_actor_count(self, obj):
+        return 1
+    
+    def get_is_read(self, obj):
+        read_until = self.context.get('read_until')
+        if getattr(obj, 'receipt_read', False):
+            return True
+        return read_until is not None and obj.created_at <= read_until
+    
+    def get_actors(self, obj):
+        return [sample_actor(obj.sender)]
+    
+    def get_is_broadcast(self, obj):
+        return True
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from jobs.registry import enqueue
+from threads.models import ThreadPost
+
+
+@receiver(post_delete, sender=ThreadPost)
+def thread_deleted(sender, instance, **kwargs):
+    # also covers threads cascaded away with their author
+    enqueue('notifications.thread_deleted', {'thread_id': instance.pk}, key=f'thread_deleted:{instance.pk}')
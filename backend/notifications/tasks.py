@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from jobs.registry import enqueue, task
+from portal.models import UserFollow
+from threads.models import ThreadLike, ThreadPost
+from .retention import delete_thread_notifications
+from .utils import create_like_notification, create_new_post_notification, retract_like_notification
+
+
+@task('notifications.new_post_fanout')
+def new_post_fanout(thread_id, after_follow_id=0):
+    
+    '''
+    Notify one chunk of the author's followers, then queue the next chunk
+    
+    Follows are walked in pk order from `after_follow_id`, each chunk is
+    keyed by its starting point so a retried or duplicated job never
+    notifies the same followers twice
+    '''
+    
+    thread = ThreadPost.objects.select_related('author__profile').filter(pk=thread_id).first()
+    if thread is None:
+        # deleted before the fan-out got to it
+        return
+    
+    follows = list(
+        UserFollow.objects.filter(following_id=thread.author_id, pk__gt=after_follow_id)
+        .order_by('pk')
+        .values_list('pk', 'follower_id')[:settings.NEW_POST_FANOUT_CHUNK]
+    )
+    if not follows:
+        return
+    
+    create_new_post_notification(thread, thread.author, [follower_id for _, follower_id in follows])
+    
+    if len(follows) == settings.NEW_POST_FANOUT_CHUNK:
+        last_follow_id = follows[-1][0]
+        enqueue(
+            'notifications.new_post_fanout',
+            {'thread_id': thread_id, 'after_follow_id': last_follow_id},
+            key=f'new_post:{thread_id}:{last_follow_id}'
+        )
+
+
+@task('notifications.like_changed')
+def like_changed(thread_id, user_id):
+    
+    '''
+    Bring the author's like notification in line with whether the user
+    likes the thread now, so like and unlike jobs may run in any order
+    '''
+    
+    thread = ThreadPost.objects.select_related('author').filter(pk=thread_id).first()
+    user = User.objects.select_related('profile').filter(pk=user_id).first()
+    if thread is None or user is None:
+        return
+    
+    if ThreadLike.objects.filter(thread=thread, user=user).exists():
+        create_like_notification(thread, user)
+    else:
+        retract_like_notification(thread, user)
+
+
+@task('notifications.thread_deleted')
+def thread_deleted(thread_id):
+    
+    '''Remove a deleted thread's notifications and broadcasts in short batches'''
+    
+    delete_thread_notifications(thread_id)
@@ -1,3 +1,211 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from jobs.worker import run_job_inline
+from threads.models import ThreadPost
+
+from . import counters
+from .grouping import add_actor, remove_actor
+from .models import Broadcast, Notification, NotificationActor, StreamTicket
+from .views import NotificationStreamView
+
+
+class InboxPaginationTests(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('student', 'student@ssct.edu.ph')
+        User.objects.filter(pk=self.user.pk).update(date_joined=timezone.now() - timedelta(days=1))
+        self.user.refresh_from_db()
+        sender = User.objects.create_user('sender', 'sender@ssct.edu.ph')
+        
+        base = timezone.now() - timedelta(hours=1)
+        for i in range(30):
+            Broadcast.objects.create(sender=sender, message=f'Broadcast {i}')
+        for i in range(5):
+            Notification.objects.create(recipient=self.user, sender=sender, notification_type='follow', message=f'Follow {i}')
+        # spread timestamps, two notifications tie with a broadcast
+        for i, broadcast in enumerate(Broadcast.objects.order_by('id')):
+            Broadcast.objects.filter(pk=broadcast.pk).update(created_at=base + timedelta(minutes=i))
+        for i, notification in enumerate(Notification.objects.order_by('id')):
+            Notification.objects.filter(pk=notification.pk).update(created_at=base + timedelta(minutes=i * 7))
+            
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.expected = sorted(
+            [(n.created_at, 1, n.id, False) for n in Notification.objects.all()] +
+            [(b.created_at, 0, b.id, True) for b in Broadcast.objects.all()],
+            reverse=True
+        )
+        
+    def entries(self, data):
+        return [(item['id'], item['is_broadcast']) for item in data['results']]
+    
+    def test_first_page_is_capped(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get('/api/v1/notifications/content/?page_size=10').json()
+            
+        self.assertEqual(len(data['results']), 10)
+        broadcast_sql = [
+            q['sql'] for q in queries.captured_queries
+            if q['sql'].startswith('SELECT "notifications_broadcast"."id"')
+        ]
+        self.assertEqual(len(broadcast_sql), 1)
+        self.assertIn('LIMIT 11', broadcast_sql[0])
+        
+    def test_pages_walk_the_merged_inbox_once(self):
+        seen = []
+        url = '/api/v1/notifications/content/?page_size=4'
+        while url:
+            data = self.client.get(url).json()
+            seen += self.entries(data)
+            url = data['next']
+            
+        self.assertEqual(seen, [(pk, is_broadcast) for _, _, pk, is_broadcast in self.expected])
+        
+    def test_previous_link_returns_the_previous_page(self):
+        first = self.client.get('/api/v1/notifications/content/?page_size=4').json()
+        second = self.client.get(first['next']).json()
+        third = self.client.get(second['next']).json()
+        
+        back = self.client.get(third['previous']).json()
+        
+        self.assertEqual(self.entries(back), self.entries(second))
+        self.assertEqual(self.entries(self.client.get(back['previous']).json()), self.entries(first))
+        
+    def test_unpaginated_list_keeps_everything(self):
+        data = self.client.get('/api/v1/notifications/content/?paginate=false').json()
+        self.assertEqual(len(data['notifications']), 35)
+        
+        
+class BadgeTests(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('student', 'student@ssct.edu.ph')
+        self.sender = User.objects.create_user('sender', 'sender@ssct.edu.ph')
+        
+    def test_no_broadcast_count_without_new_broadcasts(self):
+        counters.badge(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(counters.badge(self.user), 0)
+            
+    def test_new_broadcast_is_counted_after_commit(self):
+        from .broadcasts import broadcast_thread
+        from threads.models import ThreadPost
+        
+        counters.badge(self.user)
+        thread = ThreadPost.objects.create(author=self.sender, title='Announcement', content='Campus wide news')
+        with self.captureOnCommitCallbacks(execute=True):
+            broadcast_thread(thread)
+            
+        self.assertEqual(counters.badge(self.user), 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            counters.mark_all_read(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(counters.badge(self.user), 0)
+
+
+class GroupingTests(TestCase):
+    
+    def setUp(self):
+        self.author = User.objects.create_user('author', 'author@ssct.edu.ph')
+        self.thread = ThreadPost.objects.create(author=self.author, title='Grouped thread', content='Content long enough for a thread.')
+        self.likers = [User.objects.create_user(f'liker{i}', f'liker{i}@ssct.edu.ph') for i in range(3)]
+        
+    def test_retracting_resamples_by_latest_action(self):
+        for liker in self.likers:
+            add_actor(self.author, liker, 'like', self.thread)
+        # the first liker acts again and moves to the front
+        add_actor(self.author, self.likers[0], 'like', self.thread)
+        
+        group = remove_actor(self.author, self.likers[2], 'like', self.thread)
+        
+        self.assertEqual(group.actor_count, 2)
+        self.assertEqual([actor['id'] for actor in group.actors], [self.likers[0].id, self.likers[1].id])
+        self.assertEqual(group.sender, self.likers[0])
+        self.assertIn('"Grouped thread"', group.message)
+        self.assertEqual(NotificationActor.objects.filter(notification=group).count(), 2)
+        
+    def test_group_goes_away_with_its_last_actor(self):
+        add_actor(self.author, self.likers[0], 'like', self.thread)
+        
+        self.assertIsNone(remove_actor(self.author, self.likers[0], 'like', self.thread))
+        self.assertFalse(Notification.objects.exists())
+
+
+@override_settings(JOBS_RUN_INLINE=False)
+class ThreadDeleteTests(TestCase):
+    
+    def setUp(self):
+        self.author = User.objects.create_user('author', 'author@ssct.edu.ph')
+        self.liker = User.objects.create_user('liker', 'liker@ssct.edu.ph')
+        self.thread = ThreadPost.objects.create(author=self.author, title='Deleted thread', content='Content long enough for a thread.')
+        add_actor(self.author, self.liker, 'like', self.thread)
+        Broadcast.objects.create(sender=self.author, thread=self.thread, message='Announcement')
+        
+    def test_notifications_are_removed_by_a_job(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.delete(f'/api/v1/threads/posts/{self.thread.pk}/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ThreadPost.objects.filter(pk=self.thread.pk).exists())
+        # nothing but the thread's own rows went in the request
+        self.assertEqual(Notification.objects.filter(thread_id=self.thread.pk).count(), 1)
+        self.assertEqual(counters.read_unread(self.author.id), 1)
+        
+        job = Job.objects.get(task='notifications.thread_deleted')
+        self.assertEqual(job.payload, {'thread_id': self.thread.pk})
+        run_job_inline(job.pk)
+        
+        self.assertFalse(Notification.objects.filter(thread_id=self.thread.pk).exists())
+        self.assertFalse(Broadcast.objects.filter(thread_id=self.thread.pk).exists())
+        self.assertEqual(counters.read_unread(self.author.id), 0)
+
+
+class StreamTicketTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('student', 'student@ssct.edu.ph')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        
+    def issue(self):
+        response = self.client.post('/api/v1/notifications/content/stream/ticket/')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['ticket']
+        
+    def stream_user(self, query):
+        return NotificationStreamView().authenticate(RequestFactory().get('/stream/', query))
+        
+    def test_ticket_opens_one_stream(self):
+        ticket = self.issue()
+        
+        self.assertEqual(self.stream_user({'ticket': ticket}), self.user)
+        self.assertIsNone(self.stream_user({'ticket': ticket}))
+        # only the hash is stored
+        self.assertFalse(StreamTicket.objects.filter(key_hash=ticket).exists())
+        
+    def test_expired_ticket_is_refused_and_purged(self):
+        ticket = self.issue()
+        StreamTicket.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        
+        self.assertIsNone(self.stream_user({'ticket': ticket}))
+        self.issue()
+        self.assertEqual(StreamTicket.objects.count(), 1)
+        
+    def test_access_token_in_the_query_is_not_accepted(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        
+        self.assertIsNone(self.stream_user({'token': str(AccessToken.for_user(self.user))}))
+        self.assertIsNone(self.stream_user({'ticket': 'made-up'}))
@@ -0,0 +1,47 @@
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import StreamTicket
+
+
+def hash_ticket(ticket):
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+
+def issue_ticket(user):
+    
+    '''New stream ticket for user, expired ones are dropped on the way'''
+    
+    now = timezone.now()
+    StreamTicket.objects.filter(expires_at__lte=now).delete()
+    
+    ticket = secrets.token_urlsafe(32)
+    StreamTicket.objects.create(
+        user=user,
+        key_hash=hash_ticket(ticket),
+        expires_at=now + timedelta(seconds=settings.NOTIFICATION_STREAM_TICKET_SECONDS)
+    )
+    return ticket
+
+
+def redeem_ticket(ticket):
+    
+    '''The ticket's active user, or None. A ticket only opens one stream.'''
+    
+    if not ticket:
+        return None
+    
+    row = (
+        StreamTicket.objects.select_related('user')
+        .filter(key_hash=hash_ticket(ticket), expires_at__gt=timezone.now())
+        .first()
+    )
+    # whoever deletes the row first redeems it
+    if row is None or not StreamTicket.objects.filter(pk=row.pk).delete()[0]:
+        return None
+    
+    return row.user if row.user.is_active else None
@@ -3,12 +3,20 @@ from .views import (
     NotificationListView,
     NotificationMarkAsReadView,
     NotificationMarkAllAsReadView,
-    NotificationDeleteView
+    NotificationDeleteView,
+    NotificationStreamView,
+    NotificationStreamTicketView,
+    BroadcastMarkAsReadView,
+    BroadcastDismissView
 )
 
 urlpatterns = [
     path('content/', NotificationListView.as_view(), name='notification-list'),
+    path('content/stream/', NotificationStreamView.as_view(), name='notification-stream'),
+    path('content/stream/ticket/', NotificationStreamTicketView.as_view(), name='notification-stream-ticket'),
     path('content/<int:pk>/read/', NotificationMarkAsReadView.as_view(), name='notification-mark-read'),
     path('content/read-all/', NotificationMarkAllAsReadView.as_view(), name='notification-mark-all-read'),
     path('content/<int:pk>/delete/', NotificationDeleteView.as_view(), name='notification-delete'),
+    path('content/broadcasts/<int:pk>/read/', BroadcastMarkAsReadView.as_view(), name='broadcast-mark-read'),
+    path('content/broadcasts/<int:pk>/dismiss/', BroadcastDismissView.as_view(), name='broadcast-dismiss'),
 ] 
\ No newline at end of file
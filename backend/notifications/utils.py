@@ -1,41 +1,56 @@
+from django.db import transaction
+
 from .models import Notification
-from portal.models import UserFollow
+from .broker import publish_notifications
+from .counters import count_new
+from .grouping import add_actor, remove_actor
+
+
+def deliver(notifications):
+    
+    '''Save new notifications, bump the unread counters and push them'''
+    
+    with transaction.atomic():
+        # counters first: their locks order this against a concurrent mark-all
+        count_new(notifications)
+        if len(notifications) == 1:
+            notifications[0].save()
+        else:
+            Notification.objects.bulk_create(notifications)
+        
+    publish_notifications(notifications)
+    
 
 def create_like_notification(thread, user):
     
     '''
     Create notification when someone likes a thread
-    Only notifies if the liker is not the thread author
+    Only notifies if the liker is not the thread author, likes within
+    NOTIFICATION_GROUP_WINDOW are coalesced into one notification
     '''
     
-    if thread.author != user:
-        user_name = f"{user.profile.firstname} {user.profile.lastname}" if hasattr(user, 'profile') else user.username
-        Notification.objects.create(
-            recipient=thread.author,
-            sender=user,
-            notification_type='like',
-            thread=thread,
-            message=f'{user_name} liked your thread "{thread.title}"'
-        )
+    if thread.author_id != user.id:
+        add_actor(thread.author, user, 'like', thread)
+        
+        
+def retract_like_notification(thread, user):
+    
+    '''Take an unliking user back out of the author's like notification'''
+    
+    if thread.author_id != user.id:
+        remove_actor(thread.author, user, 'like', thread)
 
 
 def create_comment_notification(comment, thread, user):
     
     '''
     Create notification when someone comments on a thread
-    Only notifies if the commenter is not the thread author
+    Only notifies if the commenter is not the thread author, comments within
+    NOTIFICATION_GROUP_WINDOW are coalesced into one notification
     '''
     
-    if thread.author != user:
-        user_name = f"{user.profile.firstname} {user.profile.lastname}" if hasattr(user, 'profile') else user.username
-        Notification.objects.create(
-            recipient=thread.author,
-            sender=user,
-            notification_type='comment',
-            thread=thread,
-            comment=comment,
-            message=f'{user_name} commented on your thread post "{thread.title}"'
-        )
+    if thread.author_id != user.id:
+        add_actor(thread.author, user, 'comment', thread, comment=comment)
 
 
 def create_follow_notification(follower, following):
@@ -45,30 +60,29 @@ def create_follow_notification(follower, following):
     '''
     
     follower_name = f"{follower.profile.firstname} {follower.profile.lastname}" if hasattr(follower, 'profile') else follower.username
-    Notification.objects.create(
+    notification = Notification(
         recipient=following,
         sender=follower,
         notification_type='follow',
         message=f'{follower_name} started following you'
     )
+    deliver([notification])
 
 
-def create_new_post_notification(thread, author):
+def create_new_post_notification(thread, author, follower_ids):
     
     '''
-    Create notification for followers when user creates a new post
-    Uses bulk_create for better performance when notifying multiple followers
+    Create notification for the given followers when user creates a new post
+    Called in chunks by the notifications.new_post_fanout job
     '''
     
-    followers = UserFollow.objects.filter(following=author).select_related('follower')
-    
     author_name = f"{author.profile.firstname} {author.profile.lastname}" if hasattr(author, 'profile') else author.username
     
     notifications = []
-    for follow in followers:
+    for follower_id in follower_ids:
         notifications.append(
             Notification(
-                recipient=follow.follower,
+                recipient_id=follower_id,
                 sender=author,
                 notification_type='new_post',
                 thread=thread,
@@ -77,4 +91,6 @@ def create_new_post_notification(thread, author):
         )
     
     if notifications:
-        Notification.objects.bulk_create(notifications)
+        deliver(notifications)
+        
+    return len(notifications)
@@ -1,27 +1,70 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 
-from .models import Notification
-from .serializers import NotificationSerializer
+from .models import Broadcast, Notification
+from . import counters
+from .serializers import BroadcastSerializer, NotificationSerializer
+from .pagination import InboxPagination
+from .broadcasts import inbox_broadcasts, set_receipt
+from .broker import get_broker, publish_unread_count
+from .tickets import issue_ticket, redeem_ticket
 
 class NotificationListView(APIView):
     
-    '''API endpoint to list all notifications for authenticated user'''
+    '''
+    API endpoint to list notifications for authenticated user
+    
+    Cursor paginated newest first over the user's notifications and the
+    broadcasts merged into them (InboxPagination), ?paginate=false keeps
+    the old unpaginated list
+    '''
     
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        notifications = Notification.objects.filter(recipient=request.user)
-        serializer = NotificationSerializer(notifications, many=True, context={'request': request})
+        notifications = (
+            Notification.objects.filter(recipient=request.user)
+            .select_related('sender__profile', 'thread')
+        )
+        broadcasts = inbox_broadcasts(request.user)
+        state = counters.read_state(request.user.id)
+        unread_count = counters.badge(request.user, state)
+        context = {'request': request, 'read_until': state[1]}
+        paginator = InboxPagination()
+        
+        if request.query_params.get('paginate') == 'false':
+            items = sorted([*notifications, *broadcasts], key=paginator.key, reverse=True)
+            return Response({
+                'notifications': self.serialize(items, context),
+                'unread_count': unread_count
+            }, status=status.HTTP_200_OK)
         
-        unread_count = notifications.filter(is_read=False).count()
+        page = paginator.paginate_sources([notifications, broadcasts], request)
+        return paginator.get_paginated_response(self.serialize(page, context), unread_count=unread_count)
+    
+    def serialize(self, items, context):
         
-        return Response({
-            'notifications': serializer.data,
-            'unread_count': unread_count
-        }, status=status.HTTP_200_OK)
+        '''Serialize a merged list of notifications and broadcasts in order'''
+        
+        notifications = [item for item in items if isinstance(item, Notification)]
+        broadcasts = [item for item in items if isinstance(item, Broadcast)]
+        
+        data = dict(zip(map(id, notifications), NotificationSerializer(notifications, many=True, context=context).data))
+        data.update(zip(map(id, broadcasts), BroadcastSerializer(broadcasts, many=True, context=context).data))
+        return [data[id(item)] for item in items]
         
 class NotificationMarkAsReadView(APIView):
     
@@ -31,11 +74,22 @@ class NotificationMarkAsReadView(APIView):
     
     def patch(self, request, pk):
         try:
-            notification = Notification.objects.get(pk=pk, recipient=request.user)
-            notification.is_read = True
-            notification.save()
+            with transaction.atomic():
+                counter = counters.lock(request.user.id)
+                notification = Notification.objects.get(pk=pk, recipient=request.user)
+                
+                # below the watermark it already reads as read, no override needed
+                if not notification.read_state(counter.read_until):
+                    notification.is_read = True
+                    notification.save(update_fields=['is_read'])
+                    counters.increment_unread([request.user.id], -1)
+                    
+            publish_unread_count(request.user.id, counters.badge(request.user))
             
-            serializer = NotificationSerializer(notification, context={'request': request})
+            serializer = NotificationSerializer(
+                notification,
+                context={'request': request, 'read_until': counter.read_until}
+            )
             return Response(serializer.data, status=status.HTTP_200_OK)
             
         except Notification.DoesNotExist:
@@ -50,12 +104,15 @@ class NotificationMarkAllAsReadView(APIView):
     permission_classes = [IsAuthenticated]
     
     def patch(self, request):
-        notifications = Notification.objects.filter(recipient=request.user, is_read=False)
-        notifications.update(is_read=True)
+        with transaction.atomic():
+            # moves the read watermark instead of rewriting every unread row
+            updated_count = counters.mark_all_read(request.user)
+        
+        publish_unread_count(request.user.id, 0)
         
         return Response({
             'message': 'All notifications marked as read',
-            'updated_count': notifications.count()
+            'updated_count': updated_count
         }, status=status.HTTP_200_OK)
         
 class NotificationDeleteView(APIView):
@@ -66,8 +123,17 @@ class NotificationDeleteView(APIView):
     
     def delete(self, request, pk):
         try:
-            notification = Notification.objects.get(pk=pk, recipient=request.user)
-            notification.delete()
+            with transaction.atomic():
+                counter = counters.lock(request.user.id)
+                notification = Notification.objects.get(pk=pk, recipient=request.user)
+                was_unread = not notification.read_state(counter.read_until)
+                notification.delete()
+                
+                if was_unread:
+                    counters.increment_unread([request.user.id], -1)
+            
+            if was_unread:
+                publish_unread_count(request.user.id, counters.badge(request.user))
             
             return Response({
                 'message': 'Notification deleted'
@@ -76,4 +142,131 @@ class NotificationDeleteView(APIView):
         except Notification.DoesNotExist:
             return Response({
                 'error': 'Notification not found'
-            }, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            }, status=status.HTTP_404_NOT_FOUND)
+            
+            
+def get_user_broadcast(user, pk):
+    return Broadcast.objects.for_user(user).select_related('sender__profile', 'thread').filter(pk=pk).first()
+    
+    
+class BroadcastMarkAsReadView(APIView):
+    
+    '''API endpoint to mark a broadcast announcement as read'''
+    
+    permission_classes = [IsAuthenticated]
+    
+    def patch(self, request, pk):
+        broadcast = get_user_broadcast(request.user, pk)
+        if broadcast is None:
+            return Response({
+                'error': 'Announcement not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+            
+        set_receipt(broadcast, request.user, is_read=True)
+        publish_unread_count(request.user.id, counters.badge(request.user))
+        
+        broadcast.receipt_read = True
+        serializer = BroadcastSerializer(broadcast, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+        
+class BroadcastDismissView(APIView):
+    
+    '''API endpoint to dismiss a broadcast announcement from the inbox'''
+    
+    permission_classes = [IsAuthenticated]
+    
+    def delete(self, request, pk):
+        broadcast = get_user_broadcast(request.user, pk)
+        if broadcast is None:
+            return Response({
+                'error': 'Announcement not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+            
+        set_receipt(broadcast, request.user, is_read=True, is_dismissed=True)
+        publish_unread_count(request.user.id, counters.badge(request.user))
+        
+        return Response({
+            'message': 'Announcement dismissed'
+        }, status=status.HTTP_200_OK)
+            
+            
+class NotificationStreamTicketView(APIView):
+    
+    '''API endpoint issuing a single-use ticket for opening the notification stream'''
+    
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        return Response({
+            'ticket': issue_ticket(request.user),
+            'expires_in': settings.NOTIFICATION_STREAM_TICKET_SECONDS
+        }, status=status.HTTP_201_CREATED)
+    
+    
+class NotificationStreamView(View):
+    
+    '''
+    Server-sent events stream of new notifications and unread count changes
+    
+    EventSource cannot send headers, so besides a JWT Authorization header
+    the stream accepts ?ticket= from NotificationStreamTicketView. Access
+    tokens are never put in the URL, where proxies and access logs keep them.
+    '''
+    
+    async def get(self, request):
+        user = await sync_to_async(self.authenticate)(request)
+        
+        if user is None:
+            return JsonResponse({
+                'error': 'Authentication credentials were not provided'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        unread_count = await sync_to_async(counters.badge)(user)
+        
+        response = StreamingHttpResponse(
+            self.events(user.id, unread_count),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    def authenticate(self, request):
+        authenticator = JWTAuthentication()
+        
+        header = authenticator.get_header(request)
+        if header is None:
+            return redeem_ticket(request.GET.get('ticket'))
+        
+        raw_token = authenticator.get_raw_token(header)
+        if not raw_token:
+            return None
+        
+        try:
+            user = authenticator.get_user(authenticator.get_validated_token(raw_token))
+        except (InvalidToken, AuthenticationFailed):
+            return None
+        
+        return user if user.is_active else None
+    
+    async def events(self, user_id, unread_count):
+        broker = get_broker()
+        queue = broker.subscribe(user_id)
+        keepalive = getattr(settings, 'NOTIFICATION_STREAM_KEEPALIVE', 15)
+        
+        try:
+            yield 'retry: 5000\n\n'
+            yield self.format({'type': 'unread_count', 'unread_count': unread_count})
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield self.format(event)
+        finally:
+            broker.unsubscribe(user_id, queue)
+            
+    def format(self, event):
+        return f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
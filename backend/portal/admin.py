@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, UserFollow
+from .models import UserProfile, UserFollow, EmailOutbox
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -38,4 +38,12 @@ class UserFollowAdmin(admin.ModelAdmin):
         ('User Follow Information', {
             'fields': ('follower__username', 'follower', 'following', 'created_at')
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['to_email', 'kind', 'status', 'attempts', 'run_after', 'created_at', 'sent_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['to_email', 'subject', 'last_error']
+    readonly_fields = ['created_at', 'sent_at', 'locked_by', 'locked_at', 'last_error']
@@ -0,0 +1,142 @@
+from django.contrib.auth.models import User
+from django.db import models
+from rest_framework import serializers
+
+from .models import UserFollow
+
+
+class UserLoader:
+
+    '''
+    Request-scoped batch loader for users, their profiles and whether the
+    viewer follows them
+
+    Ids are queued with load() while a list is being prepared and resolved
+    together on first access: one query for the users (profiles joined in)
+    and, once something asks for it, one for the follow state of every
+    user loaded so far. Results are kept for the rest of the request, so
+    the same author showing up again costs nothing.
+    '''
+
+    def __init__(self, viewer=None):
+        self.viewer = viewer if viewer is not None and viewer.is_authenticated else None
+        self.users = {}
+        self.follows = set()
+        self.follows_checked = set()
+        self.queued = set()
+
+    def load(self, user_ids):
+        self.queued.update(user_id for user_id in user_ids if user_id is not None and user_id not in self.users)
+
+    def dispatch(self):
+        ids = self.queued - self.users.keys()
+        self.queued = set()
+        if not ids:
+            return
+
+        for user in User.objects.filter(pk__in=ids).select_related('profile'):
+            self.users[user.pk] = user
+        # deleted in the meantime, don't look them up again
+        for user_id in ids - self.users.keys():
+            self.users[user_id] = None
+
+    def user(self, user_id):
+        if user_id not in self.users:
+            self.load([user_id])
+            self.dispatch()
+        return self.users.get(user_id)
+
+    def profile(self, user_id):
+        return getattr(self.user(user_id), 'profile', None)
+
+    def is_following(self, user_id):
+        if self.viewer is None:
+            return False
+
+        if user_id not in self.follows_checked:
+            self.dispatch()
+            ids = (self.users.keys() | {user_id}) - self.follows_checked
+            self.follows.update(
+                UserFollow.objects.filter(follower=self.viewer, following_id__in=ids)
+                .values_list('following_id', flat=True)
+            )
+            self.follows_checked.update(ids)
+        return user_id in self.follows
+
+
+def get_loader(context):
+
+    '''
+    The loader of the request in a serializer context, shared by every
+    serializer of that request (the serializer context without one)
+    '''
+
+    request = context.get('request')
+    if request is None:
+        return context.setdefault('user_loader', UserLoader())
+
+    # the underlying HttpRequest, also reached from a re-wrapped DRF Request
+    holder = getattr(request, '_request', request)
+    loader = getattr(holder, 'user_loader', None)
+    if loader is None:
+        loader = holder.user_loader = UserLoader(getattr(request, 'user', None))
+    return loader
+
+
+class LoadedUserField(serializers.Field):
+
+    '''
+    Attribute of the user behind a user id, e.g.
+    LoadedUserField(source='author_id') for the author's username
+    '''
+
+    def __init__(self, attribute='username', **kwargs):
+        kwargs['read_only'] = True
+        self.attribute = attribute
+        super().__init__(**kwargs)
+
+    def to_representation(self, user_id):
+        user = get_loader(self.context).user(user_id)
+        return getattr(user, self.attribute) if user is not None else None
+
+
+class LoadedProfileField(serializers.Field):
+
+    '''
+    Nested profile of the user behind a user id, e.g.
+    LoadedProfileField(UserProfileCardSerializer, source='author_id')
+    '''
+
+    def __init__(self, serializer_class, **kwargs):
+        kwargs['read_only'] = True
+        self.serializer_class = serializer_class
+        super().__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        super().bind(field_name, parent)
+        self.serializer = self.serializer_class()
+        self.serializer.bind(field_name, self)
+
+    def to_representation(self, user_id):
+        profile = get_loader(self.context).profile(user_id)
+        if profile is None:
+            return None
+        return self.serializer.to_representation(profile)
+
+
+class LoadedListSerializer(serializers.ListSerializer):
+
+    '''
+    Queues the user ids of every row's loaded fields before serializing
+    the first one, so the whole list resolves in one batch
+    '''
+
+    def to_representation(self, data):
+        rows = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+
+        loader = get_loader(self.context)
+        for field in self.child.fields.values():
+            if isinstance(field, (LoadedUserField, LoadedProfileField)):
+                loader.load(field.get_attribute(row) for row in rows)
+
+        return super().to_representation(rows)
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from portal.models import UserProfile, UserFollow
+
+
+class Command(BaseCommand):
+    
+    help = 'Recompute UserProfile.followers_count and following_count from UserFollow'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Profiles per batch')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted profiles')
+        
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        last_id = 0
+        checked = fixed = 0
+        
+        while True:
+            # walk profiles by primary key so memory stays bounded
+            batch = list(
+                UserProfile.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', 'user_id', 'followers_count', 'following_count')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            
+            user_ids = [user_id for _pk, user_id, _followers, _following in batch]
+            followers = self.count_by(user_ids, 'following_id')
+            following = self.count_by(user_ids, 'follower_id')
+            
+            drifted = [
+                UserProfile(pk=pk, followers_count=followers.get(user_id, 0), following_count=following.get(user_id, 0))
+                for pk, user_id, followers_count, following_count in batch
+                if followers_count != followers.get(user_id, 0) or following_count != following.get(user_id, 0)
+            ]
+            
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    UserProfile.objects.bulk_update(drifted, ['followers_count', 'following_count'])
+                    
+            checked += len(batch)
+            fixed += len(drifted)
+            
+            if options['sleep']:
+                time.sleep(options['sleep'])
+                
+        action = 'would fix' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} profiles, {action} {fixed} in {time.monotonic() - started:.2f}s'
+        ))
+        
+    def count_by(self, user_ids, column):
+        rows = (
+            UserFollow.objects.filter(**{f'{column}__in': user_ids})
+            .order_by()
+            .values(column)
+            .annotate(total=Count('pk'))
+            .values_list(column, 'total')
+        )
+        return dict(rows)
@@ -0,0 +1,70 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.worker import default_worker_id
+from portal.outbox import claim_batch, close_quietly, purge_outbox, send_batch
+
+
+class Command(BaseCommand):
+    
+    help = 'Drain the email outbox over a single reused SMTP connection'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages claimed per round')
+        parser.add_argument('--sleep', type=float, default=None, help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit once nothing is due')
+        
+    def handle(self, *args, **options):
+        worker_id = default_worker_id()
+        batch_size = options['batch_size'] or settings.EMAIL_OUTBOX_BATCH
+        sleep = options['sleep'] if options['sleep'] is not None else settings.EMAIL_OUTBOX_POLL_INTERVAL
+        
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        
+        connection = get_connection()
+        connected = False
+        last_sent = time.monotonic()
+        total_sent = total_failed = 0
+        purged_at = None
+        
+        try:
+            while not self.stopping:
+                close_old_connections()
+                
+                if purged_at is None or time.monotonic() - purged_at >= settings.EMAIL_OUTBOX_PURGE_INTERVAL:
+                    purged = purge_outbox()
+                    purged_at = time.monotonic()
+                    if purged:
+                        self.stdout.write(f'Purged {purged} outbox rows past retention')
+                        
+                rows = claim_batch(worker_id, batch_size)
+                
+                if not rows:
+                    if options['burst']:
+                        break
+                    # SMTP servers drop idle sessions, do not hold one open forever
+                    if connected and time.monotonic() - last_sent > settings.EMAIL_OUTBOX_IDLE_DISCONNECT:
+                        close_quietly(connection)
+                        connected = False
+                    time.sleep(sleep)
+                    continue
+                
+                sent, failed = send_batch(connection, rows)
+                connected = True
+                last_sent = time.monotonic()
+                total_sent += sent
+                total_failed += failed
+        finally:
+            close_quietly(connection)
+            
+        self.stdout.write(self.style.SUCCESS(f'Outbox worker stopped: {total_sent} sent, {total_failed} failed attempts'))
+        
+    def stop(self, signum, frame):
+        self.stopping = True
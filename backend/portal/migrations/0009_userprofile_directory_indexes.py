@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:39
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0008_alter_userprofile_profile_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['lastname', 'firstname', 'id'], name='profile_directory_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['department'], name='profile_department_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['role'], name='profile_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['course'], name='profile_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(django.db.models.functions.text.Upper('lastname'), name='profile_lastname_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(django.db.models.functions.text.Upper('firstname'), name='profile_firstname_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counts(apps, schema_editor):
+    UserProfile = apps.get_model('portal', 'UserProfile')
+    UserFollow = apps.get_model('portal', 'UserFollow')
+
+    def count_of(column):
+        counted = UserFollow.objects.filter(**{column: OuterRef('user_id')}).order_by().values(column).annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(counted), 0)
+
+    UserProfile.objects.update(followers_count=count_of('following'), following_count=count_of('follower'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0009_userprofile_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:36
+
+from django.contrib.postgres.indexes import OpClass
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+# istartswith compiles to UPPER(col) LIKE UPPER('prefix%') on PostgreSQL, which
+# a plain expression index only serves under the C collation. text_pattern_ops
+# makes the prefix match indexable under any collation. SQLite has no operator
+# classes (and its LIKE is already case-insensitive), so it gets no index.
+PATTERN_INDEXES = [
+    models.Index(OpClass(Upper('lastname'), name='text_pattern_ops'), name='profile_lastname_pattern_idx'),
+    models.Index(OpClass(Upper('firstname'), name='text_pattern_ops'), name='profile_firstname_pattern_idx'),
+]
+
+
+def create_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    UserProfile = apps.get_model('portal', 'UserProfile')
+    for index in PATTERN_INDEXES:
+        schema_editor.add_index(UserProfile, index)
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    UserProfile = apps.get_model('portal', 'UserProfile')
+    for index in PATTERN_INDEXES:
+        schema_editor.remove_index(UserProfile, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0011_email_outbox'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userprofile',
+            name='profile_lastname_upper_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='userprofile',
+            name='profile_firstname_upper_idx',
+        ),
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0012_userprofile_name_pattern_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailoutbox',
+            index=models.Index(fields=['status', 'sent_at'], name='outbox_sent_idx'),
+        ),
+    ]
@@ -6,6 +6,42 @@ from django.utils import timezone
 from datetime import timedelta
 
 from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef, Q, Value
+
+class UserProfileQuerySet(models.QuerySet):
+    
+    def directory(self, viewer, department=None, role=None, course=None, name=None):
+        
+        '''
+        Non-admin profiles (excluding the viewer) with follow state, optionally
+        filtered by department/role/course and a first or last name prefix
+        '''
+        
+        queryset = self.select_related('user').filter(user__is_superuser=False).exclude(user=viewer)
+        
+        if department:
+            queryset = queryset.filter(department=department)
+        if role:
+            queryset = queryset.filter(role=role)
+        if course:
+            queryset = queryset.filter(course=course)
+        if name:
+            queryset = queryset.filter(Q(lastname__istartswith=name) | Q(firstname__istartswith=name))
+            
+        return queryset.with_follow_state(viewer)
+    
+    def with_follow_state(self, viewer):
+        
+        '''
+        Annotate is_following (for the viewer) so UserProfileDetailSerializer
+        does not query per profile
+        '''
+        
+        if viewer is not None and viewer.is_authenticated:
+            follows = UserFollow.objects.filter(follower=viewer, following=OuterRef('user_id'))
+            return self.annotate(is_following=Exists(follows))
+        return self.annotate(is_following=Value(False))
+
 
 class UserProfile(models.Model):
     
@@ -86,6 +122,12 @@ class UserProfile(models.Model):
     # track last time password was changed separately
     last_password_change = models.DateTimeField(null=True, blank=True)
     
+    # denormalized follow counts, kept by FollowUserView and reconcile_follow_counts
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    
+    objects = UserProfileQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.user.username} - {self.firstname} {self.lastname}"
     
@@ -141,6 +183,14 @@ class UserProfile(models.Model):
     class Meta:
         verbose_name = 'User Profile'
         verbose_name_plural = 'User Profiles'
+        indexes = [
+            # user directory: keyset order and filters, the case-insensitive
+            # name prefix indexes are PostgreSQL only, see migration 0012
+            models.Index(fields=['lastname', 'firstname', 'id'], name='profile_directory_idx'),
+            models.Index(fields=['department'], name='profile_department_idx'),
+            models.Index(fields=['role'], name='profile_role_idx'),
+            models.Index(fields=['course'], name='profile_course_idx'),
+        ]
 
 class UserFollow(models.Model):
     follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following')
@@ -171,4 +221,57 @@ class UserOTP(models.Model):
     is_verified = models.BooleanField(default=False)
     
     def __str__(self):
-        return f'OTP for {self.user.username} (verified={self.is_verified})'
\ No newline at end of file
+        return f'OTP for {self.user.username} (verified={self.is_verified})'
+
+class EmailOutbox(models.Model):
+    
+    '''
+    Outgoing email, written in the request's transaction and sent by
+    `manage.py send_emails` over one reused SMTP connection
+    
+    OTP emails carry no code: it is rendered from the user's secret at
+    send time so a queued message never delivers an expired code
+    '''
+    
+    KIND_CHOICES = [
+        ('otp', 'Verification code'),
+        ('plain', 'Plain message'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='plain')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='outbox')
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Email Outbox'
+        verbose_name_plural = 'Email Outbox'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='outbox_due_idx'),
+            # the outbox worker purges delivered rows past retention
+            models.Index(fields=['status', 'sent_at'], name='outbox_sent_idx'),
+        ]
+        
+    def __str__(self):
+        return f'{self.kind} to {self.to_email} ({self.status})'
@@ -0,0 +1,198 @@
+import logging
+from datetime import timedelta
+
+import pyotp
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import EmailOutbox, UserOTP
+
+logger = logging.getLogger(__name__)
+
+
+def from_email():
+    return f'Stream <{settings.EMAIL_HOST_USER}>'
+
+
+# -- QUEUEING (inside the request's transaction) --
+
+def queue_email(to_email, subject, body, user=None, kind='plain'):
+    row = EmailOutbox.objects.create(
+        kind=kind,
+        user=user,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    )
+    if settings.JOBS_RUN_INLINE:
+        transaction.on_commit(lambda: drain_inline())
+    return row
+
+
+def queue_otp_email(user):
+
+    '''
+    Queue a verification email, unless one is still waiting: the code is
+    rendered when it goes out, so one queued message is always current
+    '''
+
+    # a waiting (or backing off) message is simply sent sooner
+    pending = EmailOutbox.objects.filter(user=user, kind='otp', status='queued').update(run_after=timezone.now())
+    if pending:
+        return None
+    return queue_email(user.email, 'Stream - Verify your account', '', user=user, kind='otp')
+
+
+# -- RENDERING (at send time) --
+
+def render(row):
+
+    '''EmailMessage for an outbox row, None when there is nothing to send anymore'''
+
+    if row.kind != 'otp':
+        return EmailMessage(row.subject, row.body, from_email(), [row.to_email])
+
+    otp = UserOTP.objects.filter(user_id=row.user_id).select_related('user__profile').first()
+    if otp is None or otp.is_verified or not otp.secret:
+        return None
+
+    user = otp.user
+    code = pyotp.TOTP(otp.secret).now()
+    firstname = getattr(getattr(user, 'profile', None), 'firstname', None) or user.username
+    body = (
+        f'Hello {firstname},\n\nYour verification code is: {code}\n\n'
+        'This code is valid for a short time. If you did not request this, please ignore this message.'
+    )
+    return EmailMessage(row.subject, body, from_email(), [row.to_email])
+
+
+# -- DRAINING --
+
+def claim_batch(worker_id, limit):
+
+    '''
+    Claim up to `limit` due rows (or rows stuck in sending past
+    EMAIL_OUTBOX_VISIBILITY_TIMEOUT) with a conditional UPDATE
+    '''
+
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.EMAIL_OUTBOX_VISIBILITY_TIMEOUT)
+    due = (
+        Q(status='queued', run_after__lte=now) |
+        Q(status='sending', locked_at__lt=stale)
+    )
+
+    ids = list(
+        EmailOutbox.objects.filter(due)
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+
+    EmailOutbox.objects.filter(due, pk__in=ids).update(
+        status='sending',
+        attempts=F('attempts') + 1,
+        locked_by=worker_id,
+        locked_at=now
+    )
+    return list(
+        EmailOutbox.objects.filter(pk__in=ids, status='sending', locked_by=worker_id, locked_at=now)
+        .order_by('run_after', 'id')
+    )
+
+
+def send_batch(connection, rows):
+
+    '''
+    Send claimed rows over an open connection, one message at a time so
+    every row gets its own result. Returns (sent, failed).
+    '''
+
+    sent = failed = 0
+
+    for row in rows:
+        try:
+            message = render(row)
+            if message is None:
+                EmailOutbox.objects.filter(pk=row.pk).update(status='skipped', sent_at=timezone.now(), body='')
+                continue
+
+            # no-op while the connection is up, reconnects after a failure
+            connection.open()
+            message.connection = connection
+            message.send()
+            # the message is out, keep only the envelope until the purge
+            EmailOutbox.objects.filter(pk=row.pk).update(status='sent', sent_at=timezone.now(), last_error='', body='')
+            sent += 1
+
+        except Exception as exc:
+            failed += 1
+            logger.exception('Failed to send %s email #%s', row.kind, row.pk)
+            retry(row, exc)
+
+            # a broken connection fails every message after it, reopen it
+            close_quietly(connection)
+
+    return sent, failed
+
+
+def retry(row, exc):
+    if row.attempts >= row.max_attempts:
+        EmailOutbox.objects.filter(pk=row.pk).update(status='failed', last_error=str(exc))
+        return
+
+    delay = settings.EMAIL_OUTBOX_RETRY_BACKOFF * (2 ** (row.attempts - 1))
+    EmailOutbox.objects.filter(pk=row.pk).update(
+        status='queued',
+        run_after=timezone.now() + timedelta(seconds=delay),
+        last_error=str(exc)
+    )
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def purge_outbox(batch_size=None):
+
+    '''
+    Delete sent and skipped rows older than EMAIL_OUTBOX_RETENTION_HOURS
+    and failed ones older than EMAIL_OUTBOX_FAILED_RETENTION_DAYS
+    '''
+
+    batch_size = batch_size or settings.EMAIL_OUTBOX_PURGE_BATCH
+    now = timezone.now()
+    expired = (
+        Q(status__in=['sent', 'skipped'], sent_at__lt=now - timedelta(hours=settings.EMAIL_OUTBOX_RETENTION_HOURS)) |
+        Q(status='failed', created_at__lt=now - timedelta(days=settings.EMAIL_OUTBOX_FAILED_RETENTION_DAYS))
+    )
+
+    removed = 0
+    while True:
+        ids = list(EmailOutbox.objects.filter(expired).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return removed
+        removed += EmailOutbox.objects.filter(pk__in=ids).delete()[0]
+
+
+def drain_inline():
+
+    '''JOBS_RUN_INLINE: send what is due right after commit, no worker needed'''
+
+    connection = get_connection()
+    try:
+        while True:
+            rows = claim_batch('inline', settings.EMAIL_OUTBOX_BATCH)
+            if not rows:
+                break
+            send_batch(connection, rows)
+    finally:
+        close_quietly(connection)
@@ -1,8 +1,10 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.db import transaction
 from .models import UserProfile, UserFollow
 from .utils import create_send_otp_verification_code
+from .loaders import LoadedListSerializer, LoadedProfileField, LoadedUserField, get_loader
 
 import json
 
@@ -92,25 +94,39 @@ class SignUpSerializer(serializers.ModelSerializer):
         validated_data.pop('confirm_password')
         profile_data = validated_data.pop('profile')
         
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password'],
-            is_active=False
-        )
-        
-        UserProfile.objects.create(
-            user=user,
-            **profile_data
-        )
-        
-        request = self.context.get('request') if self.context else None
-        create_send_otp_verification_code(user, request=request)
+        # the signup returns once the user, profile and queued email commit
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=validated_data['username'],
+                email=validated_data['email'],
+                password=validated_data['password'],
+                is_active=False
+            )
+            
+            UserProfile.objects.create(
+                user=user,
+                **profile_data
+            )
+            
+            request = self.context.get('request') if self.context else None
+            create_send_otp_verification_code(user, request=request)
         
         return user
         
         
-class UserProfileDetailSerializer(serializers.ModelSerializer):
+class ProfileImageUrlMixin:
+    
+    '''absolute profile_image_url for serializers of UserProfile'''
+    
+    def get_profile_image_url(self, obj):
+        if obj.profile_image:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.profile_image.url)
+        return None
+    
+    
+class UserProfileDetailSerializer(ProfileImageUrlMixin, serializers.ModelSerializer):
     
     '''retrieving user details'''
     
@@ -129,8 +145,6 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
     can_change_password = serializers.SerializerMethodField()
     days_until_password_change = serializers.SerializerMethodField()
     
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     
     class Meta:
@@ -161,16 +175,6 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
             'is_following'
         ]
         
-    def get_profile_image_url(self, obj):
-        
-        '''get user image'''
-        
-        if obj.profile_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_image.url)
-        return None
-    
     def get_can_update_profile(self, obj):
         
         '''CAN UPDATE PROFILE DETAILS?'''
@@ -183,21 +187,15 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
         
         return obj.days_until_next_update()
     
-    def get_followers_count(self, obj):
-        return obj.user.followers.count()
-    
-    def get_following_count(self, obj):
-        return obj.user.following.count()
-    
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            if request.user == obj.user:
+            if request.user.id == obj.user_id:
                 return None  # Can't follow yourself
-            return UserFollow.objects.filter(
-                follower=request.user,
-                following=obj.user
-            ).exists()
+            # annotated by UserProfile.objects.with_follow_state()
+            if hasattr(obj, 'is_following'):
+                return obj.is_following
+            return get_loader(self.context).is_following(obj.user_id)
         return False
 
     def get_can_change_password(self, obj):
@@ -206,14 +204,65 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
     def get_days_until_password_change(self, obj):
         return obj.days_until_password_change()
     
+class UserProfileCardSerializer(ProfileImageUrlMixin, serializers.ModelSerializer):
+    
+    '''
+    compact author representation for embedding in lists, the full profile
+    is served by UserProfileDetailView
+    '''
+    
+    username = serializers.CharField(source='user.username', read_only=True)
+    role_display = serializers.CharField(source='get_role_display', read_only=True)
+    profile_image_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UserProfile
+        fields = [
+            'username',
+            'firstname',
+            'lastname',
+            'role',
+            'role_display',
+            'department',
+            'profile_image_url'
+        ]
+        
+class UserDirectorySerializer(ProfileImageUrlMixin, serializers.ModelSerializer):
+    
+    '''
+    user directory row, expects UserProfile.objects.with_follow_state()
+    with select_related('user')
+    '''
+    
+    username = serializers.CharField(source='user.username', read_only=True)
+    email = serializers.EmailField(source='user.email', read_only=True)
+    profile_image_url = serializers.SerializerMethodField()
+    is_following = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = UserProfile
+        fields = [
+            'username',
+            'email',
+            'firstname',
+            'lastname',
+            'profile_image_url',
+            'role',
+            'department',
+            'is_following',
+            'followers_count',
+            'following_count'
+        ]
+        
 class UserFollowSerializer(serializers.ModelSerializer):
-    follower_username = serializers.CharField(source='follower.username', read_only=True)
-    following_username = serializers.CharField(source='following.username', read_only=True)
-    follower_profile = UserProfileDetailSerializer(source='follower.profile', read_only=True)
-    following_profile = UserProfileDetailSerializer(source='following.profile', read_only=True)
+    follower_username = LoadedUserField(source='follower_id')
+    following_username = LoadedUserField(source='following_id')
+    follower_profile = LoadedProfileField(UserProfileDetailSerializer, source='follower_id')
+    following_profile = LoadedProfileField(UserProfileDetailSerializer, source='following_id')
     
     class Meta:
         model = UserFollow
+        list_serializer_class = LoadedListSerializer
         fields = [
             'id',
             'follower',
@@ -257,16 +306,20 @@ class UpdateProfileDetailsSerializer(serializers.ModelSerializer):
     
     def update(self, instance, validated_data):
         
-        '''Update profile and username'''
+        '''
+        Update profile and username, saving only the edited columns so the
+        follow counts moved by concurrent follows are not written back
+        '''
         
         username = validated_data.pop('username', None)
         
         if username:
             instance.user.username = username
-            instance.user.save()
+            instance.user.save(update_fields=['username'])
         
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
         
         return instance
     
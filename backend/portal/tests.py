@@ -1,3 +1,159 @@
-from django.test import TestCase
+import re
+import smtplib
+from datetime import timedelta
 
-# Create your tests here.
+import pyotp
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import EmailOutbox, UserOTP, UserProfile
+from .outbox import claim_batch, drain_inline, purge_outbox, queue_email, queue_otp_email, send_batch
+
+
+class FailingBackend(BaseEmailBackend):
+    
+    def send_messages(self, messages):
+        raise smtplib.SMTPServerDisconnected('connection lost')
+    
+    
+@override_settings(EMAIL_OUTBOX_RETRY_BACKOFF=30, EMAIL_OUTBOX_MAX_ATTEMPTS=3)
+class OutboxTests(TestCase):
+    
+    def test_claim_is_exclusive(self):
+        queue_email('a@ssct.edu.ph', 'Hello', 'Body')
+        queue_email('b@ssct.edu.ph', 'Hello', 'Body')
+        
+        claimed = claim_batch('a', 10)
+        
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(claim_batch('b', 10), [])
+        self.assertEqual({row.attempts for row in claimed}, {1})
+        
+    def test_claim_respects_run_after_and_limit(self):
+        queue_email('a@ssct.edu.ph', 'Hello', 'Body')
+        queue_email('b@ssct.edu.ph', 'Hello', 'Body')
+        later = queue_email('c@ssct.edu.ph', 'Hello', 'Body')
+        EmailOutbox.objects.filter(pk=later.pk).update(run_after=timezone.now() + timedelta(minutes=5))
+        
+        self.assertEqual(len(claim_batch('a', 1)), 1)
+        self.assertEqual(len(claim_batch('a', 10)), 1)
+        
+    def test_stuck_rows_are_reclaimed(self):
+        row = queue_email('a@ssct.edu.ph', 'Hello', 'Body')
+        claim_batch('a', 10)
+        EmailOutbox.objects.filter(pk=row.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        
+        self.assertEqual([r.pk for r in claim_batch('b', 10)], [row.pk])
+        
+    def test_send_marks_rows_sent(self):
+        queue_email('a@ssct.edu.ph', 'Hello', 'Body')
+        rows = claim_batch('a', 10)
+        
+        self.assertEqual(send_batch(get_connection(), rows), (1, 0))
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.status, row.body), ('sent', ''))
+        self.assertEqual(mail.outbox[0].to, ['a@ssct.edu.ph'])
+        
+    @override_settings(EMAIL_OUTBOX_RETENTION_HOURS=24, EMAIL_OUTBOX_FAILED_RETENTION_DAYS=7)
+    def test_purge_deletes_rows_past_retention(self):
+        now = timezone.now()
+        keep = [
+            queue_email('queued@ssct.edu.ph', 'Hello', 'Body'),
+            EmailOutbox.objects.create(to_email='recent@ssct.edu.ph', status='sent', sent_at=now - timedelta(hours=23)),
+            EmailOutbox.objects.create(to_email='failed@ssct.edu.ph', status='failed'),
+        ]
+        EmailOutbox.objects.create(to_email='sent@ssct.edu.ph', status='sent', sent_at=now - timedelta(hours=25))
+        EmailOutbox.objects.create(to_email='skipped@ssct.edu.ph', status='skipped', sent_at=now - timedelta(days=2))
+        old = EmailOutbox.objects.create(to_email='old@ssct.edu.ph', status='failed')
+        EmailOutbox.objects.filter(pk=old.pk).update(created_at=now - timedelta(days=8))
+        
+        self.assertEqual(purge_outbox(batch_size=2), 3)
+        self.assertEqual(set(EmailOutbox.objects.values_list('pk', flat=True)), {row.pk for row in keep})
+        
+    def test_failed_send_backs_off_then_gives_up(self):
+        row = queue_email('a@ssct.edu.ph', 'Hello', 'Body')
+        connection = FailingBackend()
+        
+        with self.assertLogs('portal.outbox', level='ERROR'):
+            self.assertEqual(send_batch(connection, claim_batch('a', 10)), (0, 1))
+        row.refresh_from_db()
+        self.assertEqual(row.status, 'queued')
+        self.assertIn('connection lost', row.last_error)
+        self.assertGreater(row.run_after, timezone.now() + timedelta(seconds=25))
+        
+        EmailOutbox.objects.filter(pk=row.pk).update(run_after=timezone.now(), attempts=2)
+        with self.assertLogs('portal.outbox', level='ERROR'):
+            send_batch(connection, claim_batch('a', 10))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('failed', 3))
+        
+    def test_otp_is_rendered_at_send_time_and_queued_once(self):
+        user = User.objects.create_user('student', 'student@ssct.edu.ph')
+        otp = UserOTP.objects.create(user=user, secret=pyotp.random_base32())
+        
+        queue_otp_email(user)
+        self.assertIsNone(queue_otp_email(user))
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+        
+        drain_inline()
+        code = re.search(r'code is: (\d+)', mail.outbox[0].body).group(1)
+        self.assertTrue(pyotp.TOTP(otp.secret).verify(code, valid_window=1))
+        
+    def test_verified_user_gets_no_otp(self):
+        user = User.objects.create_user('student', 'student@ssct.edu.ph')
+        UserOTP.objects.create(user=user, secret=pyotp.random_base32(), is_verified=True)
+        queue_otp_email(user)
+        
+        drain_inline()
+        
+        self.assertEqual(EmailOutbox.objects.get().status, 'skipped')
+        self.assertEqual(mail.outbox, [])
+
+
+class ProfileUpdateTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('student', 'student@ssct.edu.ph', 'old-password-1')
+        UserProfile.objects.create(
+            user=self.user,
+            firstname='Student',
+            lastname='Tester',
+            birth_date='2000-01-01',
+            gender='male',
+            role='student',
+            department='ccis',
+            course='bscs'
+        )
+        # the request's profile is loaded before the follows below land
+        self.user.profile
+        UserProfile.objects.filter(user=self.user).update(followers_count=7, following_count=3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        
+    def assertCountsKept(self):
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.followers_count, profile.following_count), (7, 3))
+        return profile
+        
+    def test_details_update_keeps_follow_counts(self):
+        response = self.client.patch('/api/v1/auth/profile/details/', {'firstname': 'Renamed'}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        profile = self.assertCountsKept()
+        self.assertEqual(profile.firstname, 'Renamed')
+        self.assertIsNotNone(profile.last_profile_details_update)
+        
+    def test_password_change_keeps_follow_counts(self):
+        response = self.client.patch('/api/v1/auth/profile/password/', {
+            'old_password': 'old-password-1',
+            'new_password': 'new-password-2',
+            'confirm_password': 'new-password-2'
+        }, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(self.assertCountsKept().last_password_change)
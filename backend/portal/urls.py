@@ -10,6 +10,8 @@ from .views import (
     UserFollowersListView,
     UserFollowingListView,
     AllUsersListView,
+    UserDirectoryView,
+    UserProfileDetailView,
     OTPVerifyView,
     OTPResendView
 )
@@ -28,4 +30,6 @@ urlpatterns = [
     path('followers/<str:username>/', UserFollowersListView.as_view(), name='user_followers'),
     path('following/<str:username>/', UserFollowingListView.as_view(), name='user_following'),
     path('users/', AllUsersListView.as_view(), name='all_users'),
+    path('users/directory/', UserDirectoryView.as_view(), name='user_directory'),
+    path('users/<str:username>/', UserProfileDetailView.as_view(), name='user_profile_detail'),
 ]
\ No newline at end of file
@@ -1,16 +1,15 @@
 import pyotp
-from django.conf import settings
-from django.core.mail import send_mail
-import logging
-from .models import UserOTP
+from .models import UserOTP, UserProfile
+from .outbox import queue_otp_email
+from django.db.models import F
 from django.utils import timezone
 
 
 def create_send_otp_verification_code(user, request=None, force_regen: bool = False):
     '''
-    Create a pyotp and send in user email
+    Create a pyotp secret and queue the verification email, the code is
+    rendered when `manage.py send_emails` sends it
     '''
-    logger = logging.getLogger(__name__)
     otp_obj, _created = UserOTP.objects.get_or_create(user=user)
 
     if not otp_obj.secret or force_regen:
@@ -19,29 +18,38 @@ def create_send_otp_verification_code(user, request=None, force_regen: bool = Fa
         otp_obj.updated_at = timezone.now()
         otp_obj.save()
 
-    totp = pyotp.TOTP(otp_obj.secret)
-    code = totp.now()
+    queue_otp_email(user)
+
+    return otp_obj
+
+
+def update_follow_counts(follower, following, delta):
     
-    subject = 'Stream - Verify your account'
-    firstname = getattr(getattr(user, 'profile', None), 'firstname', None) or user.username
-    message = f'Hello {firstname},\n\nYour verification code is: {code}\n\nThis code is valid for a short time. If you did not request this, please ignore this message.'
+    '''
+    Apply a follow (+1) or unfollow (-1) to the denormalized profile counts
+    Call inside the transaction that writes the UserFollow row
+    '''
     
-    from_email = f'Stream <{settings.EMAIL_HOST_USER}>'
-    recipient = [user.email]
+    followers = UserProfile.objects.filter(user=following)
+    following_of = UserProfile.objects.filter(user=follower)
     
-    auth_email = getattr(settings, 'EMAIL_HOST_USER', None)
-    auth_password = getattr(settings, 'EMAIL_HOST_PASSWORD', None)
-
-    # Debug logging
-    print(f"[OTP DEBUG] Sending OTP to: {user.email} from {from_email}, code: {code}, from: {from_email}")
-    logger.info(f"[OTP DEBUG] Sending OTP to: {user.email}, code: {code}, from: {from_email}")
+    if delta < 0:
+        # never go below zero if the counts drifted, reconcile fixes it
+        followers = followers.filter(followers_count__gte=-delta)
+        following_of = following_of.filter(following_count__gte=-delta)
+        
+    followers.update(followers_count=F('followers_count') + delta)
+    following_of.update(following_count=F('following_count') + delta)
 
-    try:
-        send_mail(subject, message, from_email, recipient, fail_silently=False, auth_user=auth_email, auth_password=auth_password)
-        print(f"[OTP DEBUG] Email sent successfully to {user.email}")
-        logger.info(f"[OTP DEBUG] Email sent successfully to {user.email}")
-    except Exception as exc:
-        print(f"[OTP DEBUG] Failed to send OTP email for user {user.username}: {exc}")
-        logger.exception('Failed to send OTP email for user %s: %s', user.username, exc)
 
-    return otp_obj
+def read_follow_counts(follower, following):
+    
+    '''(followers of `following`, users `follower` follows) from the profile columns'''
+    
+    rows = {
+        user_id: (followers_count, following_count)
+        for user_id, followers_count, following_count in UserProfile.objects.filter(
+            user__in=[follower, following]
+        ).values_list('user_id', 'followers_count', 'following_count')
+    }
+    return rows.get(following.id, (0, 0))[0], rows.get(follower.id, (0, 0))[1]
@@ -10,15 +10,19 @@ from .serializers import (
     SignInSerializer, 
     UserProfileDetailSerializer,
     UpdateProfileDetailsSerializer,
-    UserFollowSerializer
+    UserFollowSerializer,
+    UserDirectorySerializer
 )
 from django.contrib.auth.models import User
 from .models import UserProfile, UserFollow
 from django.utils import timezone
+from stream.pagination import KeysetPagination
 
 
 from notifications.utils import create_follow_notification
-from .utils import create_send_otp_verification_code
+from threads.timeline import add_author_to_timeline, remove_author_from_timeline
+from .utils import create_send_otp_verification_code, update_follow_counts, read_follow_counts
+from django.db import transaction
 
 import pyotp
 from .models import UserOTP
@@ -101,10 +105,7 @@ class UpdateProfileDetailsView(APIView):
         )
         
         if serializer.is_valid():
-            profile = serializer.save()
-            
-            profile.last_profile_details_update = timezone.now()
-            profile.save()
+            profile = serializer.save(last_profile_details_update=timezone.now())
             
             # Return updated profile with full details
             response_serializer = UserProfileDetailSerializer(
@@ -136,7 +137,7 @@ class UpdateProfileImageView(APIView):
             )
         
         profile.profile_image = request.FILES['profile_image']
-        profile.save()
+        profile.save(update_fields=['profile_image', 'updated_at'])
         
         serializer = UserProfileDetailSerializer(profile, context={'request': request})
         
@@ -176,7 +177,7 @@ class UpdatePasswordView(APIView):
 
         # record password change timestamp
         profile.last_password_change = timezone.now()
-        profile.save()
+        profile.save(update_fields=['last_password_change', 'updated_at'])
 
         return Response({'message': 'Password updated successfully'}, status=status.HTTP_200_OK)
     
@@ -208,18 +209,23 @@ class FollowUserView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Create follow relationship
-            UserFollow.objects.create(
-                follower=request.user,
-                following=user_to_follow
-            )
+            with transaction.atomic():
+                UserFollow.objects.create(
+                    follower=request.user,
+                    following=user_to_follow
+                )
+                update_follow_counts(request.user, user_to_follow, 1)
  
             create_follow_notification(request.user, user_to_follow)
+            add_author_to_timeline(request.user, user_to_follow)
+            
+            followers_count, following_count = read_follow_counts(request.user, user_to_follow)
             
             return Response({
                 'message': f'You are now following {username}',
                 'is_following': True,
-                'followers_count': user_to_follow.followers.count(),
-                'following_count': request.user.following.count()
+                'followers_count': followers_count,
+                'following_count': following_count
             }, status=status.HTTP_201_CREATED)
             
         except User.DoesNotExist:
@@ -241,13 +247,18 @@ class FollowUserView(APIView):
                     'error': 'You are not following this user'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            follow_obj.delete()
+            with transaction.atomic():
+                follow_obj.delete()
+                update_follow_counts(request.user, user_to_unfollow, -1)
+            remove_author_from_timeline(request.user, user_to_unfollow)
+            
+            followers_count, following_count = read_follow_counts(request.user, user_to_unfollow)
             
             return Response({
                 'message': f'You have unfollowed {username}',
                 'is_following': False,
-                'followers_count': user_to_unfollow.followers.count(),
-                'following_count': request.user.following.count()
+                'followers_count': followers_count,
+                'following_count': following_count
             }, status=status.HTTP_200_OK)
             
         except User.DoesNotExist:
@@ -306,43 +317,75 @@ class AllUsersListView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        try:
-            users = User.objects.filter(is_superuser=False).exclude(id=request.user.id)
-
-            following_ids = UserFollow.objects.filter(
-                follower=request.user
-            ).values_list('following_id', flat=True)
+        profiles = UserProfile.objects.directory(request.user)
+        serializer = UserDirectorySerializer(profiles, many=True, context={'request': request})
+        users_data = serializer.data
+        
+        return Response({
+            'count': len(users_data),
+            'users': users_data
+        }, status=status.HTTP_200_OK)
             
-            users_data = []
-            for user in users:
-                if hasattr(user, 'profile'):
-                    profile = user.profile
-                    profile_image_url = None
-                    if profile.profile_image:
-                        profile_image_url = request.build_absolute_uri(profile.profile_image.url)
-                    
-                    users_data.append({
-                        'username': user.username,
-                        'email': user.email,
-                        'firstname': profile.firstname,
-                        'lastname': profile.lastname,
-                        'profile_image_url': profile_image_url,
-                        'role': profile.role,
-                        'department': profile.department,
-                        'is_following': user.id in following_ids,
-                        'followers_count': user.followers.count(),
-                        'following_count': user.following.count()
-                    })
             
+class UserProfileDetailView(APIView):
+    
+    '''
+    API endpoint for another user's full profile, lists and feeds only
+    embed a compact author card
+    '''
+    
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, username):
+        profile = (
+            UserProfile.objects.with_follow_state(request.user)
+            .select_related('user')
+            .filter(user__username=username)
+            .first()
+        )
+        
+        if profile is None:
             return Response({
-                'count': len(users_data),
-                'users': users_data
-            }, status=status.HTTP_200_OK)
+                'error': 'User not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        serializer = UserProfileDetailSerializer(profile, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
             
-        except Exception as e:
-            return Response({
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            
+class UserDirectoryView(APIView):
+    
+    '''
+    API endpoint for the paginated user directory
+    
+    ?department=&role=&course= filter, ?q= matches a first or last name prefix
+    '''
+    
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        params = request.query_params
+        
+        for field in ('department', 'role', 'course'):
+            value = params.get(field)
+            choices = dict(UserProfile._meta.get_field(field).choices)
+            if value and value not in choices:
+                return Response({
+                    'error': f'Invalid {field}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        profiles = UserProfile.objects.directory(
+            request.user,
+            department=params.get('department'),
+            role=params.get('role'),
+            course=params.get('course'),
+            name=params.get('q', '').strip()
+        )
+        
+        paginator = KeysetPagination(ordering=('lastname', 'firstname', 'id'))
+        page = paginator.paginate_queryset(profiles, request)
+        serializer = UserDirectorySerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
             
             
 class OTPVerifyView(APIView):
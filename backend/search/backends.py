@@ -0,0 +1,154 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import SearchDocument
+
+TABLE = SearchDocument._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+
+# text search configuration used for the PostgreSQL tsvector column
+PG_CONFIG = 'english'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# -- INDEX DDL (used by the migration and rebuild_search_index) --
+
+POSTGRES_CREATE = [
+    f'''
+    ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{PG_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{PG_CONFIG}', coalesce(body, '')), 'B')
+    ) STORED
+    ''',
+    f'CREATE INDEX {TABLE}_vector_gin ON {TABLE} USING GIN (search_vector)',
+]
+
+POSTGRES_DROP = [
+    f'DROP INDEX IF EXISTS {TABLE}_vector_gin',
+    f'ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_CREATE = [
+    f'''
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, body, content='{TABLE}', content_rowid='id', tokenize='porter unicode61'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER {TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER {TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER {TABLE}_au AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    ''',
+]
+
+SQLITE_DROP = [
+    f'DROP TRIGGER IF EXISTS {TABLE}_au',
+    f'DROP TRIGGER IF EXISTS {TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {TABLE}_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def create_index(schema_editor):
+    for statement in _ddl(schema_editor.connection.vendor, create=True):
+        schema_editor.execute(statement)
+
+
+def drop_index(schema_editor):
+    for statement in _ddl(schema_editor.connection.vendor, create=False):
+        schema_editor.execute(statement)
+
+
+def rebuild_index():
+    
+    '''Resync the index from search_searchdocument (only SQLite needs it)'''
+    
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _ddl(vendor, create):
+    if vendor == 'postgresql':
+        return POSTGRES_CREATE if create else POSTGRES_DROP
+    if vendor == 'sqlite':
+        return SQLITE_CREATE if create else SQLITE_DROP
+    return []
+
+
+# -- QUERYING --
+
+def tokenize(query):
+    return TOKEN_RE.findall(query.lower())[:10]
+
+
+def search(query, kind=None):
+    
+    '''
+    Ranked SearchDocument queryset (best match first) with a `rank`
+    annotation, every word must match as a prefix
+    '''
+    
+    tokens = tokenize(query)
+    if not tokens:
+        return SearchDocument.objects.none()
+    
+    queryset = SearchDocument.objects.all()
+    if kind:
+        queryset = queryset.filter(kind=kind)
+        
+    if connection.vendor == 'postgresql':
+        return _search_postgres(queryset, tokens)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(queryset, tokens)
+    return _search_fallback(queryset, tokens)
+
+
+def _search_postgres(queryset, tokens):
+    tsquery = SearchQuery(' & '.join(f'{token}:*' for token in tokens), search_type='raw', config=PG_CONFIG)
+    # the generated column is not a model field, see POSTGRES_CREATE
+    vector = RawSQL('search_vector', [], output_field=SearchVectorField())
+    
+    return (
+        queryset.alias(vector=vector)
+        .filter(vector=tsquery)
+        .annotate(rank=SearchRank(vector, tsquery, cover_density=True))
+        .order_by('-rank', '-id')
+    )
+
+
+def _search_sqlite(queryset, tokens):
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    
+    matched = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    # bm25() is lower-is-better, negate it so both backends sort by -rank
+    rank = RawSQL(
+        f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {TABLE}.id',
+        [match],
+        output_field=FloatField()
+    )
+    return queryset.filter(id__in=matched).annotate(rank=rank).order_by('-rank', '-id')
+
+
+def _search_fallback(queryset, tokens):
+    for token in tokens:
+        queryset = queryset.filter(Q(title__icontains=token) | Q(body__icontains=token))
+    return queryset.annotate(rank=Value(0.0, output_field=FloatField())).order_by('-updated_at', '-id')
@@ -0,0 +1,60 @@
+from community.models import CommunityGroup
+from portal.models import UserProfile
+from threads.models import ThreadPost
+
+from .models import SearchDocument
+
+
+def thread_document(thread):
+    return {'title': thread.title, 'body': thread.content}
+
+
+def community_document(community):
+    return {'title': community.name, 'body': community.description}
+
+
+def user_document(profile):
+    return {
+        'title': f'{profile.firstname} {profile.lastname}',
+        'body': profile.user.username,
+    }
+
+
+def is_community_searchable(community):
+    return community.is_active
+
+
+def is_user_searchable(profile):
+    return not profile.user.is_superuser
+
+
+def object_key(kind, instance):
+    
+    '''object_id of an instance's document, users are keyed by user id so results can be routed'''
+    
+    return instance.user_id if kind == 'user' else instance.pk
+
+
+# kind -> (model, queryset for rebuilding, document builder, visibility check)
+SOURCES = {
+    'thread': (ThreadPost, lambda: ThreadPost.objects.all(), thread_document, None),
+    'community': (CommunityGroup, lambda: CommunityGroup.objects.filter(is_active=True), community_document, is_community_searchable),
+    'user': (UserProfile, lambda: UserProfile.objects.select_related('user').filter(user__is_superuser=False), user_document, is_user_searchable),
+}
+
+
+def index_object(kind, instance):
+    
+    '''Insert, refresh or drop the document of one object'''
+    
+    _model, _queryset, build, is_searchable = SOURCES[kind]
+    
+    if is_searchable and not is_searchable(instance):
+        remove_object(kind, object_key(kind, instance))
+        return
+    
+    SearchDocument.objects.update_or_create(kind=kind, object_id=object_key(kind, instance), defaults=build(instance))
+
+
+def remove_object(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
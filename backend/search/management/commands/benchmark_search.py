@@ -0,0 +1,86 @@
+import itertools
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search.backends import search
+from search.models import SearchDocument
+
+COMMON_WORDS = (
+    'enrollment schedule thesis defense library scholarship exam midterm finals '
+    'campus orientation laboratory robotics programming network database research '
+    'seminar workshop faculty student council sports intramurals graduation uniform '
+    'parking canteen dormitory internship engineering education business science'
+).split()
+
+SYLLABLES = 'ba ka da ga la ma na pa ra sa ta ya bi ki di li mi ni pi ri si ti bo ko do lo mo no po ro so to'.split()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    
+    help = 'Measure search latency against a synthetic corpus (rolled back afterwards)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic thread documents to insert')
+        parser.add_argument('--queries', type=int, default=50, help='Queries to time')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic rows')
+        
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        
+        # a few common words plus a long tail, roughly like real thread text
+        self.vocabulary = COMMON_WORDS + sorted({
+            ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(20000)
+        })
+        self.weights = list(itertools.accumulate(1 / (rank + 20) for rank in range(len(self.vocabulary))))
+        
+        try:
+            with transaction.atomic():
+                self.seed(rng, options['rows'])
+                self.measure(rng, options['queries'])
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write('Synthetic rows rolled back')
+            
+    def seed(self, rng, rows):
+        started = time.monotonic()
+        offset = 10 ** 12  # stay clear of real object ids
+        batch = []
+        for i in range(rows):
+            batch.append(SearchDocument(
+                kind='thread',
+                object_id=offset + i,
+                title=' '.join(self.words(rng, 6)),
+                body=' '.join(self.words(rng, 40)),
+            ))
+            if len(batch) == 5000:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        self.stdout.write(f'Seeded {rows} documents in {time.monotonic() - started:.1f}s')
+        
+    def words(self, rng, count):
+        # zipf-like: the first (common) words are picked far more often
+        return rng.choices(self.vocabulary, cum_weights=self.weights, k=count)
+        
+    def measure(self, rng, queries):
+        timings = []
+        for _ in range(queries):
+            query = ' '.join(self.words(rng, rng.randint(1, 2)))
+            started = time.perf_counter()
+            list(search(query)[:20])
+            timings.append((time.perf_counter() - started) * 1000)
+            
+        timings.sort()
+        self.stdout.write(self.style.SUCCESS(
+            f'{queries} queries: p50 {statistics.median(timings):.1f}ms, '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:.1f}ms, max {timings[-1]:.1f}ms'
+        ))
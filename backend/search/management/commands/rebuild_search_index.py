@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search import backends
+from search.documents import SOURCES, object_key
+from search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    
+    help = 'Rebuild search documents and the full-text index from threads, communities and users'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=list(SOURCES), help='Only rebuild one kind of document')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Objects per batch')
+        
+    def handle(self, *args, **options):
+        kinds = [options['kind']] if options['kind'] else list(SOURCES)
+        
+        for kind in kinds:
+            started = time.monotonic()
+            _model, queryset, build, _is_searchable = SOURCES[kind]
+            
+            with transaction.atomic():
+                SearchDocument.objects.filter(kind=kind).delete()
+                
+                total = 0
+                batch = []
+                for instance in queryset().iterator(chunk_size=options['batch_size']):
+                    batch.append(SearchDocument(kind=kind, object_id=object_key(kind, instance), **build(instance)))
+                    if len(batch) >= options['batch_size']:
+                        SearchDocument.objects.bulk_create(batch)
+                        total += len(batch)
+                        batch = []
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                
+            self.stdout.write(f'{kind}: indexed {total} documents in {time.monotonic() - started:.2f}s')
+            
+        backends.rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from search import backends
+
+
+def create_index(apps, schema_editor):
+    backends.create_index(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    backends.drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def populate(apps, schema_editor):
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    ThreadPost = apps.get_model('threads', 'ThreadPost')
+    CommunityGroup = apps.get_model('community', 'CommunityGroup')
+    UserProfile = apps.get_model('portal', 'UserProfile')
+
+    documents = [
+        SearchDocument(kind='thread', object_id=thread.pk, title=thread.title, body=thread.content)
+        for thread in ThreadPost.objects.iterator()
+    ]
+    documents += [
+        SearchDocument(kind='community', object_id=community.pk, title=community.name, body=community.description)
+        for community in CommunityGroup.objects.filter(is_active=True).iterator()
+    ]
+    documents += [
+        SearchDocument(kind='user', object_id=profile.pk, title=f'{profile.firstname} {profile.lastname}', body=profile.user.username)
+        for profile in UserProfile.objects.select_related('user').filter(user__is_superuser=False).iterator()
+    ]
+
+    SearchDocument.objects.bulk_create(documents, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_fulltext_index'),
+        ('threads', '0008_timelineentry'),
+        ('community', '0003_alter_communitygroup_image_alter_communitypost_image'),
+        ('portal', '0008_alter_userprofile_profile_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Exists, F, OuterRef, Subquery
+
+
+def key_users_by_user_id(apps, schema_editor):
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    UserProfile = apps.get_model('portal', 'UserProfile')
+    
+    users = SearchDocument.objects.filter(kind='user')
+    # through negative ids so no row collides with (kind, object_id) on the way
+    profiles = UserProfile.objects.filter(pk=OuterRef('object_id'))
+    users.exclude(Exists(profiles)).delete()
+    users.update(object_id=-Subquery(profiles.values('user_id')[:1]))
+    users.update(object_id=-F('object_id'))
+
+
+def key_users_by_profile_id(apps, schema_editor):
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    UserProfile = apps.get_model('portal', 'UserProfile')
+    
+    users = SearchDocument.objects.filter(kind='user')
+    profiles = UserProfile.objects.filter(user_id=OuterRef('object_id'))
+    users.exclude(Exists(profiles)).delete()
+    users.update(object_id=-Subquery(profiles.values('pk')[:1]))
+    users.update(object_id=-F('object_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_populate_documents'),
+        ('portal', '0012_userprofile_name_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(key_users_by_user_id, key_users_by_profile_id),
+    ]
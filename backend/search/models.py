@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    
+    '''
+    One searchable row per thread, community or user
+    
+    Kept in sync by search.signals. The full-text index itself lives in the
+    database: a generated tsvector column with a GIN index on PostgreSQL and
+    an FTS5 external-content table with triggers on SQLite (search.backends)
+    '''
+    
+    KIND_CHOICES = [
+        ('thread', 'Thread'),
+        ('community', 'Community'),
+        ('user', 'User'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # thread or community pk, the user id (not the profile's) for users
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        
+    def __str__(self):
+        return f'{self.kind} {self.object_id} - {self.title}'
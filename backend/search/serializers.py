@@ -0,0 +1,32 @@
+from rest_framework import serializers
+
+from .models import SearchDocument
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    
+    snippet = serializers.SerializerMethodField()
+    username = serializers.SerializerMethodField()
+    rank = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = SearchDocument
+        fields = [
+            'kind',
+            'object_id',
+            'title',
+            'username',
+            'snippet',
+            'rank'
+        ]
+        
+    def get_snippet(self, obj):
+        if len(obj.body) <= 200:
+            return obj.body
+        return obj.body[:200].rsplit(' ', 1)[0] + '...'
+    
+    def get_username(self, obj):
+        
+        '''user hits route on the username, which is the body of a user document'''
+        
+        return obj.body if obj.kind == 'user' else None
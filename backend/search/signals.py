@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from community.models import CommunityGroup
+from portal.models import UserProfile
+from threads.models import ThreadPost
+
+from .documents import index_object, remove_object
+
+
+@receiver(post_save, sender=ThreadPost)
+def index_thread(sender, instance, **kwargs):
+    index_object('thread', instance)
+
+
+@receiver(post_delete, sender=ThreadPost)
+def unindex_thread(sender, instance, **kwargs):
+    remove_object('thread', instance.pk)
+
+
+@receiver(post_save, sender=CommunityGroup)
+def index_community(sender, instance, **kwargs):
+    index_object('community', instance)
+
+
+@receiver(post_delete, sender=CommunityGroup)
+def unindex_community(sender, instance, **kwargs):
+    remove_object('community', instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+def index_user(sender, instance, **kwargs):
+    index_object('user', instance)
+
+
+@receiver(post_delete, sender=UserProfile)
+def unindex_user(sender, instance, **kwargs):
+    remove_object('user', instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def reindex_username(sender, instance, created, update_fields=None, **kwargs):
+    # username is part of the user document and lives on User,
+    # skip saves that cannot change it (e.g. last_login on sign in)
+    if created or (update_fields and 'username' not in update_fields):
+        return
+    if hasattr(instance, 'profile'):
+        index_object('user', instance.profile)
@@ -0,0 +1,159 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from community.models import CommunityGroup
+from portal.models import UserProfile
+from threads.models import ThreadPost
+
+from .backends import search
+from .models import SearchDocument
+
+
+def make_user(username, firstname='Student', lastname='Tester'):
+    user = User.objects.create_user(username, f'{username}@ssct.edu.ph')
+    UserProfile.objects.create(
+        user=user,
+        firstname=firstname,
+        lastname=lastname,
+        birth_date=datetime.date(2000, 1, 1),
+        gender='male',
+        role='student',
+        department='ccis',
+        course='bscs'
+    )
+    return user
+
+
+def make_thread(author, title, content='Content long enough for a thread.'):
+    return ThreadPost.objects.create(author=author, title=title, content=content)
+
+
+class IndexSyncTests(TestCase):
+
+    def setUp(self):
+        self.author = make_user('author')
+
+    def document(self, kind, object_id):
+        return SearchDocument.objects.filter(kind=kind, object_id=object_id).first()
+
+    def test_thread_is_indexed_updated_and_removed(self):
+        thread = make_thread(self.author, 'Thesis defense schedule')
+        self.assertEqual(self.document('thread', thread.pk).title, 'Thesis defense schedule')
+
+        thread.title = 'Moved thesis defense'
+        thread.save()
+        self.assertEqual(self.document('thread', thread.pk).title, 'Moved thesis defense')
+
+        thread_id = thread.pk
+        thread.delete()
+        self.assertIsNone(self.document('thread', thread_id))
+
+    def test_inactive_community_leaves_the_index(self):
+        community = CommunityGroup.objects.create(name='Robotics Club', description='Robots', created_by=self.author)
+        self.assertIsNotNone(self.document('community', community.pk))
+
+        community.is_active = False
+        community.save()
+        self.assertIsNone(self.document('community', community.pk))
+
+    def test_users_are_keyed_by_user_id_and_follow_renames(self):
+        document = self.document('user', self.author.pk)
+        self.assertEqual((document.title, document.body), ('Student Tester', 'author'))
+
+        self.author.username = 'renamed'
+        self.author.save()
+        self.assertEqual(self.document('user', self.author.pk).body, 'renamed')
+
+        self.author.profile.delete()
+        self.assertIsNone(self.document('user', self.author.pk))
+
+    def test_superusers_are_not_indexed(self):
+        admin = User.objects.create_superuser('admin', 'admin@ssct.edu.ph')
+        UserProfile.objects.create(
+            user=admin,
+            firstname='Site',
+            lastname='Admin',
+            birth_date=datetime.date(2000, 1, 1),
+            gender='male',
+            role='faculty',
+            department='ccis',
+            course='bscs'
+        )
+        self.assertIsNone(self.document('user', admin.pk))
+
+
+class RankingTests(TestCase):
+
+    def setUp(self):
+        author = make_user('author')
+        self.in_title = make_thread(author, 'Library hours during finals')
+        self.in_body = make_thread(author, 'Campus announcement', 'The library closes early this week for inventory.')
+        self.other = make_thread(author, 'Intramurals schedule', 'Basketball and volleyball games.')
+
+    def ids(self, query, kind=None):
+        return [document.object_id for document in search(query, kind)]
+
+    def test_title_matches_rank_above_body_matches(self):
+        self.assertEqual(self.ids('library', 'thread'), [self.in_title.pk, self.in_body.pk])
+
+    def test_words_match_as_prefixes_and_all_must_match(self):
+        self.assertEqual(self.ids('libr fin', 'thread'), [self.in_title.pk])
+        self.assertEqual(self.ids('library volleyball', 'thread'), [])
+
+    def test_query_without_words_matches_nothing(self):
+        self.assertEqual(self.ids('?!'), [])
+
+
+class SearchViewTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user('viewer', 'Maria', 'Santos')
+        for i in range(25):
+            make_thread(self.user, f'Scholarship notice {i}')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_walk_every_result_once(self):
+        seen = []
+        url = '/api/v1/search/?q=scholarship&type=thread'
+        while url:
+            data = self.client.get(url).json()
+            seen += [result['object_id'] for result in data['results']]
+            url = data['next']
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_second_page_links_back(self):
+        data = self.client.get('/api/v1/search/?q=scholarship&page=2').json()
+
+        self.assertEqual((data['page'], len(data['results'])), (2, 5))
+        self.assertIsNone(data['next'])
+        self.assertIn('page=1', data['previous'])
+
+    def test_invalid_page_falls_back_to_the_first(self):
+        data = self.client.get('/api/v1/search/?q=scholarship&page=abc').json()
+        self.assertEqual(data['page'], 1)
+        self.assertIsNone(data['previous'])
+
+    def test_user_hits_carry_the_user_id_and_username(self):
+        data = self.client.get('/api/v1/search/?q=maria&type=user').json()
+
+        self.assertEqual(len(data['results']), 1)
+        self.assertEqual(data['results'][0]['object_id'], self.user.pk)
+        self.assertEqual(data['results'][0]['username'], 'viewer')
+
+    def test_missing_query_is_rejected(self):
+        response = self.client.get('/api/v1/search/?q=%20')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'q is required'})
+
+    def test_invalid_type_is_rejected(self):
+        response = self.client.get('/api/v1/search/?q=scholarship&type=group')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid type'})
@@ -0,0 +1,60 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.utils.urls import replace_query_param
+
+from .backends import search
+from .models import SearchDocument
+from .serializers import SearchResultSerializer
+
+
+class SearchView(APIView):
+    
+    '''
+    API endpoint for ranked full-text search over threads, communities and users
+    
+    ?q=<words>&type=thread|community|user&page=<n>
+    '''
+    
+    permission_classes = [IsAuthenticated]
+    page_size = 20
+    max_page = 50
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type') or None
+        
+        if not query:
+            return Response({
+                'error': 'q is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+            
+        if kind and kind not in dict(SearchDocument.KIND_CHOICES):
+            return Response({
+                'error': 'Invalid type'
+            }, status=status.HTTP_400_BAD_REQUEST)
+            
+        try:
+            page = min(max(int(request.query_params.get('page', 1)), 1), self.max_page)
+        except ValueError:
+            page = 1
+            
+        # ranked results cannot be keyset paginated cheaply, so pages are
+        # offsets capped at max_page and no total COUNT is computed
+        offset = (page - 1) * self.page_size
+        documents = list(search(query, kind)[offset:offset + self.page_size + 1])
+        has_next = len(documents) > self.page_size and page < self.max_page
+        
+        serializer = SearchResultSerializer(documents[:self.page_size], many=True)
+        
+        return Response({
+            'query': query,
+            'page': page,
+            'next': self.page_link(request, page + 1) if has_next else None,
+            'previous': self.page_link(request, page - 1) if page > 1 else None,
+            'results': serializer.data
+        }, status=status.HTTP_200_OK)
+        
+    def page_link(self, request, page):
+        return replace_query_param(request.build_absolute_uri(), 'page', page)
@@ -0,0 +1,30 @@
+from django.db import connections, router
+from django.db.models.constants import OnConflict
+from django.db.models.sql import InsertQuery
+
+
+def insert_ignore(model, **values):
+
+    '''
+    Insert one row unless it collides with a unique constraint, as a single
+    INSERT ... ON CONFLICT DO NOTHING (INSERT OR IGNORE on SQLite)
+
+    Returns True when the row was inserted, so the caller knows whether a
+    denormalized counter has to move. Unlike exists() then create() there
+    is no window for a concurrent request to insert the same row.
+    '''
+
+    using = router.db_for_write(model)
+    opts = model._meta
+    instance = model(**values)
+    fields = [field for field in opts.concrete_fields if field is not opts.auto_field]
+
+    query = InsertQuery(model, on_conflict=OnConflict.IGNORE)
+    query.insert_values(fields, [instance])
+
+    inserted = 0
+    with connections[using].cursor() as cursor:
+        for sql, params in query.get_compiler(using=using).as_sql():
+            cursor.execute(sql, params)
+            inserted += cursor.rowcount
+    return inserted > 0
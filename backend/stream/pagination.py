@@ -0,0 +1,161 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination:
+
+    '''
+    Keyset (cursor) pagination over a fixed ordering
+
+    The ordering must be made of non-null fields and end with a unique one
+    (usually the primary key), e.g. ('-created_at', '-id'). Pages are read
+    with a WHERE on the last seen key instead of an OFFSET, so every page
+    costs the same no matter how deep the client scrolls.
+    '''
+
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering, page_size=None):
+        self.ordering = tuple(ordering)
+        if page_size:
+            self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request):
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request)
+        self.position, self.reverse = position, reverse
+        self.has_cursor = position is not None
+
+        ordering = self.reversed_ordering() if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+
+        if position is not None:
+            queryset = queryset.filter(self.build_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = self.has_cursor
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.has_cursor
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data, **extra):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+            **extra
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if size <= 0:
+            return self.page_size
+
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_link(self.page[0], reverse=True)
+
+    # -- CURSOR ENCODING --
+
+    def encode_link(self, instance, reverse):
+        position = [self.get_value(instance, name) for name in self.field_names()]
+        payload = json.dumps({'p': position, 'r': reverse}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            raw_position = payload['p']
+            reverse = bool(payload.get('r', False))
+
+            names = self.field_names()
+            if len(raw_position) != len(names):
+                raise ValueError
+
+            position = [
+                self.get_field(name).to_python(value)
+                for name, value in zip(names, raw_position)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    # -- ORDERING HELPERS --
+
+    def field_names(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    def reversed_ordering(self):
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+    def get_field(self, name):
+        model = self.model
+        parts = name.split('__')
+        for part in parts[:-1]:
+            model = model._meta.get_field(part).related_model
+        return model._meta.get_field(parts[-1])
+
+    def get_value(self, instance, name):
+        value = instance
+        for part in name.split('__'):
+            value = getattr(value, part)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+    def build_filter(self, ordering, position):
+
+        '''(a, b, c) after (x, y, z)  ->  a>x OR (a=x AND b>y) OR (a=x AND b=y AND c>z)'''
+
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
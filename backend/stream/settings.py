@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'rest_framework',
     'cloudinary',
@@ -57,6 +58,8 @@ INSTALLED_APPS = [
     'threads',
     'community',
     'notifications',
+    'search',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -177,6 +180,115 @@ SIMPLE_JWT = {
 }
 
 
+# -- FOLLOWING TIMELINE --
+
+# authors with more followers than this are not fanned out on write,
+# their threads are merged into followers' timelines at read time
+TIMELINE_FANOUT_MAX_FOLLOWERS = int(os.environ.get('TIMELINE_FANOUT_MAX_FOLLOWERS', 1000))
+
+# recent threads copied into a timeline when a user follows someone
+TIMELINE_BACKFILL_THREADS = 50
+
+
+# -- LIKE BUFFER --
+
+# write-behind likes for viral threads: like/unlike requests only append an
+# intent, `manage.py flush_likes` applies them in batches (inline after
+# commit when JOBS_RUN_INLINE)
+THREAD_LIKE_BUFFER = os.environ.get('THREAD_LIKE_BUFFER', 'False') == 'True'
+
+THREAD_LIKE_FLUSH_BATCH = 5000       # intents applied per flush transaction
+THREAD_LIKE_FLUSH_INTERVAL = 1       # seconds an idle flusher waits before polling again
+
+
+# -- COUNTER SHARDS --
+
+# spread like/comment counter writes over this many rows per thread instead
+# of the ThreadPost row itself, 0 writes the row directly. Run
+# `manage.py fold_counter_shards` to fold the shards back into the columns
+# the feed reads
+THREAD_COUNTER_SHARDS = int(os.environ.get('THREAD_COUNTER_SHARDS', 0))
+
+THREAD_COUNTER_FOLD_BATCH = 1000     # shard rows folded per transaction
+THREAD_COUNTER_FOLD_INTERVAL = 5     # seconds between folds
+
+
+# -- VIEW COUNTS --
+
+# thread detail views are counted in memory per worker and written every
+# THREAD_VIEW_FLUSH_INTERVAL seconds (and on shutdown) as one UPDATE
+THREAD_VIEW_COUNTING = os.environ.get('THREAD_VIEW_COUNTING', 'True') == 'True'
+THREAD_VIEW_FLUSH_INTERVAL = 5
+THREAD_VIEW_FLUSH_BATCH = 500        # threads per UPDATE statement
+
+# a viewer counts once per thread within this many seconds (up to twice
+# that), remembered in a rotating bloom filter of this many bits per half
+THREAD_VIEW_DEDUP_WINDOW = 30 * 60
+THREAD_VIEW_DEDUP_BITS = 1 << 20     # 128 KiB, ~1% false positives at 100k viewers
+THREAD_VIEW_DEDUP_HASHES = 7
+
+# proxies in front of the app that append to X-Forwarded-For (Render's
+# load balancer), anonymous viewers are keyed by the address the outermost
+# one saw, 0 uses REMOTE_ADDR
+THREAD_VIEW_TRUSTED_PROXIES = int(os.environ.get('THREAD_VIEW_TRUSTED_PROXIES', 1))
+
+
+# -- REALTIME NOTIFICATIONS --
+
+# dotted path of the cross-worker broker backend, unset picks
+# PostgresBackend (LISTEN/NOTIFY) on PostgreSQL and LocalBackend otherwise
+NOTIFICATION_BROKER_BACKEND = os.environ.get('NOTIFICATION_BROKER_BACKEND')
+
+# seconds between keep-alive comments on idle notification streams
+NOTIFICATION_STREAM_KEEPALIVE = 15
+
+# lifetime of the single-use ticket a client trades its JWT for before
+# opening the stream, so access tokens never appear in URLs
+NOTIFICATION_STREAM_TICKET_SECONDS = 30
+
+# likes/comments on the same thread within this many seconds of the last
+# one are merged into a single notification ("Ana and 41 others ...")
+NOTIFICATION_GROUP_WINDOW = 6 * 60 * 60
+
+# seconds a worker caches the newest broadcast's time, badges only count
+# broadcasts when one is newer than the user's watermark
+NOTIFICATION_BROADCAST_CACHE_SECONDS = 30
+
+# actors kept on a coalesced notification for display
+NOTIFICATION_SAMPLE_ACTORS = 3
+
+# retention, applied by `manage.py purge_notifications`: read notifications
+# older than this many days go, and every user keeps at most the newest N
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_RETENTION_MAX_PER_USER = int(os.environ.get('NOTIFICATION_RETENTION_MAX_PER_USER', 1000))
+
+# rows per delete statement when purging or deleting a thread's notifications
+NOTIFICATION_PURGE_BATCH = 1000
+
+
+# -- BACKGROUND JOBS --
+
+# run jobs right after the enqueueing transaction commits instead of
+# waiting for `manage.py run_worker` (local development)
+JOBS_RUN_INLINE = os.environ.get('JOBS_RUN_INLINE', 'False') == 'True'
+
+JOBS_POLL_INTERVAL = 1       # seconds an idle worker waits before polling again
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 10      # seconds, doubled after every failed attempt
+JOBS_HEARTBEAT_INTERVAL = 30   # seconds between heartbeats of a running job
+JOBS_VISIBILITY_TIMEOUT = 300  # a running job without a heartbeat for this long is reclaimed
+
+# finished jobs are deleted by the worker after this many days, failed ones
+# are kept longer so their last_error can still be read
+JOBS_RETENTION_DONE_DAYS = int(os.environ.get('JOBS_RETENTION_DONE_DAYS', 7))
+JOBS_RETENTION_FAILED_DAYS = int(os.environ.get('JOBS_RETENTION_FAILED_DAYS', 30))
+JOBS_PURGE_INTERVAL = 3600     # seconds between a worker's purges
+JOBS_PURGE_BATCH = 1000
+
+# followers notified per new-post fan-out job
+NEW_POST_FANOUT_CHUNK = 500
+
+
 # -- CORS CONFIGURATION --
 
 CORS_ALLOWED_ORIGINS = [
@@ -190,12 +302,27 @@ CORS_ALLOW_CREDENTIALS = True
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 
 EMAIL_HOST = os.environ.get('EMAIL_HOST')
-EMAIL_PORT = int(os.environ.get('EMAIL_PORT'))
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS') == 'True'
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL')
 
+# outbox drained by `manage.py send_emails` (inline after commit when JOBS_RUN_INLINE)
+EMAIL_OUTBOX_BATCH = 50             # messages claimed per round on the open connection
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BACKOFF = 30     # seconds, doubled after every failed attempt
+EMAIL_OUTBOX_POLL_INTERVAL = 1
+EMAIL_OUTBOX_IDLE_DISCONNECT = 60   # close the SMTP connection after this long idle
+EMAIL_OUTBOX_VISIBILITY_TIMEOUT = 300
+
+# delivered rows lose their body right away and are deleted by the outbox
+# worker after this long, failed ones are kept a little longer to debug
+EMAIL_OUTBOX_RETENTION_HOURS = int(os.environ.get('EMAIL_OUTBOX_RETENTION_HOURS', 24))
+EMAIL_OUTBOX_FAILED_RETENTION_DAYS = int(os.environ.get('EMAIL_OUTBOX_FAILED_RETENTION_DAYS', 7))
+EMAIL_OUTBOX_PURGE_INTERVAL = 3600
+EMAIL_OUTBOX_PURGE_BATCH = 1000
+
 
 # --- MEDIA FILES CONFIGURATION ---
 MEDIA_URL = '/media/'
@@ -25,6 +25,7 @@ urlpatterns = [
     path('api/v1/threads/', include('threads.urls')),
     path('api/v1/community/', include('community.urls')),
     path('api/v1/notifications/', include('notifications.urls')),
+    path('api/v1/search/', include('search.urls')),
 ]
 
 if settings.DEBUG:
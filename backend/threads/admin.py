@@ -3,14 +3,17 @@ from .models import ThreadPost
 
 @admin.register(ThreadPost)
 class ThreadPostAdmin(admin.ModelAdmin):
-    list_display = ['title', 'author' , 'created_at', 'updated_at']
+    list_display = ['title', 'author' , 'like_count', 'comment_count', 'created_at', 'updated_at']
     search_fields = ['title', 'author__username']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'like_count', 'comment_count']
     
     fieldsets = (
         ('Thread Post', {
             'fields': ('title', 'content', 'image', 'thread_type')
         }),
+        ('Counters', {
+            'fields': ('like_count', 'comment_count')
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
         }),
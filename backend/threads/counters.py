@@ -0,0 +1,156 @@
+import random
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from stream.db import insert_ignore
+
+from .models import ThreadCounterShard, ThreadPost
+
+
+def increment(thread_id, field, delta=1):
+    
+    '''
+    Atomically add delta to a denormalized ThreadPost counter
+    Call inside the transaction that writes the like/comment row
+    
+    With THREAD_COUNTER_SHARDS the delta goes to a random shard row
+    instead, so concurrent writers rarely wait on each other
+    '''
+    
+    if settings.THREAD_COUNTER_SHARDS:
+        return increment_shard(thread_id, field, delta)
+    
+    threads = ThreadPost.objects.filter(pk=thread_id)
+    if delta < 0:
+        # never go below zero if the counter drifted, reconcile fixes it
+        threads = threads.filter(**{f'{field}__gte': -delta})
+    threads.update(**{field: F(field) + delta})
+
+
+def increment_and_read(thread_id, field, delta=1):
+    
+    '''
+    increment() that hands back the new value from the same statement
+    (UPDATE ... RETURNING, PostgreSQL and SQLite 3.35+), so a like can
+    answer with its count without reading the thread again. Elsewhere
+    (MySQL/MariaDB, older SQLite) it increments and re-reads in one
+    transaction, the row lock keeps the two consistent.
+    '''
+    
+    if settings.THREAD_COUNTER_SHARDS:
+        increment_shard(thread_id, field, delta)
+        return read(thread_id, field)
+    
+    if not can_update_returning():
+        with transaction.atomic():
+            increment(thread_id, field, delta)
+            return read(thread_id, field)
+    
+    qn = connection.ops.quote_name
+    table = qn(ThreadPost._meta.db_table)
+    column = qn(ThreadPost._meta.get_field(field).column)
+    
+    sql = f'UPDATE {table} SET {column} = {column} + %s WHERE {qn("id")} = %s'
+    params = [delta, thread_id]
+    if delta < 0:
+        sql += f' AND {column} >= %s'
+        params.append(-delta)
+    
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} RETURNING {column}', params)
+        row = cursor.fetchone()
+    
+    # nothing updated: the counter had drifted to zero
+    return row[0] if row else read(thread_id, field)
+
+
+def can_update_returning():
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    # MariaDB only returns from INSERT/DELETE, MySQL not at all
+    return False
+
+
+def read(thread_id, field):
+    
+    '''Current value of a ThreadPost counter, unfolded shards included'''
+    
+    value = with_value(ThreadPost.objects.filter(pk=thread_id), field).values_list('value', flat=True).first()
+    return max(value or 0, 0)
+
+
+def with_value(threads, field):
+    
+    '''Annotate a ThreadPost queryset with a counter as `value`, unfolded shards included'''
+    
+    if settings.THREAD_COUNTER_SHARDS:
+        return threads.annotate(value=F(field) + Coalesce(Subquery(pending(field)), 0))
+    return threads.annotate(value=F(field))
+
+
+def increment_shard(thread_id, field, delta):
+    
+    '''Add delta to one randomly picked shard of a thread counter'''
+    
+    shard = random.randrange(settings.THREAD_COUNTER_SHARDS)
+    shards = ThreadCounterShard.objects.filter(thread_id=thread_id, field=field, shard=shard)
+    if shards.update(delta=F('delta') + delta):
+        return
+    
+    # first write to this shard, unless a concurrent writer just created it
+    if not insert_ignore(ThreadCounterShard, thread_id=thread_id, field=field, shard=shard, delta=delta):
+        shards.update(delta=F('delta') + delta)
+
+
+def pending(field):
+    
+    '''Subquery summing the unfolded shards of an outer ThreadPost counter'''
+    
+    return (
+        ThreadCounterShard.objects.filter(thread=OuterRef('pk'), field=field)
+        .order_by()
+        .values('thread')
+        .annotate(total=Sum('delta'))
+        .values('total')
+    )
+
+
+def fold(batch_size=None):
+    
+    '''
+    Move up to batch_size non-zero shard deltas into the ThreadPost
+    columns with one UPDATE per thread. Returns how many shards were folded.
+    '''
+    
+    batch_size = batch_size or settings.THREAD_COUNTER_FOLD_BATCH
+    
+    with transaction.atomic():
+        # a shard a writer holds right now is folded next time
+        shards = list(
+            ThreadCounterShard.objects.select_for_update(skip_locked=True)
+            .exclude(delta=0)
+            .order_by('thread_id', 'id')
+            .values_list('id', 'thread_id', 'field', 'delta')[:batch_size]
+        )
+        if not shards:
+            return 0
+        
+        totals = defaultdict(Counter)
+        for _id, thread_id, field, delta in shards:
+            totals[thread_id][field] += delta
+        
+        for thread_id, deltas in totals.items():
+            values = {field: Greatest(F(field) + delta, 0) for field, delta in deltas.items() if delta}
+            if values:
+                ThreadPost.objects.filter(pk=thread_id).update(**values)
+        
+        # keep the rows, the next write to a shard is then a plain UPDATE
+        ThreadCounterShard.objects.filter(pk__in=[shard[0] for shard in shards]).update(delta=0)
+    
+    return len(shards)
@@ -0,0 +1,146 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Greatest
+
+from .models import LikeIntent, ThreadLike, ThreadPost
+from . import counters
+
+from notifications.utils import create_like_notification, retract_like_notification
+
+
+def record(thread, user, liked):
+
+    '''
+    Append a like (liked=True) or unlike intent without touching the thread
+    row. Returns (is_liked, likes_count) the way the user will see them once
+    the intent is flushed.
+
+    The latest intent wins at flush, so the user's pending intents net out
+    to this one against their stored like. The counter and the stored like
+    are read in one statement, a flush in between cannot split them.
+    '''
+
+    likes = ThreadLike.objects.filter(thread=OuterRef('pk'), user=user)
+    count, stored = (
+        counters.with_value(ThreadPost.objects.filter(pk=thread.pk), 'like_count')
+        .annotate(stored=Exists(likes))
+        .values_list('value', 'stored')
+        .get()
+    )
+    LikeIntent.objects.create(thread=thread, user=user, liked=liked)
+
+    if settings.JOBS_RUN_INLINE:
+        transaction.on_commit(flush_all)
+
+    return liked, max(count + int(liked) - int(stored), 0)
+
+
+def is_liked(thread_id, user):
+
+    '''The user's like state on a thread, a pending intent wins'''
+
+    pending = (
+        LikeIntent.objects.filter(thread_id=thread_id, user=user)
+        .order_by('-id')
+        .values_list('liked', flat=True)
+        .first()
+    )
+    if pending is not None:
+        return pending
+    return ThreadLike.objects.filter(thread_id=thread_id, user=user).exists()
+
+
+def flush(batch_size=None):
+
+    '''
+    Apply up to batch_size pending intents in one transaction
+
+    The latest intent per (thread, user) wins. New likes go in with one
+    bulk insert, removed ones with one delete per thread, and every
+    touched thread gets a single counter update. Returns how many
+    intents were consumed.
+    '''
+
+    batch_size = batch_size or settings.THREAD_LIKE_FLUSH_BATCH
+
+    with transaction.atomic():
+        # a second flusher waits here instead of applying intents out of order
+        intents = list(
+            LikeIntent.objects.select_for_update()
+            .order_by('id')
+            .values_list('id', 'thread_id', 'user_id', 'liked')[:batch_size]
+        )
+        if not intents:
+            return 0
+
+        final = {}
+        for _id, thread_id, user_id, liked in intents:
+            final[(thread_id, user_id)] = liked
+
+        thread_ids = {thread_id for thread_id, _user_id in final}
+        user_ids = {user_id for _thread_id, user_id in final}
+        existing = set(
+            ThreadLike.objects.filter(thread_id__in=thread_ids, user_id__in=user_ids)
+            .values_list('thread_id', 'user_id')
+        )
+
+        added = [pair for pair, liked in final.items() if liked and pair not in existing]
+        removed = [pair for pair, liked in final.items() if not liked and pair in existing]
+
+        ThreadLike.objects.bulk_create(
+            [ThreadLike(thread_id=thread_id, user_id=user_id) for thread_id, user_id in added],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+
+        unliked = defaultdict(list)
+        for thread_id, user_id in removed:
+            unliked[thread_id].append(user_id)
+        for thread_id, user_ids_ in unliked.items():
+            ThreadLike.objects.filter(thread_id=thread_id, user_id__in=user_ids_).delete()
+
+        deltas = Counter(thread_id for thread_id, _user_id in added)
+        deltas.subtract(thread_id for thread_id, _user_id in removed)
+        for thread_id, delta in deltas.items():
+            if not delta:
+                continue
+            if delta > 0 or settings.THREAD_COUNTER_SHARDS:
+                counters.increment(thread_id, 'like_count', delta)
+            else:
+                # a batch can take more than a drifted counter holds, clamp
+                # instead of skipping the whole update like increment() does
+                ThreadPost.objects.filter(pk=thread_id).update(like_count=Greatest(F('like_count') + delta, 0))
+
+        notify(added, removed)
+        LikeIntent.objects.filter(pk__in=[intent[0] for intent in intents]).delete()
+
+    return len(intents)
+
+
+def notify(added, removed):
+
+    '''Like notifications for a flushed batch, coalesced per thread as usual'''
+
+    pairs = added + removed
+    if not pairs:
+        return
+
+    threads = ThreadPost.objects.select_related('author').in_bulk({thread_id for thread_id, _user_id in pairs})
+    users = User.objects.select_related('profile').in_bulk({user_id for _thread_id, user_id in pairs})
+
+    for thread_id, user_id in added:
+        create_like_notification(threads[thread_id], users[user_id])
+    for thread_id, user_id in removed:
+        retract_like_notification(threads[thread_id], users[user_id])
+
+
+def flush_all():
+
+    '''Flush until nothing is pending (JOBS_RUN_INLINE and tests)'''
+
+    while flush() == settings.THREAD_LIKE_FLUSH_BATCH:
+        pass
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from portal.models import UserFollow
+from threads.models import ThreadPost, TimelineEntry
+
+
+class Command(BaseCommand):
+    
+    help = 'Build following timelines from existing follows'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--per-author', type=int, default=settings.TIMELINE_BACKFILL_THREADS, help='Recent threads copied per followed author')
+        parser.add_argument('--batch-size', type=int, default=500, help='Follows per batch')
+        
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        recent_threads = {}
+        last_id = 0
+        follows_seen = inserted = 0
+        
+        while True:
+            follows = list(
+                UserFollow.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', 'follower_id', 'following_id')[:options['batch_size']]
+            )
+            if not follows:
+                break
+            last_id = follows[-1][0]
+            
+            entries = []
+            for _pk, follower_id, author_id in follows:
+                if author_id not in recent_threads:
+                    recent_threads[author_id] = list(
+                        ThreadPost.objects.filter(author_id=author_id, fanned_out=True)
+                        .values_list('id', 'created_at')[:options['per_author']]
+                    )
+                entries.extend(
+                    TimelineEntry(user_id=follower_id, thread_id=thread_id, thread_created_at=created_at)
+                    for thread_id, created_at in recent_threads[author_id]
+                )
+            
+            TimelineEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+            follows_seen += len(follows)
+            inserted += len(entries)
+            
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {follows_seen} follows, wrote {inserted} timeline entries in {time.monotonic() - started:.2f}s'
+        ))
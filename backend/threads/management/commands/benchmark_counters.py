@@ -0,0 +1,115 @@
+import datetime
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from jobs.models import Job
+from portal.models import UserProfile
+from threads import counters
+from threads.models import ThreadPost, ThreadLike
+from threads.views import ThreadLikeToggleView
+
+
+class Command(BaseCommand):
+    
+    help = 'Measure like latency on one hot thread through the like endpoint, single ThreadPost row vs sharded counters (synthetic rows are deleted afterwards)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Synthetic users liking the thread')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent request threads')
+        parser.add_argument('--shards', type=int, default=16, help='Shards per counter for the sharded run')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic rows')
+        
+    def handle(self, *args, **options):
+        author, users = self.seed(options['users'])
+        thread = ThreadPost.objects.create(
+            author=author,
+            title='Benchmark hot thread',
+            content='Synthetic thread for the counter lock benchmark.'
+        )
+        
+        try:
+            for shards in (0, options['shards']):
+                ThreadLike.objects.filter(thread=thread).delete()
+                ThreadPost.objects.filter(pk=thread.pk).update(like_count=0)
+                # jobs are only queued, as they would be for the worker
+                with override_settings(THREAD_COUNTER_SHARDS=shards, JOBS_RUN_INLINE=False):
+                    self.run(thread, users, shards, options['workers'])
+        finally:
+            Job.objects.filter(task='notifications.like_changed', payload__thread_id=thread.pk).delete()
+            if not options['keep']:
+                User.objects.filter(username__startswith='bench_counter_').delete()
+                self.stdout.write('Synthetic rows deleted')
+                
+    def seed(self, count):
+        users = User.objects.bulk_create([
+            User(username=f'bench_counter_{i}', email=f'bench_counter_{i}@ssct.edu.ph') for i in range(count + 1)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                firstname='Bench',
+                lastname=f'Liker {i}',
+                birth_date=datetime.date(2000, 1, 1),
+                gender='male',
+                role='student',
+                department='ccis',
+                course='bscs'
+            ) for i, user in enumerate(users)
+        ])
+        return users[0], users[1:]
+    
+    def run(self, thread, users, shards, workers):
+        view = ThreadLikeToggleView.as_view()
+        factory = APIRequestFactory()
+        path = f'/api/v1/threads/posts/{thread.pk}/like/'
+        latencies = []
+        errors = []
+        
+        def work(chunk):
+            try:
+                for user in chunk:
+                    request = factory.put(path)
+                    force_authenticate(request, user=user)
+                    started = time.perf_counter()
+                    try:
+                        response = view(request, pk=thread.pk)
+                        if response.status_code >= 400:
+                            errors.append(response.status_code)
+                    except Exception as exc:
+                        errors.append(type(exc).__name__)
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+                
+        chunks = [users[i::workers] for i in range(workers)]
+        pool = [threading.Thread(target=work, args=(chunk,)) for chunk in chunks]
+        
+        started = time.perf_counter()
+        for worker in pool:
+            worker.start()
+        for worker in pool:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        
+        total = counters.read(thread.pk, 'like_count')
+        if shards:
+            counters.fold()
+        
+        latencies.sort()
+        mean = statistics.mean(latencies) * 1000
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000
+        label = f'{shards} shards' if shards else 'single row'
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {len(latencies)} likes from {workers} workers in {elapsed:.2f}s '
+            f'({len(latencies) / elapsed:.0f} req/s), latency mean {mean:.2f}ms p95 {p95:.2f}ms, '
+            f'{len(errors)} errors, {ThreadLike.objects.filter(thread=thread).count()} likes stored, '
+            f'count {total} (after fold {counters.read(thread.pk, "like_count")})'
+        ))
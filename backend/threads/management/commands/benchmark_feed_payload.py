@@ -0,0 +1,99 @@
+import datetime
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from portal.loaders import LoadedProfileField
+from portal.models import UserProfile
+from portal.serializers import UserProfileDetailSerializer
+from threads.models import ThreadPost
+from threads.serializers import ThreadPostSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class DetailThreadPostSerializer(ThreadPostSerializer):
+
+    '''the feed as it was, embedding the full profile of every author'''
+
+    author_profile = LoadedProfileField(UserProfileDetailSerializer, source='author_id')
+
+
+class Command(BaseCommand):
+
+    help = 'Compare feed payload size and serialization time with full profiles vs author cards (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=50, help='Synthetic authors')
+        parser.add_argument('--rows', type=int, default=50, help='Threads per page')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per variant')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic rows')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                viewer, threads = self.seed(options['authors'], options['rows'])
+                rows = list(ThreadPost.objects.for_feed(viewer).filter(pk__in=[t.pk for t in threads]))
+                self.compare(viewer, rows, options['repeat'])
+
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write('Synthetic rows rolled back')
+
+    def seed(self, authors, rows):
+        users = User.objects.bulk_create([
+            User(username=f'bench_{i}', email=f'bench_{i}@ssct.edu.ph') for i in range(authors)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                firstname='Bench',
+                lastname=f'Author {i}',
+                birth_date=datetime.date(2000, 1, 1),
+                gender='male',
+                role='student',
+                department='ccis',
+                course='bscs'
+            ) for i, user in enumerate(users)
+        ])
+
+        threads = ThreadPost.objects.bulk_create([
+            ThreadPost(
+                author=users[i % authors],
+                title=f'Benchmark thread number {i}',
+                content='Synthetic thread content for the payload benchmark.'
+            ) for i in range(rows)
+        ])
+        return users[0], threads
+
+    def compare(self, viewer, rows, repeat):
+        results = {}
+        for label, serializer_class in (('full profile', DetailThreadPostSerializer), ('author card', ThreadPostSerializer)):
+            timings = []
+            for _ in range(repeat):
+                # a fresh request (and loader) per run, like a real page load
+                request = Request(APIRequestFactory().get('/'))
+                request.user = viewer
+
+                started = time.perf_counter()
+                data = serializer_class(rows, many=True, context={'request': request}).data
+                timings.append((time.perf_counter() - started) * 1000)
+
+            size = len(JSONRenderer().render(data))
+            results[label] = (size, statistics.median(timings))
+            self.stdout.write(f'{len(rows)} threads, {label}: {size} bytes, p50 {statistics.median(timings):.1f}ms')
+
+        (before_size, before_ms), (after_size, after_ms) = results.values()
+        self.stdout.write(self.style.SUCCESS(
+            f'Author cards: {100 * (1 - after_size / before_size):.0f}% smaller, '
+            f'{before_ms / after_ms:.1f}x faster to serialize'
+        ))
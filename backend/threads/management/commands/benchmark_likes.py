@@ -0,0 +1,100 @@
+import datetime
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from portal.models import UserProfile
+from threads.models import ThreadPost, ThreadLike
+from threads.views import ThreadLikeToggleView
+
+
+class Command(BaseCommand):
+
+    help = 'Measure like throughput on one hot thread, old toggling POST vs idempotent PUT (synthetic rows are deleted afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Synthetic users liking the thread')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent request threads')
+        parser.add_argument('--taps', type=int, default=2, help='Requests per user, 2 is a double tap')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic rows')
+
+    def handle(self, *args, **options):
+        author, users = self.seed(options['users'])
+        thread = ThreadPost.objects.create(
+            author=author,
+            title='Benchmark hot thread',
+            content='Synthetic thread for the like throughput benchmark.'
+        )
+
+        try:
+            for method in ('post', 'put'):
+                ThreadLike.objects.filter(thread=thread).delete()
+                ThreadPost.objects.filter(pk=thread.pk).update(like_count=0)
+                self.run(method, thread, users, options['workers'], options['taps'])
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith='bench_like_').delete()
+                self.stdout.write('Synthetic rows deleted')
+
+    def seed(self, count):
+        users = User.objects.bulk_create([
+            User(username=f'bench_like_{i}', email=f'bench_like_{i}@ssct.edu.ph') for i in range(count + 1)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                firstname='Bench',
+                lastname=f'Liker {i}',
+                birth_date=datetime.date(2000, 1, 1),
+                gender='male',
+                role='student',
+                department='ccis',
+                course='bscs'
+            ) for i, user in enumerate(users)
+        ])
+        return users[0], users[1:]
+
+    def run(self, method, thread, users, workers, taps):
+        view = ThreadLikeToggleView.as_view()
+        factory = APIRequestFactory()
+        path = f'/api/v1/threads/posts/{thread.pk}/like/'
+        errors = []
+
+        def work(chunk):
+            try:
+                for user in chunk:
+                    for _ in range(taps):
+                        request = getattr(factory, method)(path)
+                        force_authenticate(request, user=user)
+                        try:
+                            response = view(request, pk=thread.pk)
+                            if response.status_code >= 400:
+                                errors.append(response.status_code)
+                        except Exception as exc:
+                            errors.append(type(exc).__name__)
+            finally:
+                connections.close_all()
+
+        chunks = [users[i::workers] for i in range(workers)]
+        pool = [threading.Thread(target=work, args=(chunk,)) for chunk in chunks]
+
+        started = time.perf_counter()
+        for worker in pool:
+            worker.start()
+        for worker in pool:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        requests = len(users) * taps
+        rows = ThreadLike.objects.filter(thread=thread).count()
+        like_count = ThreadPost.objects.filter(pk=thread.pk).values_list('like_count', flat=True).get()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{method.upper()}: {requests} requests from {workers} workers in {elapsed:.2f}s '
+            f'({requests / elapsed:.0f} req/s), {len(errors)} errors, '
+            f'{rows} likes stored, like_count {like_count}'
+        ))
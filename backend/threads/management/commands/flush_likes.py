@@ -0,0 +1,42 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from threads import likebuffer
+
+
+class Command(BaseCommand):
+    
+    help = 'Apply buffered like/unlike intents in batches (THREAD_LIKE_BUFFER)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Intents applied per transaction')
+        parser.add_argument('--sleep', type=float, default=None, help='Seconds to wait when nothing is pending')
+        parser.add_argument('--burst', action='store_true', help='Exit once nothing is pending')
+        
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or settings.THREAD_LIKE_FLUSH_BATCH
+        sleep = options['sleep'] if options['sleep'] is not None else settings.THREAD_LIKE_FLUSH_INTERVAL
+        
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        
+        total = 0
+        while not self.stopping:
+            close_old_connections()
+            applied = likebuffer.flush(batch_size)
+            total += applied
+            
+            if applied < batch_size:
+                if options['burst']:
+                    break
+                time.sleep(sleep)
+            
+        self.stdout.write(self.style.SUCCESS(f'Like flusher stopped: {total} intents applied'))
+        
+    def stop(self, signum, frame):
+        self.stopping = True
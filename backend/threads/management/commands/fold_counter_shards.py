@@ -0,0 +1,42 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from threads import counters
+
+
+class Command(BaseCommand):
+    
+    help = 'Fold sharded like/comment counter deltas into the ThreadPost columns (THREAD_COUNTER_SHARDS)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Shard rows folded per transaction')
+        parser.add_argument('--sleep', type=float, default=None, help='Seconds to wait between folds')
+        parser.add_argument('--burst', action='store_true', help='Exit once every shard is folded')
+        
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or settings.THREAD_COUNTER_FOLD_BATCH
+        sleep = options['sleep'] if options['sleep'] is not None else settings.THREAD_COUNTER_FOLD_INTERVAL
+        
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        
+        total = 0
+        while not self.stopping:
+            close_old_connections()
+            folded = counters.fold(batch_size)
+            total += folded
+            
+            if folded < batch_size:
+                if options['burst']:
+                    break
+                time.sleep(sleep)
+            
+        self.stdout.write(self.style.SUCCESS(f'Counter folder stopped: {total} shards folded'))
+        
+    def stop(self, signum, frame):
+        self.stopping = True
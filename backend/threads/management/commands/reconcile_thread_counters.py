@@ -0,0 +1,99 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from threads.models import ThreadPost, ThreadLike, ThreadComment, ThreadCounterShard
+
+
+class Command(BaseCommand):
+    
+    help = 'Recompute ThreadPost.like_count and comment_count from the like/comment tables'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Threads per batch')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted threads')
+        
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        last_id = 0
+        checked = fixed = 0
+        
+        while True:
+            # walk the table by primary key so memory stays bounded
+            ids = list(
+                ThreadPost.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            
+            first_id, last_id = ids[0], ids[-1]
+            
+            with transaction.atomic():
+                # lock like fold_counter_shards does, shards before threads, so
+                # a fold cannot move a delta between our read and our write
+                shards = self.pending_by_thread(first_id, last_id)
+                batch = list(
+                    ThreadPost.objects.select_for_update()
+                    .filter(pk__gte=first_id, pk__lte=last_id)
+                    .order_by('pk')
+                    .values_list('pk', 'like_count', 'comment_count')
+                )
+                
+                likes = self.count_by_thread(ThreadLike, first_id, last_id)
+                comments = self.count_by_thread(ThreadComment, first_id, last_id)
+                
+                # unfolded shard deltas are part of the stored value
+                for (pk, field), delta in shards.items():
+                    counts = likes if field == 'like_count' else comments
+                    counts[pk] = counts.get(pk, 0) - delta
+                
+                drifted = [
+                    ThreadPost(pk=pk, like_count=likes.get(pk, 0), comment_count=comments.get(pk, 0))
+                    for pk, like_count, comment_count in batch
+                    if like_count != likes.get(pk, 0) or comment_count != comments.get(pk, 0)
+                ]
+                
+                if drifted and not options['dry_run']:
+                    ThreadPost.objects.bulk_update(drifted, ['like_count', 'comment_count'])
+            
+            checked += len(batch)
+            fixed += len(drifted)
+            
+            if options['sleep']:
+                time.sleep(options['sleep'])
+                
+        action = 'would fix' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} threads, {action} {fixed} in {time.monotonic() - started:.2f}s'
+        ))
+        
+    def count_by_thread(self, model, first_id, last_id):
+        rows = (
+            model.objects.filter(thread_id__gte=first_id, thread_id__lte=last_id)
+            .order_by()
+            .values('thread_id')
+            .annotate(total=Count('pk'))
+            .values_list('thread_id', 'total')
+        )
+        return dict(rows)
+    
+    def pending_by_thread(self, first_id, last_id):
+        # FOR UPDATE cannot be combined with GROUP BY, so sum in Python
+        rows = (
+            ThreadCounterShard.objects.select_for_update()
+            .filter(thread_id__gte=first_id, thread_id__lte=last_id)
+            .exclude(delta=0)
+            .order_by('thread_id', 'id')
+            .values_list('thread_id', 'field', 'delta')
+        )
+        pending = Counter()
+        for thread_id, field, delta in rows:
+            pending[(thread_id, field)] += delta
+        return pending
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threads', '0005_alter_threadpost_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='threadpost',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='threadpost',
+            index=models.Index(fields=['-created_at', '-id'], name='thread_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    ThreadPost = apps.get_model('threads', 'ThreadPost')
+    ThreadLike = apps.get_model('threads', 'ThreadLike')
+    ThreadComment = apps.get_model('threads', 'ThreadComment')
+
+    def count_of(model):
+        counted = model.objects.filter(thread=OuterRef('pk')).order_by().values('thread').annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(counted), 0)
+
+    ThreadPost.objects.update(like_count=count_of(ThreadLike), comment_count=count_of(ThreadComment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threads', '0006_threadpost_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='threadpost',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='threadpost',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
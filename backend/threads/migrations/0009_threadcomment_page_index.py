@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threads', '0008_timelineentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='threadcomment',
+            options={'ordering': ['created_at', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='threadcomment',
+            index=models.Index(fields=['thread', 'created_at', 'id'], name='thread_comment_page_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threads', '0009_threadcomment_page_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LikeIntent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('liked', models.BooleanField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='like_intents', to='threads.threadpost')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='like_intents', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['thread', 'user', '-id'], name='like_intent_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threads', '0010_like_intent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThreadCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('like_count', 'Likes'), ('comment_count', 'Comments')], max_length=20)),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('delta', models.IntegerField(default=0)),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='threads.threadpost')),
+            ],
+            options={
+                'unique_together': {('thread', 'field', 'shard')},
+            },
+        ),
+    ]
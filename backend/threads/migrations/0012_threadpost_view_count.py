@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threads', '0011_counter_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='threadpost',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_fanout_mode(apps, schema_editor):
+    # existing threads were pushed or pulled by their author's current count
+    ThreadPost = apps.get_model('threads', 'ThreadPost')
+    ThreadPost.objects.filter(
+        author__profile__followers_count__gt=settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    ).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0010_userprofile_follow_counts'),
+        ('threads', '0012_threadpost_view_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='threadpost',
+            name='fanned_out',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(record_fanout_mode, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_thread_created_at(apps, schema_editor):
+    TimelineEntry = apps.get_model('threads', 'TimelineEntry')
+    ThreadPost = apps.get_model('threads', 'ThreadPost')
+    created_at = ThreadPost.objects.filter(pk=OuterRef('thread_id')).values('created_at')[:1]
+    TimelineEntry.objects.update(thread_created_at=Subquery(created_at))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threads', '0013_threadpost_fanned_out'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineentry',
+            name='thread_created_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(copy_thread_created_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='timelineentry',
+            name='thread_created_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='threadpost',
+            index=models.Index(condition=models.Q(('fanned_out', False)), fields=['author', '-created_at', '-id'], name='thread_pulled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-thread_created_at', '-thread'], name='timeline_page_idx'),
+        ),
+    ]
@@ -1,8 +1,43 @@
 from django.db import models
+from django.db.models import BooleanField, Case, Exists, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
 
 from django.contrib.auth.models import User
 from django.conf import settings
 
+class ThreadPostQuerySet(models.QuerySet):
+    
+    def for_feed(self, user):
+        
+        '''
+        Annotate is_liked for the viewer, so a page of threads costs the same
+        number of queries at any size (the counts are denormalized columns
+        and authors are batched by portal.loaders.UserLoader)
+        
+        With THREAD_LIKE_BUFFER the viewer's unflushed intent wins and
+        like_delta carries its effect on the stored like_count
+        '''
+        
+        if user is not None and user.is_authenticated:
+            likes = ThreadLike.objects.filter(thread=OuterRef('pk'), user=user)
+            if not settings.THREAD_LIKE_BUFFER:
+                return self.annotate(is_liked=Exists(likes))
+            
+            pending = LikeIntent.objects.filter(thread=OuterRef('pk'), user=user).order_by('-id').values('liked')[:1]
+            return self.annotate(
+                stored_like=Exists(likes),
+                pending_like=Subquery(pending, output_field=BooleanField())
+            ).annotate(
+                is_liked=Coalesce('pending_like', 'stored_like', output_field=BooleanField()),
+                like_delta=Case(
+                    When(pending_like=True, stored_like=False, then=Value(1)),
+                    When(pending_like=False, stored_like=True, then=Value(-1)),
+                    default=Value(0)
+                )
+            )
+        return self.annotate(is_liked=Value(False))
+
+
 class ThreadPost(models.Model):
     
     THREAD_TYPES = [
@@ -22,11 +57,31 @@ class ThreadPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # denormalized counters, see threads.counters and reconcile_thread_counters
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # buffered per worker, see threads.viewcounts
+    view_count = models.PositiveIntegerField(default=0)
+    # pushed into followers' timelines when posted, else pulled on read, see threads.timeline
+    fanned_out = models.BooleanField(default=True)
+    
+    objects = ThreadPostQuerySet.as_manager()
+    
     def __str__(self):
         return f'{self.title} - {self.author.username}'
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # keyset pagination of the feed walks (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='thread_feed_idx'),
+            # pull-mode threads of followed authors, merged into timelines
+            models.Index(
+                fields=['author', '-created_at', '-id'],
+                name='thread_pulled_idx',
+                condition=models.Q(fanned_out=False)
+            ),
+        ]
         
 class ThreadComment(models.Model):
     thread = models.ForeignKey('ThreadPost', on_delete=models.CASCADE, related_name='comments')
@@ -35,7 +90,11 @@ class ThreadComment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['created_at']
+        ordering = ['created_at', 'id']
+        indexes = [
+            # comment pages walk (created_at, id) within one thread
+            models.Index(fields=['thread', 'created_at', 'id'], name='thread_comment_page_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.author.username} on {self.thread.id}'
@@ -49,4 +108,75 @@ class ThreadLike(models.Model):
         unique_together = ('thread', 'user')
 
     def __str__(self):
-        return f'Like by {self.user.username} on {self.thread.id}'
\ No newline at end of file
+        return f'Like by {self.user.username} on {self.thread.id}'
+        
+class LikeIntent(models.Model):
+    
+    '''
+    Append-only like/unlike request waiting to be applied to ThreadLike and
+    like_count by threads.likebuffer.flush() (THREAD_LIKE_BUFFER mode)
+    '''
+    
+    thread = models.ForeignKey('ThreadPost', on_delete=models.CASCADE, related_name='like_intents')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='like_intents')
+    liked = models.BooleanField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            # the viewer's latest pending intent on a thread
+            models.Index(fields=['thread', 'user', '-id'], name='like_intent_pending_idx'),
+        ]
+        
+    def __str__(self):
+        return f'{"Like" if self.liked else "Unlike"} by {self.user_id} on {self.thread_id}'
+        
+class ThreadCounterShard(models.Model):
+    
+    '''
+    Pending delta of one ThreadPost counter, spread over
+    THREAD_COUNTER_SHARDS rows per thread so concurrent writers do not
+    queue on the thread row. fold_counter_shards moves the deltas into
+    the ThreadPost columns.
+    '''
+    
+    COUNTERS = [
+        ('like_count', 'Likes'),
+        ('comment_count', 'Comments')
+    ]
+    
+    thread = models.ForeignKey('ThreadPost', on_delete=models.CASCADE, related_name='counter_shards')
+    field = models.CharField(max_length=20, choices=COUNTERS)
+    shard = models.PositiveSmallIntegerField()
+    delta = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('thread', 'field', 'shard')
+        
+    def __str__(self):
+        return f'{self.field} shard {self.shard} of {self.thread_id}: {self.delta:+d}'
+        
+class TimelineEntry(models.Model):
+    
+    '''
+    Materialized "following" feed row, written when an author the user
+    follows posts a thread (fan-out-on-write, see threads.timeline)
+    '''
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    thread = models.ForeignKey('ThreadPost', on_delete=models.CASCADE, related_name='timeline_entries')
+    # copy of the thread's created_at, a page is read from the index alone
+    thread_created_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('user', 'thread')
+        indexes = [
+            # the user's timeline in feed order (thread created_at, thread id)
+            models.Index(fields=['user', '-thread_created_at', '-thread'], name='timeline_page_idx'),
+        ]
+        verbose_name = 'Timeline Entry'
+        verbose_name_plural = 'Timeline Entries'
+        
+    def __str__(self):
+        return f'Thread {self.thread_id} in timeline of {self.user_id}'
@@ -0,0 +1,67 @@
+from stream.pagination import KeysetPagination
+
+from .models import ThreadPost, TimelineEntry
+from .timeline import pulled_threads
+
+
+class TimelinePagination(KeysetPagination):
+
+    '''
+    Keyset pagination over a user's following timeline, newest first
+
+    Pushed threads are paged through the user's own TimelineEntry rows
+    (user, thread_created_at, thread), pull-mode threads of followed
+    authors are read as a second query, each capped at page_size + 1 and
+    merged on (created_at, id). A page never depends on the size of the
+    whole thread table.
+    '''
+
+    ENTRY_FIELDS = {'created_at': 'thread_created_at', 'id': 'thread_id'}
+
+    def __init__(self, page_size=None):
+        super().__init__(ordering=ThreadPost._meta.ordering, page_size=page_size)
+
+    def paginate_timeline(self, user, request):
+        self.request = request
+        self.model = ThreadPost
+        self.page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request)
+        self.position, self.reverse = position, reverse
+        self.has_cursor = position is not None
+
+        ordering = self.reversed_ordering() if reverse else self.ordering
+        entry_ordering = tuple(self.entry_field(name) for name in ordering)
+
+        entries = TimelineEntry.objects.filter(user=user)
+        pulled = pulled_threads(user)
+        if position is not None:
+            entries = entries.filter(self.build_filter(entry_ordering, position))
+            pulled = pulled.filter(self.build_filter(ordering, position))
+
+        keys = [
+            *entries.order_by(*entry_ordering).values_list('thread_created_at', 'thread_id')[:self.page_size + 1],
+            *pulled.order_by(*ordering).values_list('created_at', 'id')[:self.page_size + 1],
+        ]
+        keys.sort(reverse=not reverse)
+        has_more = len(keys) > self.page_size
+        keys = keys[:self.page_size]
+
+        threads = ThreadPost.objects.filter(pk__in=[pk for _created_at, pk in keys]).for_feed(user).in_bulk()
+        rows = [threads[pk] for _created_at, pk in keys if pk in threads]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = self.has_cursor
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.has_cursor
+
+        self.page = rows
+        return rows
+
+    def entry_field(self, name):
+        descending = name.startswith('-')
+        field = self.ENTRY_FIELDS[name.lstrip('-')]
+        return f'-{field}' if descending else field
@@ -1,14 +1,23 @@
 from rest_framework import serializers
 
 from .models import ThreadPost, ThreadComment, ThreadLike
-from portal.serializers import UserProfileDetailSerializer
+from portal.serializers import UserProfileCardSerializer
+from portal.loaders import LoadedListSerializer, LoadedProfileField, LoadedUserField, get_loader
 
 class ThreadPostSerializer(serializers.ModelSerializer):
-    author_profile = UserProfileDetailSerializer(source='author.profile', read_only=True)
-    author_username = serializers.CharField(source='author.username', read_only=True)
+    
+    '''
+    Reads the is_liked annotation added by ThreadPost.objects.for_feed()
+    and only queries when it is missing, authors come from the request's
+    UserLoader
+    '''
+    
+    author_profile = LoadedProfileField(UserProfileCardSerializer, source='author_id')
+    author_username = LoadedUserField(source='author_id')
     likes_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    comments_count = serializers.IntegerField(source='comment_count', read_only=True)
+    views_count = serializers.IntegerField(source='view_count', read_only=True)
     is_author_admin = serializers.SerializerMethodField()
     
     class Meta:
@@ -28,25 +37,29 @@ class ThreadPostSerializer(serializers.ModelSerializer):
             'likes_count',
             'is_liked',
             'comments_count',
+            'views_count',
             'is_author_admin'
         ]
         
         read_only_fields = ['author', 'created_at']
+        list_serializer_class = LoadedListSerializer
         
     def get_likes_count(self, obj):
-        return obj.likes.count()
-    
-    def get_comments_count(self, obj):
-        return obj.comments.count()
+        # like_delta is the viewer's own buffered like, see for_feed()
+        return obj.like_count + getattr(obj, 'like_delta', 0)
     
     def get_is_liked(self, obj):
+        if hasattr(obj, 'is_liked'):
+            return obj.is_liked
+        
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return ThreadLike.objects.filter(thread=obj, user=request.user).exists()
         return False
     
     def get_is_author_admin(self, obj):
-        return obj.author.is_superuser
+        author = get_loader(self.context).user(obj.author_id)
+        return author.is_superuser if author is not None else False
         
         
 class ThreadPostCreateSerializer(serializers.ModelSerializer):
@@ -66,10 +79,19 @@ class ThreadPostCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Content must be at least 20 character length')
     
         return value
+    
+    def update(self, instance, validated_data):
+        
+        '''save only the edited columns, the counters move with F() updates'''
+        
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
 
 class ThreadCommentSerializer(serializers.ModelSerializer):
-    author_profile = UserProfileDetailSerializer(source='author.profile', read_only=True)
-    author_username = serializers.CharField(source='author.username', read_only=True)
+    author_profile = LoadedProfileField(UserProfileCardSerializer, source='author_id')
+    author_username = LoadedUserField(source='author_id')
     
     class Meta:
         model = ThreadComment
@@ -84,6 +106,7 @@ class ThreadCommentSerializer(serializers.ModelSerializer):
         ]
         
         read_only_fields = ['author', 'created_at']
+        list_serializer_class = LoadedListSerializer
         
 class ThreadLikeSerializer(serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
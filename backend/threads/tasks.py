@@ -0,0 +1,13 @@
+from jobs.registry import task
+from .models import ThreadPost
+from .timeline import fan_out_thread
+
+
+@task('threads.timeline_fanout')
+def timeline_fanout(thread_id):
+    
+    '''Write a new thread into followers' timelines (entries are insert-ignore)'''
+    
+    thread = ThreadPost.objects.filter(pk=thread_id).first()
+    if thread is not None:
+        fan_out_thread(thread)
@@ -1,3 +1,516 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from notifications.models import Notification
+from notifications.tasks import like_changed
+from portal.models import UserFollow, UserProfile
+
+from . import counters, likebuffer, viewcounts
+from .serializers import ThreadPostCreateSerializer
+from .timeline import add_author_to_timeline, fan_out_thread
+from .models import LikeIntent, ThreadComment, ThreadCounterShard, ThreadLike, ThreadPost, TimelineEntry
+
+
+def make_user(username):
+    user = User.objects.create_user(username, f'{username}@ssct.edu.ph')
+    UserProfile.objects.create(
+        user=user,
+        firstname=username.title(),
+        lastname='Tester',
+        birth_date=datetime.date(2000, 1, 1),
+        gender='male',
+        role='student',
+        department='ccis',
+        course='bscs'
+    )
+    return user
+
+
+def make_thread(author, title='Thread for tests'):
+    return ThreadPost.objects.create(author=author, title=title, content='Content long enough for a thread.')
+
+
+# a long interval keeps the background flush out of the test transaction
+@override_settings(THREAD_VIEW_TRUSTED_PROXIES=1, THREAD_VIEW_FLUSH_INTERVAL=3600)
+class ViewCountTests(TestCase):
+    
+    def setUp(self):
+        self.thread = make_thread(make_user('author'))
+        self.url = f'/api/v1/threads/posts/{self.thread.pk}/'
+        # a fresh tally and bloom filter per test
+        viewcounts._counter = viewcounts.ViewCounter()
+        
+    def flush(self):
+        viewcounts.get_view_counter().flush()
+        self.thread.refresh_from_db()
+        return self.thread.view_count
+    
+    def test_repeat_views_count_once(self):
+        client = APIClient()
+        client.force_authenticate(make_user('viewer'))
+        for _ in range(3):
+            client.get(self.url)
+            
+        self.assertEqual(self.thread.view_count, 0)
+        self.assertEqual(self.flush(), 1)
+        
+    def test_anonymous_viewer_is_keyed_by_the_proxy_hop(self):
+        client = APIClient()
+        # spoofed leftmost entries change, the address the proxy appended does not
+        for spoofed in ('1.1.1.1', '2.2.2.2', '3.3.3.3'):
+            client.get(self.url, HTTP_X_FORWARDED_FOR=f'{spoofed}, 203.0.113.7')
+        client.get(self.url, HTTP_X_FORWARDED_FOR='1.1.1.1, 198.51.100.9')
+        
+        self.assertEqual(self.flush(), 2)
+        
+    def test_client_address_without_proxy_hop(self):
+        request = APIClient().get(self.url, REMOTE_ADDR='192.0.2.1').wsgi_request
+        self.assertEqual(viewcounts.client_address(request), '192.0.2.1')
+
+
+@override_settings(JOBS_RUN_INLINE=False)
+class LikeNotificationTests(TestCase):
+    
+    def setUp(self):
+        self.thread = make_thread(make_user('author'))
+        self.liker = make_user('liker')
+        self.client = APIClient()
+        self.client.force_authenticate(self.liker)
+        self.url = f'/api/v1/threads/posts/{self.thread.pk}/like/'
+        
+    def test_like_leaves_the_notification_to_a_job(self):
+        response = self.client.put(self.url)
+        
+        self.assertEqual(response.data['likes_count'], 1)
+        self.assertFalse(Notification.objects.exists())
+        
+        job = Job.objects.get(task='notifications.like_changed')
+        like_changed(**job.payload)
+        self.assertEqual(Notification.objects.get().actor_count, 1)
+        
+    @override_settings(THREAD_COUNTER_SHARDS=4)
+    def test_sharded_counters_take_the_same_path(self):
+        self.client.put(self.url)
+        
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(Job.objects.filter(task='notifications.like_changed').count(), 1)
+        
+    def test_jobs_follow_the_current_like_state_in_any_order(self):
+        self.client.put(self.url)
+        self.client.delete(self.url)
+        
+        for job in Job.objects.filter(task='notifications.like_changed').order_by('-id'):
+            like_changed(**job.payload)
+        self.assertFalse(Notification.objects.exists())
+
+
+@override_settings(THREAD_COUNTER_SHARDS=4)
+class ShardedReconcileTests(TestCase):
+    
+    def test_reconcile_counts_unfolded_shards_as_stored(self):
+        thread = make_thread(make_user('author'))
+        for name in ('a', 'b', 'c'):
+            ThreadLike.objects.create(thread=thread, user=make_user(name))
+            counters.increment(thread.pk, 'like_count', 1)
+        ThreadPost.objects.filter(pk=thread.pk).update(like_count=7)
+        
+        call_command('reconcile_thread_counters', stdout=StringIO())
+        self.assertEqual(counters.read(thread.pk, 'like_count'), 3)
+        
+        counters.fold()
+        thread.refresh_from_db()
+        self.assertEqual(thread.like_count, 3)
+        self.assertFalse(ThreadCounterShard.objects.exclude(delta=0).exists())
+
+
+class KeysetPaginationTests(TestCase):
+    
+    def setUp(self):
+        author = make_user('author')
+        self.threads = [make_thread(author, f'Thread number {i}') for i in range(7)]
+        # four threads share a timestamp, the id breaks the tie
+        tied = timezone.now()
+        ThreadPost.objects.filter(pk__in=[t.pk for t in self.threads[1:5]]).update(created_at=tied)
+        self.expected = list(ThreadPost.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        
+        self.client = APIClient()
+        self.client.force_authenticate(author)
+        
+    def walk(self, url, link):
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([thread['id'] for thread in data['results']])
+            url = data[link]
+        return pages
+    
+    def test_forward_pages_cover_every_thread_once(self):
+        pages = self.walk('/api/v1/threads/posts/?page_size=2', 'next')
+        
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual([pk for page in pages for pk in page], self.expected)
+        
+    def test_backward_pages_mirror_forward_pages(self):
+        forward = self.walk('/api/v1/threads/posts/?page_size=2', 'next')
+        last_page = self.client.get('/api/v1/threads/posts/?page_size=2').json()
+        for _ in range(len(forward) - 1):
+            last_page = self.client.get(last_page['next']).json()
+        
+        backward = self.walk(last_page['previous'], 'previous')
+        
+        self.assertEqual(list(reversed(backward)), forward[:-1])
+        
+    def test_first_page_has_no_previous_link(self):
+        data = self.client.get('/api/v1/threads/posts/?page_size=2').json()
+        self.assertIsNone(data['previous'])
+        self.assertIsNotNone(data['next'])
+        
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/v1/threads/posts/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+        
+    def test_paginate_false_returns_the_plain_list(self):
+        data = self.client.get('/api/v1/threads/posts/?paginate=false').json()
+        self.assertEqual([thread['id'] for thread in data], self.expected)
+        
+        
+class CounterTests(TestCase):
+    
+    def setUp(self):
+        self.thread = make_thread(make_user('author'))
+        
+    def test_increment_and_read(self):
+        counters.increment(self.thread.pk, 'like_count', 2)
+        self.assertEqual(counters.increment_and_read(self.thread.pk, 'like_count', -1), 1)
+        self.assertEqual(counters.read(self.thread.pk, 'like_count'), 1)
+        
+    def test_increment_and_read_without_returning(self):
+        counters.increment(self.thread.pk, 'like_count', 2)
+        with mock.patch.object(counters, 'can_update_returning', return_value=False):
+            self.assertEqual(counters.increment_and_read(self.thread.pk, 'like_count', 1), 3)
+            self.assertEqual(counters.increment_and_read(self.thread.pk, 'like_count', -5), 3)
+            self.assertEqual(counters.increment_and_read(self.thread.pk, 'like_count', -1), 2)
+        
+    def test_decrement_never_goes_below_zero(self):
+        self.assertEqual(counters.increment_and_read(self.thread.pk, 'comment_count', -1), 0)
+        counters.increment(self.thread.pk, 'comment_count', -3)
+        self.assertEqual(counters.read(self.thread.pk, 'comment_count'), 0)
+        
+    def test_reconcile_fixes_drifted_counts(self):
+        liker = make_user('liker')
+        ThreadLike.objects.create(thread=self.thread, user=liker)
+        ThreadComment.objects.create(thread=self.thread, author=liker, content='A comment on the thread')
+        ThreadPost.objects.filter(pk=self.thread.pk).update(like_count=5, comment_count=0)
+        
+        out = StringIO()
+        call_command('reconcile_thread_counters', '--dry-run', stdout=out)
+        self.assertIn('would fix 1', out.getvalue())
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.like_count, 5)
+        
+        call_command('reconcile_thread_counters', stdout=StringIO())
+        self.thread.refresh_from_db()
+        self.assertEqual((self.thread.like_count, self.thread.comment_count), (1, 1))
+        
+        
+class LikeEndpointTests(TestCase):
+    
+    def setUp(self):
+        self.thread = make_thread(make_user('author'))
+        self.liker = make_user('liker')
+        self.client = APIClient()
+        self.client.force_authenticate(self.liker)
+        self.url = f'/api/v1/threads/posts/{self.thread.pk}/like/'
+        
+    def test_put_is_idempotent(self):
+        first = self.client.put(self.url)
+        second = self.client.put(self.url)
+        
+        self.assertEqual((first.status_code, first.data['likes_count']), (201, 1))
+        self.assertEqual((second.status_code, second.data['likes_count']), (200, 1))
+        self.assertEqual(ThreadLike.objects.count(), 1)
+        # only the like that changed something notifies
+        self.assertEqual(Job.objects.filter(task='notifications.like_changed').count(), 1)
+        
+    def test_delete_is_idempotent(self):
+        self.client.put(self.url)
+        first = self.client.delete(self.url)
+        second = self.client.delete(self.url)
+        
+        self.assertEqual((first.status_code, first.data['likes_count']), (200, 0))
+        self.assertEqual((second.status_code, second.data['likes_count']), (200, 0))
+        self.assertFalse(ThreadLike.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        
+    def test_post_still_toggles(self):
+        self.assertTrue(self.client.post(self.url).data['is_liked'])
+        self.assertFalse(self.client.post(self.url).data['is_liked'])
+        
+    def test_missing_thread(self):
+        self.assertEqual(self.client.put('/api/v1/threads/posts/999/like/').status_code, 404)
+        
+        
+@override_settings(THREAD_LIKE_BUFFER=True, JOBS_RUN_INLINE=False)
+class LikeBufferTests(TestCase):
+    
+    def setUp(self):
+        self.thread = make_thread(make_user('author'))
+        self.liker = make_user('liker')
+        self.client = APIClient()
+        self.client.force_authenticate(self.liker)
+        self.url = f'/api/v1/threads/posts/{self.thread.pk}/like/'
+        
+    def feed_entry(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        thread = client.get('/api/v1/threads/posts/?paginate=false').json()[0]
+        return thread['is_liked'], thread['likes_count']
+    
+    def test_liker_sees_the_pending_like(self):
+        response = self.client.put(self.url)
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['likes_count'], 1)
+        self.assertFalse(ThreadLike.objects.exists())
+        self.assertEqual(self.feed_entry(self.liker), (True, 1))
+        self.assertEqual(self.feed_entry(make_user('other')), (False, 0))
+        
+    def test_flush_applies_the_latest_intent_once(self):
+        other = make_user('other')
+        self.client.put(self.url)
+        self.client.delete(self.url)
+        self.client.put(self.url)
+        likebuffer.record(self.thread, other, True)
+        likebuffer.record(self.thread, other, False)
+        
+        self.assertEqual(likebuffer.flush(), 5)
+        
+        self.assertEqual(list(ThreadLike.objects.values_list('user', flat=True)), [self.liker.pk])
+        self.assertEqual(counters.read(self.thread.pk, 'like_count'), 1)
+        self.assertEqual(Notification.objects.get().actor_count, 1)
+        self.assertFalse(LikeIntent.objects.exists())
+        self.assertEqual(self.feed_entry(self.liker), (True, 1))
+        
+    def test_flush_removes_unliked(self):
+        self.client.put(self.url)
+        likebuffer.flush()
+        self.client.post(self.url)
+        likebuffer.flush()
+        
+        self.assertFalse(ThreadLike.objects.exists())
+        self.assertEqual(counters.read(self.thread.pk, 'like_count'), 0)
+        self.assertFalse(Notification.objects.exists())
+        
+        
+    def test_flush_clamps_a_drifted_counter_at_zero(self):
+        other = make_user('other')
+        ThreadLike.objects.create(thread=self.thread, user=self.liker)
+        ThreadLike.objects.create(thread=self.thread, user=other)
+        ThreadPost.objects.filter(pk=self.thread.pk).update(like_count=1)
+        
+        self.client.delete(self.url)
+        likebuffer.record(self.thread, other, False)
+        likebuffer.flush()
+        
+        self.assertEqual(counters.read(self.thread.pk, 'like_count'), 0)
+        
+    def test_answer_nets_out_the_users_pending_intents(self):
+        other = make_user('other')
+        likebuffer.record(self.thread, other, True)
+        likebuffer.flush()
+        
+        counts = [self.client.put(self.url), self.client.delete(self.url), self.client.put(self.url), self.client.put(self.url)]
+        
+        self.assertEqual([response.data['likes_count'] for response in counts], [2, 1, 2, 2])
+        
+    @override_settings(THREAD_COUNTER_SHARDS=4)
+    def test_answer_counts_unfolded_shards(self):
+        likebuffer.record(self.thread, make_user('other'), True)
+        likebuffer.flush()
+        
+        self.assertEqual(self.client.put(self.url).data['likes_count'], 2)
+        
+        
+@override_settings(THREAD_COUNTER_SHARDS=4)
+class ShardFoldTests(TestCase):
+    
+    def setUp(self):
+        self.thread = make_thread(make_user('author'))
+        
+    def test_increments_land_in_shards_and_read_exactly(self):
+        for _ in range(10):
+            counters.increment(self.thread.pk, 'like_count', 1)
+        counters.increment(self.thread.pk, 'like_count', -2)
+        
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.like_count, 0)
+        self.assertLessEqual(ThreadCounterShard.objects.count(), 4)
+        self.assertEqual(counters.read(self.thread.pk, 'like_count'), 8)
+        
+    def test_fold_moves_deltas_into_the_columns(self):
+        for _ in range(5):
+            counters.increment(self.thread.pk, 'like_count', 1)
+        counters.increment(self.thread.pk, 'comment_count', 2)
+        
+        folded = counters.fold()
+        
+        self.thread.refresh_from_db()
+        self.assertEqual(folded, ThreadCounterShard.objects.count())
+        self.assertEqual((self.thread.like_count, self.thread.comment_count), (5, 2))
+        self.assertFalse(ThreadCounterShard.objects.exclude(delta=0).exists())
+        self.assertEqual(counters.fold(), 0)
+        
+    def test_fold_never_takes_a_column_below_zero(self):
+        counters.increment(self.thread.pk, 'like_count', -3)
+        counters.fold()
+        
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.like_count, 0)
+
+
+class TimelinePaginationTests(TestCase):
+    
+    def setUp(self):
+        self.viewer = make_user('viewer')
+        pushed_author = make_user('pushed')
+        pulled_author = make_user('pulled')
+        stranger = make_user('stranger')
+        for author in (pushed_author, pulled_author):
+            UserFollow.objects.create(follower=self.viewer, following=author)
+        
+        for i in range(4):
+            fan_out_thread(make_thread(pushed_author, f'Pushed thread {i}'))
+            thread = make_thread(pulled_author, f'Pulled thread {i}')
+            ThreadPost.objects.filter(pk=thread.pk).update(fanned_out=False)
+            make_thread(stranger, f'Stranger thread {i}')
+        # a pushed and a pulled thread tie on created_at, the id breaks the tie
+        tied = timezone.now()
+        ThreadPost.objects.filter(title__in=['Pushed thread 1', 'Pulled thread 1']).update(created_at=tied)
+        TimelineEntry.objects.filter(thread__title='Pushed thread 1').update(thread_created_at=tied)
+        
+        self.expected = list(
+            ThreadPost.objects.exclude(author=stranger)
+            .order_by('-created_at', '-id')
+            .values_list('pk', flat=True)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+        
+    def walk(self, url, link):
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([thread['id'] for thread in data['results']])
+            url = data[link]
+        return pages
+        
+    def test_pages_merge_pushed_and_pulled_threads(self):
+        pages = self.walk('/api/v1/threads/following/?page_size=3', 'next')
+        
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual([pk for page in pages for pk in page], self.expected)
+        
+    def test_backward_pages_mirror_forward_pages(self):
+        forward = self.walk('/api/v1/threads/following/?page_size=3', 'next')
+        last_page = self.client.get('/api/v1/threads/following/?page_size=3').json()
+        for _ in range(len(forward) - 1):
+            last_page = self.client.get(last_page['next']).json()
+        
+        backward = self.walk(last_page['previous'], 'previous')
+        
+        self.assertEqual(list(reversed(backward)), forward[:-1])
+        
+    def test_page_reads_are_capped(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/v1/threads/following/?page_size=3')
+        
+        reads = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(('SELECT "threads_timelineentry"', 'SELECT "threads_threadpost"."created_at"'))
+        ]
+        self.assertEqual(len(reads), 2)
+        self.assertTrue(all(sql.endswith('LIMIT 4') for sql in reads))
+        
+        
+@override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1, JOBS_RUN_INLINE=True)
+class TimelineModeTests(TestCase):
+    
+    def setUp(self):
+        self.author = make_user('author')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        
+    def follow(self, user):
+        UserFollow.objects.create(follower=user, following=self.author)
+        UserProfile.objects.filter(user=self.author).update(followers_count=UserFollow.objects.filter(following=self.author).count())
+        add_author_to_timeline(user, self.author)
+        
+    def post_thread(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/threads/create/', {'title': title, 'content': 'Content long enough for a thread.'})
+        self.assertEqual(response.status_code, 201)
+        return ThreadPost.objects.get(pk=response.data['thread']['id'])
+        
+    def timeline(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        data = client.get('/api/v1/threads/following/?page_size=100').json()
+        return {thread['title'] for thread in data['results']}
+        
+    def test_threads_stay_after_the_author_crosses_the_threshold_both_ways(self):
+        first = make_user('first')
+        self.follow(first)
+        pushed = self.post_thread('pushed thread')
+        self.assertTrue(pushed.fanned_out)
+        
+        second = make_user('second')
+        self.follow(second)
+        pulled = self.post_thread('pulled thread')
+        self.assertFalse(pulled.fanned_out)
+        self.assertEqual(self.timeline(first), {'pushed thread', 'pulled thread'})
+        self.assertEqual(self.timeline(second), {'pushed thread', 'pulled thread'})
+        
+        # back under the threshold, the pulled thread is still read
+        UserFollow.objects.filter(follower=second).delete()
+        UserProfile.objects.filter(user=self.author).update(followers_count=1)
+        self.post_thread('pushed thread again')
+        self.assertEqual(self.timeline(first), {'pushed thread', 'pulled thread', 'pushed thread again'})
+        
+    def test_following_a_pulled_author_backfills_their_pushed_threads(self):
+        self.post_thread('pushed thread')
+        self.follow(make_user('first'))
+        self.follow(make_user('second'))
+        
+        late = make_user('late')
+        self.follow(late)
+        self.assertEqual(self.timeline(late), {'pushed thread'})
+        
+        UserFollow.objects.exclude(follower=late).delete()
+        UserProfile.objects.filter(user=self.author).update(followers_count=1)
+        self.assertEqual(self.timeline(late), {'pushed thread'})
+
+
+class ThreadUpdateTests(TestCase):
+    
+    def test_edit_leaves_the_counters_alone(self):
+        thread = make_thread(make_user('author'))
+        # a like and a view land after the thread was loaded for the edit
+        ThreadPost.objects.filter(pk=thread.pk).update(like_count=5, view_count=9)
+        
+        serializer = ThreadPostCreateSerializer(thread, data={'title': 'An edited thread title'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        
+        thread.refresh_from_db()
+        self.assertEqual(thread.title, 'An edited thread title')
+        self.assertEqual((thread.like_count, thread.view_count), (5, 9))
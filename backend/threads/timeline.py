@@ -0,0 +1,74 @@
+from django.conf import settings
+
+from portal.models import UserFollow, UserProfile
+from .models import ThreadPost, TimelineEntry
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def is_fanout_author(author_id):
+    
+    '''Small follower sets are pushed on write, large ones pulled on read'''
+    
+    followers_count = UserProfile.objects.filter(user_id=author_id).values_list('followers_count', flat=True).first()
+    return (followers_count or 0) <= settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out_thread(thread):
+    
+    '''
+    Write the new thread into every follower's timeline
+    Skipped for threads posted above TIMELINE_FANOUT_MAX_FOLLOWERS
+    '''
+    
+    if not thread.fanned_out:
+        return 0
+    
+    follower_ids = UserFollow.objects.filter(following_id=thread.author_id).values_list('follower_id', flat=True)
+    
+    entries = [
+        TimelineEntry(user_id=user_id, thread=thread, thread_created_at=thread.created_at)
+        for user_id in follower_ids.iterator()
+    ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+    return len(entries)
+
+
+def add_author_to_timeline(user, author, limit=None):
+    
+    '''
+    Backfill recent pushed threads of a newly followed author, whatever
+    the author's mode is now. Their pulled threads are merged in by
+    TimelinePagination anyway.
+    '''
+    
+    limit = limit or settings.TIMELINE_BACKFILL_THREADS
+    threads = ThreadPost.objects.filter(author=author, fanned_out=True).values_list('id', 'created_at')[:limit]
+    
+    entries = [
+        TimelineEntry(user=user, thread_id=thread_id, thread_created_at=created_at)
+        for thread_id, created_at in threads
+    ]
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def remove_author_from_timeline(user, author):
+    
+    '''Prune an unfollowed author's threads from the user's timeline'''
+    
+    deleted, _ = TimelineEntry.objects.filter(user=user, thread__author=author).delete()
+    return deleted
+
+
+def pulled_threads(user):
+    
+    '''
+    Pull-mode threads of the authors the user follows. The mode is the one
+    recorded on each thread when it was posted, so threads don't drop out
+    of (or go missing from) timelines when the author's follower count
+    later crosses the threshold
+    '''
+    
+    followed = UserFollow.objects.filter(follower=user).values('following_id')
+    return ThreadPost.objects.filter(fanned_out=False, author_id__in=followed)
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     ThreadPostListView,
+    FollowingThreadListView,
     ThreadPostDetailView,
     UserThreadPostsView,
     ThreadPostCreateView,
@@ -10,6 +11,7 @@ from .views import (
 
 urlpatterns = [
     path('posts/', ThreadPostListView.as_view(), name='thread-list'),
+    path('following/', FollowingThreadListView.as_view(), name='thread-following'),
     path('my-posts/', UserThreadPostsView.as_view(), name='user-thread'),
     path('create/', ThreadPostCreateView.as_view(), name='thread-create'),
     path('posts/<int:pk>/', ThreadPostDetailView.as_view(), name='thread-details'),
@@ -0,0 +1,165 @@
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, Value, When
+
+from .models import ThreadPost
+
+logger = logging.getLogger(__name__)
+
+
+class RotatingBloomFilter:
+
+    '''
+    Probabilistic "seen recently" set of bounded size
+
+    Keys go into the current half, the older half is dropped every window
+    seconds, so a key is remembered for one to two windows. A false
+    positive only skips counting a view, it never counts one twice.
+    '''
+
+    def __init__(self, bits, hashes, window):
+        self.bits = bits
+        self.hashes = hashes
+        self.window = window
+        self.current = bytearray(bits // 8)
+        self.previous = bytearray(bits // 8)
+        self.rotated_at = time.monotonic()
+
+    def add(self, key):
+
+        '''Remember key, returns False if it was (probably) seen already'''
+
+        if time.monotonic() - self.rotated_at >= self.window:
+            self.previous, self.current = self.current, bytearray(self.bits // 8)
+            self.rotated_at = time.monotonic()
+
+        positions = self._positions(key)
+        seen = self._contains(self.current, positions) or self._contains(self.previous, positions)
+        for position in positions:
+            self.current[position >> 3] |= 1 << (position & 7)
+        return not seen
+
+    def _positions(self, key):
+        # double hashing, k positions from one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.bits for i in range(self.hashes)]
+
+    def _contains(self, bitmap, positions):
+        return all(bitmap[position >> 3] & (1 << (position & 7)) for position in positions)
+
+
+class ViewCounter:
+
+    '''
+    Per-worker view tally for ThreadPost.view_count
+
+    record() only touches memory. A daemon thread writes the tally every
+    THREAD_VIEW_FLUSH_INTERVAL seconds as one UPDATE ... CASE per batch of
+    threads, and an atexit hook writes what is left when the worker stops.
+    '''
+
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._seen = RotatingBloomFilter(
+            settings.THREAD_VIEW_DEDUP_BITS,
+            settings.THREAD_VIEW_DEDUP_HASHES,
+            settings.THREAD_VIEW_DEDUP_WINDOW
+        )
+        self._thread = None
+
+    def record(self, thread_id, viewer):
+
+        '''Count a view unless this viewer was seen on the thread recently'''
+
+        with self._lock:
+            if not self._seen.add(f'{viewer}:{thread_id}'):
+                return False
+            self._pending[thread_id] += 1
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+                self._thread.start()
+        return True
+
+    def flush(self):
+
+        '''Write the pending tally, returns how many views were written'''
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        try:
+            ids = list(pending)
+            for start in range(0, len(ids), settings.THREAD_VIEW_FLUSH_BATCH):
+                batch = ids[start:start + settings.THREAD_VIEW_FLUSH_BATCH]
+                views = Case(*[When(pk=pk, then=Value(pending[pk])) for pk in batch], default=Value(0))
+                ThreadPost.objects.filter(pk__in=batch).update(view_count=F('view_count') + views)
+        except Exception:
+            # keep the views for the next attempt
+            logger.exception('Failed to write thread view counts')
+            with self._lock:
+                self._pending.update(pending)
+            return 0
+        return sum(pending.values())
+
+    def _run(self):
+        while True:
+            time.sleep(settings.THREAD_VIEW_FLUSH_INTERVAL)
+            close_old_connections()
+            self.flush()
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_view_counter():
+    global _counter
+    with _counter_lock:
+        if _counter is None:
+            _counter = ViewCounter()
+            atexit.register(_counter.flush)
+    return _counter
+
+
+def record_view(request, thread_id):
+
+    '''Count a thread detail view by the requesting user (or address)'''
+
+    if not settings.THREAD_VIEW_COUNTING:
+        return False
+
+    if request.user.is_authenticated:
+        viewer = f'user:{request.user.pk}'
+    else:
+        viewer = f'ip:{client_address(request)}'
+    return get_view_counter().record(thread_id, viewer)
+
+
+def client_address(request):
+
+    '''
+    The address our own proxies saw the request come from
+
+    Clients can send any X-Forwarded-For, only the hops appended by the
+    THREAD_VIEW_TRUSTED_PROXIES proxies in front of us are trustworthy, so
+    the address is taken that many entries from the right
+    '''
+
+    proxies = settings.THREAD_VIEW_TRUSTED_PROXIES
+    hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    if proxies and len(hops) >= proxies:
+        return hops[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
@@ -1,10 +1,20 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 
+from stream.db import insert_ignore
+from stream.pagination import KeysetPagination
+from jobs.registry import enqueue
+
 from .models import ThreadPost, ThreadComment, ThreadLike
+from . import counters, likebuffer
+from .pagination import TimelinePagination
+from .timeline import is_fanout_author
+from .viewcounts import record_view
 from .serializers import (
     ThreadPostSerializer, 
     ThreadPostCreateSerializer, 
@@ -12,22 +22,43 @@ from .serializers import (
     ThreadLikeSerializer
 )
 
-from notifications.utils import (
-    create_like_notification,
-    create_comment_notification,
-    create_new_post_notification
-)
+from notifications.broadcasts import broadcast_thread, can_broadcast
+from notifications.utils import create_comment_notification
 
 class ThreadPostListView(APIView):
     
-    '''API endpoint for listing all thread posts'''
+    '''
+    API endpoint for listing all thread posts
+    
+    Cursor paginated on (created_at, id) by default, pass ?paginate=false
+    for the old unpaginated list
+    '''
 
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        threads =  ThreadPost.objects.all()
-        serializers = ThreadPostSerializer(threads, many=True, context={'request': request})
-        return Response(serializers.data, status=status.HTTP_200_OK)
+        threads = ThreadPost.objects.for_feed(request.user)
+        
+        if request.query_params.get('paginate') == 'false':
+            serializers = ThreadPostSerializer(threads, many=True, context={'request': request})
+            return Response(serializers.data, status=status.HTTP_200_OK)
+        
+        paginator = KeysetPagination(ordering=ThreadPost._meta.ordering)
+        page = paginator.paginate_queryset(threads, request)
+        serializers = ThreadPostSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializers.data)
+    
+class FollowingThreadListView(APIView):
+    
+    '''API endpoint for listing thread posts from followed users'''
+    
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        paginator = TimelinePagination()
+        page = paginator.paginate_timeline(request.user, request)
+        serializers = ThreadPostSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializers.data)
     
 class ThreadPostCreateView(APIView):
     
@@ -40,9 +71,17 @@ class ThreadPostCreateView(APIView):
         serializer = ThreadPostCreateSerializer(data=request.data)
         
         if serializer.is_valid():
-            thread = serializer.save(author=request.user)
-    
-            create_new_post_notification(thread, request.user)
+            with transaction.atomic():
+                thread = serializer.save(author=request.user, fanned_out=is_fanout_author(request.user.id))
+                
+                if thread.thread_type == 'announcement' and can_broadcast(request.user):
+                    # one row for the whole campus instead of one per follower
+                    broadcast_thread(thread)
+                else:
+                    # follower notifications are written by `run_worker`
+                    enqueue('notifications.new_post_fanout', {'thread_id': thread.id}, key=f'new_post:{thread.id}:0')
+                    
+                enqueue('threads.timeline_fanout', {'thread_id': thread.id}, key=f'timeline:{thread.id}')
             
             response_serializer = ThreadPostSerializer(thread, context={'request': request}) 
             
@@ -65,13 +104,16 @@ class ThreadPostDetailView(APIView):
             return None 
         
     def get(self, request, pk):
-        thread = self.get_object(pk)
+        thread = ThreadPost.objects.for_feed(request.user).filter(pk=pk).first()
         
         if not thread:
             return Response({
                 'error': 'Thread post not found'
             }, status=status.HTTP_404_NOT_FOUND)
             
+        # in memory only, written in batches by threads.viewcounts
+        record_view(request, thread.pk)
+        
         serializer = ThreadPostSerializer(thread, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -116,7 +158,10 @@ class ThreadPostDetailView(APIView):
                 'error': 'You do not have permission to update this thread post'
             }, status=status.HTTP_403_FORBIDDEN)
             
+        # its notifications are removed afterwards by the
+        # notifications.thread_deleted job, see notifications.signals
         thread.delete()
+            
         return Response({
             'message': 'Thread post deleted'
         }, status=status.HTTP_200_OK)
@@ -129,20 +174,38 @@ class UserThreadPostsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        threads = ThreadPost.objects.filter(author=request.user)
+        threads = ThreadPost.objects.for_feed(request.user).filter(author=request.user)
         serializer = ThreadPostSerializer(threads, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 class ThreadCommentListCreateView(APIView):
     
-    '''API endpoint for retrieving and create comment'''
+    '''
+    API endpoint for retrieving and create comment
+    
+    Cursor paginated oldest first, ?since=<comment id> only returns newer
+    comments and ?paginate=false keeps the old unpaginated list
+    '''
     
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
         comments = ThreadComment.objects.filter(thread_id=pk)
-        serializer = ThreadCommentSerializer(comments, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        
+        since = request.query_params.get('since')
+        if since:
+            if not since.isdigit():
+                return Response({'error': 'since must be a comment id'}, status=status.HTTP_400_BAD_REQUEST)
+            comments = comments.filter(id__gt=int(since))
+        
+        if request.query_params.get('paginate') == 'false':
+            serializer = ThreadCommentSerializer(comments, many=True, context={'request': request})
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        
+        paginator = KeysetPagination(ordering=ThreadComment._meta.ordering)
+        page = paginator.paginate_queryset(comments, request)
+        serializer = ThreadCommentSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request, pk):
         try:
@@ -152,31 +215,96 @@ class ThreadCommentListCreateView(APIView):
 
         serializer = ThreadCommentSerializer(data=request.data)
         if serializer.is_valid():
-            comment = serializer.save(author=request.user, thread=thread)
-            
-            create_comment_notification(comment, thread, request.user)
+            with transaction.atomic():
+                comment = serializer.save(author=request.user, thread=thread)
+                # the counter update locks the thread row, so concurrent
+                # comments join the same coalesced notification
+                counters.increment(thread.id, 'comment_count', 1)
+                create_comment_notification(comment, thread, request.user)
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class ThreadLikeToggleView(APIView):
     
-    '''API endpoint to click like and view user who like'''
+    '''
+    API endpoint to like (PUT) and unlike (DELETE) a thread
+    
+    Both are idempotent: repeating one changes nothing and answers with
+    the same state. POST still toggles for older app versions.
+    
+    With THREAD_LIKE_BUFFER the request only appends an intent and
+    answers 202, the flush_likes worker applies it in batches.
+    '''
     
     permission_classes = [IsAuthenticated]
-
-    def post(self, request, pk):
-        try:
-            thread = ThreadPost.objects.get(pk=pk)
-        except ThreadPost.DoesNotExist:
+    
+    def get_thread(self, pk):
+        return ThreadPost.objects.filter(pk=pk).select_related('author').first()
+    
+    def put(self, request, pk):
+        thread = self.get_thread(pk)
+        if thread is None:
             return Response({'error': 'Thread not found'}, status=status.HTTP_404_NOT_FOUND)
-
-        like, created = ThreadLike.objects.get_or_create(thread=thread, user=request.user)
-        if created:
-   
-            create_like_notification(thread, request.user)
-            
-            return Response({'message': 'Liked', 'likes_count': thread.likes.count(), 'is_liked': True}, status=status.HTTP_201_CREATED)
+        
+        if settings.THREAD_LIKE_BUFFER:
+            return self.buffer(request, thread, True)
+        
+        with transaction.atomic():
+            # a double tap or a concurrent duplicate inserts nothing
+            liked = insert_ignore(ThreadLike, thread=thread, user=request.user)
+            if liked:
+                likes_count = counters.increment_and_read(thread.id, 'like_count', 1)
+                self.notify(thread, request.user)
+        
+        if not liked:
+            likes_count = counters.read(thread.id, 'like_count')
+        
+        return Response(
+            {'message': 'Liked', 'likes_count': likes_count, 'is_liked': True},
+            status=status.HTTP_201_CREATED if liked else status.HTTP_200_OK
+        )
+    
+    def delete(self, request, pk):
+        thread = self.get_thread(pk)
+        if thread is None:
+            return Response({'error': 'Thread not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if settings.THREAD_LIKE_BUFFER:
+            return self.buffer(request, thread, False)
+        
+        with transaction.atomic():
+            unliked, _ = ThreadLike.objects.filter(thread=thread, user=request.user).delete()
+            if unliked:
+                likes_count = counters.increment_and_read(thread.id, 'like_count', -1)
+                self.notify(thread, request.user)
+        
+        if not unliked:
+            likes_count = counters.read(thread.id, 'like_count')
+        
+        return Response({'message': 'Unliked', 'likes_count': likes_count, 'is_liked': False}, status=status.HTTP_200_OK)
+    
+    def post(self, request, pk):
+        if settings.THREAD_LIKE_BUFFER:
+            liked = likebuffer.is_liked(pk, request.user)
         else:
-            like.delete()
-            return Response({'message': 'Unliked', 'likes_count': thread.likes.count(), 'is_liked': False}, status=status.HTTP_200_OK)
\ No newline at end of file
+            liked = ThreadLike.objects.filter(thread_id=pk, user=request.user).exists()
+        
+        if liked:
+            return self.delete(request, pk)
+        return self.put(request, pk)
+    
+    def notify(self, thread, user):
+        if thread.author_id == user.id:
+            return
+        
+        # grouping locks the author's notification counter, a row every
+        # liker of the thread would queue on again, so leave it to a job
+        enqueue('notifications.like_changed', {'thread_id': thread.id, 'user_id': user.id})
+    
+    def buffer(self, request, thread, liked):
+        is_liked, likes_count = likebuffer.record(thread, request.user, liked)
+        return Response(
+            {'message': 'Liked' if liked else 'Unliked', 'likes_count': likes_count, 'is_liked': is_liked},
+            status=status.HTTP_202_ACCEPTED
+        )
\ No newline at end of file
@@ -26,7 +26,9 @@ import {
     IonRefresherContent,
     IonFab,
     IonFabButton,
-    IonItem
+    IonItem,
+    IonInfiniteScroll,
+    IonInfiniteScrollContent
 } from '@ionic/react'
 
 import {
@@ -97,6 +99,7 @@ const ViewGroup: React.FC<ViewGroupProps> = ({
 }) => {
     const [community, setCommunity] = useState<CommunityGroup | null>(null)
     const [posts, setPosts] = useState<CommunityPost[]>([])
+    const [nextPosts, setNextPosts] = useState<string | null>(null)
     const [loading, setLoading] = useState(true)
     const [selectedSegment, setSelectedSegment] = useState<string>('posts')
     const [showToast, setShowToast] = useState(false)
@@ -130,12 +133,30 @@ const ViewGroup: React.FC<ViewGroupProps> = ({
         
         try {
             const data = await getCommunityGroupPosts(groupId)
-            setPosts(data)
+            setPosts(data.posts)
+            setNextPosts(data.next)
         } catch (error: any) {
             console.error('Failed to fetch posts:', error)
         }
     }
 
+    const loadMorePosts = async (event: any) => {
+        if (!groupId || !nextPosts) {
+            event.target.complete()
+            return
+        }
+
+        try {
+            const data = await getCommunityGroupPosts(groupId, nextPosts)
+            setPosts(prev => [...prev, ...data.posts])
+            setNextPosts(data.next)
+        } catch (error: any) {
+            console.error('Failed to fetch more posts:', error)
+        } finally {
+            event.target.complete()
+        }
+    }
+
     const handleRefresh = async (event: CustomEvent) => {
         await Promise.all([
             fetchCommunityDetails(),
@@ -377,6 +398,17 @@ const ViewGroup: React.FC<ViewGroupProps> = ({
                                                     )
                                                 })
                                             )}
+
+                                            <IonInfiniteScroll
+                                                onIonInfinite={loadMorePosts}
+                                                threshold='100px'
+                                                disabled={!nextPosts}
+                                            >
+                                                <IonInfiniteScrollContent
+                                                    loadingSpinner='bubbles'
+                                                    loadingText='Loading more posts...'
+                                                />
+                                            </IonInfiniteScroll>
                                         </IonCol>
                                     </IonRow>
                                 )}
@@ -88,10 +88,10 @@ const NotificationList: React.FC<NotificationListProps> = ({
     const handleNotificationClick = async (notification: NotificationData) => {
         try {
             if (!notification.is_read) {
-                await markNotificationAsRead(notification.id)
+                await markNotificationAsRead(notification.id, notification.is_broadcast)
                 setNotifications(prev =>
                     prev.map(n =>
-                        n.id === notification.id ? { ...n, is_read: true } : n
+                        n.id === notification.id && n.is_broadcast === notification.is_broadcast ? { ...n, is_read: true } : n
                     )
                 )
                 setUnreadCount(prev => prev - 1)
@@ -121,10 +121,10 @@ const NotificationList: React.FC<NotificationListProps> = ({
         }
     }
 
-    const handleDeleteNotification = async (id: number) => {
+    const handleDeleteNotification = async (notification: NotificationData) => {
         try {
-            await deleteNotification(id)
-            setNotifications(prev => prev.filter(n => n.id !== id))
+            await deleteNotification(notification.id, notification.is_broadcast)
+            setNotifications(prev => prev.filter(n => n.id !== notification.id || n.is_broadcast !== notification.is_broadcast))
             setToastMessage('Notification deleted')
             setShowToast(true)
         } catch (error: any) {
@@ -214,7 +214,7 @@ const NotificationList: React.FC<NotificationListProps> = ({
                                 const senderName = `${notification.sender.firstname} ${notification.sender.lastname}`
 
                                 return (
-                                    <IonItemSliding key={notification.id}>
+                                    <IonItemSliding key={`${notification.is_broadcast ? 'broadcast' : 'notification'}-${notification.id}`}>
                                         <IonItem
                                             button
                                             lines='none'
@@ -246,7 +246,7 @@ const NotificationList: React.FC<NotificationListProps> = ({
                                         <IonItemOptions side='end'>
                                             <IonItemOption
                                                 color='danger'
-                                                onClick={() => handleDeleteNotification(notification.id)}
+                                                onClick={() => handleDeleteNotification(notification)}
                                             >
                                                 <IonIcon icon={trashOutline} />
                                             </IonItemOption>
@@ -72,7 +72,8 @@ const ThreadPost: React.FC = () => {
         setLikingThreads(prev => ({ ...prev, [threadId]: true }))
 
         try {
-            const response = await likeThreadPost(threadId)
+            const liked = !threads.find(thread => thread.id === threadId)?.is_liked
+            const response = await likeThreadPost(threadId, liked)
             
             setThreads(prevThreads => 
                 prevThreads.map(thread => 
@@ -80,7 +81,7 @@ const ThreadPost: React.FC = () => {
                         ? {
                             ...thread,
                             likes_count: response.likes_count,
-                            is_liked: !thread.is_liked
+                            is_liked: response.is_liked
                         }
                         : thread
                 )
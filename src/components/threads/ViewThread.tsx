@@ -137,13 +137,13 @@ const ViewThread: React.FC<ViewThreadProps> = ({
         setLikingThread(true)
 
         try {
-            const response = await likeThreadPost(threadId)
+            const response = await likeThreadPost(threadId, !thread?.is_liked)
             
             if (thread && thread.id === threadId) {
                 setThread({
                     ...thread,
                     likes_count: response.likes_count,
-                    is_liked: !thread.is_liked
+                    is_liked: response.is_liked
                 })
             }
         } catch (error: any) {
@@ -128,7 +128,8 @@ const UserProfileView: React.FC<UserProfileViewProps> = ({
         setLikingThreads(prev => ({ ...prev, [threadId]: true }))
 
         try {
-            const response = await likeThreadPost(threadId)
+            const liked = !threads.find(thread => thread.id === threadId)?.is_liked
+            const response = await likeThreadPost(threadId, liked)
             
             setThreads(prevThreads => 
                 prevThreads.map(thread => 
@@ -136,7 +137,7 @@ const UserProfileView: React.FC<UserProfileViewProps> = ({
                         ? {
                             ...thread,
                             likes_count: response.likes_count,
-                            is_liked: !thread.is_liked
+                            is_liked: response.is_liked
                         }
                         : thread
                 )
@@ -32,8 +32,8 @@ import UsersList from '../../components/home/UsersList'
 import SearchList from '../../components/home/SearchList'
 
 import { getAllThreadPost, likeThreadPost } from '../../services/ThreadService'
-import { getUserProfile } from '../../services/AuthService'
-import { getNotifications, NotificationData } from '../../services/NotificationService'
+import { getUserProfile, getUserProfileByUsername } from '../../services/AuthService'
+import { getNotifications, NotificationData, subscribeToNotifications } from '../../services/NotificationService'
 
 
 interface ThreadData {
@@ -77,6 +77,7 @@ const HomePage = () => {
     useEffect(() => {
         fetchAllThreadPost()
         fetchNotificationCount()
+        return subscribeToNotifications(setNotificationCount)
     }, [])
 
     const handleRefresh = async (event: CustomEvent) => {
@@ -90,7 +91,8 @@ const HomePage = () => {
         setLikingThreads(prev => ({ ...prev, [threadId]: true }))
 
         try {
-            const response = await likeThreadPost(threadId)
+            const liked = !threads.find(thread => thread.id === threadId)?.is_liked
+            const response = await likeThreadPost(threadId, liked)
 
             setThreads(prevThreads => 
                 prevThreads.map(thread => 
@@ -98,7 +100,7 @@ const HomePage = () => {
                         ? {
                             ...thread,
                             likes_count: response.likes_count,
-                            is_liked: !thread.is_liked
+                            is_liked: response.is_liked
                         }
                         : thread
                 )
@@ -136,7 +138,8 @@ const HomePage = () => {
             if (currentUser.username === userProfile.username) {
                 history.push('/tabs/profile')
             } else {
-                setSelectedUserProfile(userProfile)
+                // threads only embed a compact author card, load the full profile
+                setSelectedUserProfile(await getUserProfileByUsername(userProfile.username))
                 setShowUserProfileSheet(true)
             }
         } catch (error) {
@@ -154,7 +157,7 @@ const HomePage = () => {
             if (currentUser.username === userProfile.username) {
                 history.push('/tabs/profile')
             } else {
-                setSelectedUserProfile(userProfile)
+                setSelectedUserProfile(await getUserProfileByUsername(userProfile.username))
                 setShowUserProfileSheet(false)
             }
         } catch (error) {
@@ -250,6 +250,23 @@ export const getUserFollowing = async (username: string) => {
     }
 }
 
+export const getUserProfileByUsername = async (username: string) => {
+    try {
+        const response = await axios.get(
+            `${API_AUTH_URL}users/${username}/`,
+            {
+                headers: getAuthHeader()
+            }
+        )
+        return response.data
+    } catch (error: unknown) {
+        if (axios.isAxiosError(error) && error.response?.data) {
+            throw error.response.data
+        }
+        throw { error: 'Failed to fetch user profile' }
+    }
+}
+
 export const getAllUsers = async () => {
     try {
         const response = await axios.get(
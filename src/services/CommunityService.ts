@@ -132,16 +132,20 @@ export const getCommunityGroupMembers = async (communityId: number) => {
 
 // POSTS IN COMMUNITY GROUP
 
-export const getCommunityGroupPosts = async (communityId: number) => {
+// pinned first, then newest; pass the previous page's `next` to load more
+export const getCommunityGroupPosts = async (communityId: number, next?: string | null) => {
     try {
         const token = getAuthToken()
-    const response = await axios.get(`${API_COMMUNITY_URL}groups/${communityId}/posts/`, {
+    const response = await axios.get(next || `${API_COMMUNITY_URL}groups/${communityId}/posts/`, {
             headers: {
                 'Authorization': `Bearer ${token}`
             }
         })
 
-        return response.data
+        return {
+            posts: response.data.results,
+            next: response.data.next
+        }
     } catch (error: any) {
         throw error.response?.data || { error: 'Failed to fetch community group posts' }
     }
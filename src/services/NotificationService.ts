@@ -15,9 +15,10 @@ export interface NotificationData {
         lastname: string
         profile_image_url?: string | null
     }
-    notification_type: 'like' | 'comment' | 'follow' | 'new_post'
+    notification_type: 'like' | 'comment' | 'follow' | 'new_post' | 'announcement'
     message: string
     is_read: boolean
+    is_broadcast?: boolean
     created_at: string
     thread?: {
         id: number
@@ -28,17 +29,18 @@ export interface NotificationData {
 export interface NotificationResponse {
     notifications: NotificationData[]
     unread_count: number
+    next: string | null
 }
 
-// -- GET ALL NOTIFICATION --
-export const getNotifications = async (): Promise<NotificationResponse> => {
+// -- GET NOTIFICATION PAGE (pass the previous page's `next` to load more) --
+export const getNotifications = async (next?: string | null): Promise<NotificationResponse> => {
     try {
-    const response = await axios.get(`${API_NOTIFICATION_URL}content/`, {
+    const response = await axios.get(next || `${API_NOTIFICATION_URL}content/?page_size=50`, {
             headers: getAuthHeader()
         })
         
         // Transform backend response to match frontend interface
-        const transformedNotifications = response.data.notifications.map((notif: any) => ({
+        const transformedNotifications = response.data.results.map((notif: any) => ({
             id: notif.id,
             sender: {
                 username: notif.sender_username,
@@ -49,6 +51,7 @@ export const getNotifications = async (): Promise<NotificationResponse> => {
             notification_type: notif.notification_type,
             message: notif.message,
             is_read: notif.is_read,
+            is_broadcast: notif.is_broadcast,
             created_at: notif.created_at,
             thread: notif.thread_id ? {
                 id: notif.thread_id,
@@ -58,17 +61,19 @@ export const getNotifications = async (): Promise<NotificationResponse> => {
         
         return {
             notifications: transformedNotifications,
-            unread_count: response.data.unread_count
+            unread_count: response.data.unread_count,
+            next: response.data.next
         }
     } catch (error: any) {
         throw error.response?.data || { error: 'Failed to fetch notifications' }
     }
 }
 
-// -- MARK READ NOTIFICATION --
-export const markNotificationAsRead = async (id: number): Promise<NotificationData> => {
+// -- MARK READ NOTIFICATION (broadcast announcements have their own ids) --
+export const markNotificationAsRead = async (id: number, isBroadcast = false): Promise<NotificationData> => {
     try {
-    const response = await axios.patch(`${API_NOTIFICATION_URL}content/${id}/read/`, {}, {
+    const url = isBroadcast ? `${API_NOTIFICATION_URL}content/broadcasts/${id}/read/` : `${API_NOTIFICATION_URL}content/${id}/read/`
+    const response = await axios.patch(url, {}, {
             headers: getAuthHeader()
         })
         
@@ -85,6 +90,7 @@ export const markNotificationAsRead = async (id: number): Promise<NotificationDa
             notification_type: notif.notification_type,
             message: notif.message,
             is_read: notif.is_read,
+            is_broadcast: notif.is_broadcast,
             created_at: notif.created_at,
             thread: notif.thread_id ? {
                 id: notif.thread_id,
@@ -108,10 +114,11 @@ export const markAllNotificationsAsRead = async (): Promise<any> => {
     }
 }
 
-// -- DELETE NOTIFICATION --
-export const deleteNotification = async (id: number): Promise<any> => {
+// -- DELETE NOTIFICATION (dismisses broadcast announcements) --
+export const deleteNotification = async (id: number, isBroadcast = false): Promise<any> => {
     try {
-    const response = await axios.delete(`${API_NOTIFICATION_URL}content/${id}/delete/`, {
+    const url = isBroadcast ? `${API_NOTIFICATION_URL}content/broadcasts/${id}/dismiss/` : `${API_NOTIFICATION_URL}content/${id}/delete/`
+    const response = await axios.delete(url, {
             headers: getAuthHeader()
         })
         return response.data
@@ -120,3 +127,44 @@ export const deleteNotification = async (id: number): Promise<any> => {
     }
 }
 
+
+// -- SUBSCRIBE TO NOTIFICATION STREAM (returns the unsubscribe function) --
+export const subscribeToNotifications = (onUnreadCount: (count: number) => void): (() => void) => {
+    let source: EventSource | null = null
+    let retry: ReturnType<typeof setTimeout> | null = null
+    let closed = false
+
+    // EventSource cannot send headers, so each connection redeems a short-lived single-use ticket
+    const connect = async () => {
+        try {
+            const response = await axios.post(`${API_NOTIFICATION_URL}content/stream/ticket/`, {}, {
+                headers: getAuthHeader()
+            })
+            if (closed) return
+
+            source = new EventSource(`${API_NOTIFICATION_URL}content/stream/?ticket=${encodeURIComponent(response.data.ticket)}`)
+            source.addEventListener('unread_count', (event) => {
+                onUnreadCount(JSON.parse((event as MessageEvent).data).unread_count)
+            })
+            source.onerror = () => {
+                // the ticket is spent, reconnect with a fresh one
+                source?.close()
+                reconnect()
+            }
+        } catch (error) {
+            reconnect()
+        }
+    }
+
+    const reconnect = () => {
+        if (!closed) retry = setTimeout(connect, 5000)
+    }
+
+    connect()
+
+    return () => {
+        closed = true
+        if (retry) clearTimeout(retry)
+        source?.close()
+    }
+}
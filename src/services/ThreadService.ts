@@ -24,7 +24,7 @@ export const getAllThreadPost = async (): Promise<ThreadPostData[]> => {
     
     try {
         const token = getAuthToken()
-    const response = await axios.get(`${API_THREAD_URL}posts/`,{
+    const response = await axios.get(`${API_THREAD_URL}posts/?paginate=false`,{
             headers: {
                 'Authorization': `Bearer ${token}`
             }
@@ -156,7 +156,7 @@ export const deleteThreadPost = async (id: number): Promise<any> => {
 export const getThreadComments =  async (threadId: number) => {
     try {
         const token = getAuthToken()
-    const response = await axios.get(`${API_THREAD_URL}posts/${threadId}/comments/`, {
+    const response = await axios.get(`${API_THREAD_URL}posts/${threadId}/comments/?paginate=false`, {
             headers: { 
                 'Authorization': `Bearer ${token}` 
             },
@@ -183,10 +183,13 @@ export const createComment = async (threadId: number, content: string) => {
     }
 }
 
-export const likeThreadPost = async (threadId: number) => {
+// PUT likes and DELETE unlikes, repeating either (e.g. a double tap) changes nothing
+export const likeThreadPost = async (threadId: number, liked: boolean) => {
     try {
         const token = getAuthToken()
-    const response = await axios.post(`${API_THREAD_URL}posts/${threadId}/like/`, {}, {
+    const response = await axios.request({
+            method: liked ? 'put' : 'delete',
+            url: `${API_THREAD_URL}posts/${threadId}/like/`,
             headers: { 
                 'Authorization': `Bearer ${token}` 
             },